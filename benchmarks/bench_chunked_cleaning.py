@@ -0,0 +1,98 @@
+# bench_chunked_cleaning.py
+# Peak memory of whole-file vs chunked cleaning for FEMA and NOAA on
+# synthetic inputs of growing size. Every run happens in a fresh worker
+# process, so its peak RSS covers that one clean only.
+#
+# Usage (from the project root):
+#   python -m benchmarks.bench_chunked_cleaning
+#   python -m benchmarks.bench_chunked_cleaning --scales 1,10 --dataset noaa
+#
+# 100x writes several GB of CSV; whole-file runs that run out of memory
+# are reported as failed.
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic
+
+WRITERS = {"fema": synthetic.write_fema, "noaa": synthetic.write_noaa}
+
+
+# ---------------------------------------------------
+# Worker: clean one file and report its own peak RSS
+# ---------------------------------------------------
+def worker(dataset, raw_path, chunksize):
+    import clean_all_data
+
+    cleaner = getattr(clean_all_data, f"clean_{dataset}")
+    clean_path = raw_path + ".clean.csv"
+
+    start = time.perf_counter()
+    result = cleaner(raw_path, clean_path, chunksize=chunksize or None)
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    os.remove(clean_path)
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb, "rows": result["rows_out"]}))
+
+
+def run_worker(dataset, raw_path, chunksize):
+    cmd = [
+        sys.executable, "-m", "benchmarks.bench_chunked_cleaning",
+        "--worker", dataset, raw_path, str(chunksize),
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------
+# Main
+# ---------------------------------------------------
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        dataset, raw_path, chunksize = sys.argv[2:5]
+        worker(dataset, raw_path, int(chunksize))
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark chunked cleaning memory")
+    parser.add_argument("--scales", default="1,10,100", help="comma separated input sizes")
+    parser.add_argument("--dataset", action="append", choices=sorted(WRITERS))
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--work-dir", default=None, help="where to write the synthetic files")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")]
+    datasets = args.dataset or sorted(WRITERS)
+
+    print(f"\n{'dataset':<8}{'scale':>6}{'input MB':>10}{'mode':>9}"
+          f"{'rows':>12}{'seconds':>10}{'peak MB':>10}")
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        for dataset in datasets:
+            for scale in scales:
+                raw_path = os.path.join(work_dir, f"{dataset}_{scale}x.csv")
+                WRITERS[dataset](raw_path, scale)
+                input_mb = os.path.getsize(raw_path) / 1e6
+
+                for mode, chunksize in (("whole", 0), ("chunked", args.chunksize)):
+                    stats = run_worker(dataset, raw_path, chunksize)
+                    if stats is None:
+                        print(f"{dataset:<8}{scale:>5}x{input_mb:>10.0f}{mode:>9}  failed")
+                        continue
+                    print(f"{dataset:<8}{scale:>5}x{input_mb:>10.0f}{mode:>9}"
+                          f"{stats['rows']:>12,}{stats['seconds']:>10.1f}{stats['peak_mb']:>10.0f}")
+
+                os.remove(raw_path)
+
+
+if __name__ == "__main__":
+    main()
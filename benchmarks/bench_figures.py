@@ -0,0 +1,294 @@
+# bench_figures.py
+# Per-figure build time of the dashboard charts: the plotly.express calls
+# the home view used to make against the figure dicts of dashboard/charts.py,
+# on synthetic inputs shaped like one page (51 states, 5 years). Also times
+# serializing each figure to the JSON its HTML fragment embeds, and checks
+# that both versions serialize to the same figure.
+#
+# Usage (from the project root):
+#   python -m benchmarks.bench_figures
+#   python -m benchmarks.bench_figures --repeat 500 --states 20
+
+import argparse
+import base64
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+from dashboard import charts
+from utils.state_mapping import STATE_MAP
+
+YEARS = list(range(2018, 2023))
+STATE = "TX"
+
+
+# ---------------------------------------------------
+# Synthetic page inputs
+# ---------------------------------------------------
+def make_inputs(n_states, seed=0):
+    rng = np.random.default_rng(seed)
+    states = sorted(set(STATE_MAP.values()) - {STATE})[: n_states - 1] + [STATE]
+
+    merged = pd.DataFrame({
+        "state": states,
+        "Average Premium": rng.uniform(900, 3000, len(states)),
+        "disaster_count": rng.integers(0, 40, len(states)).astype(float),
+    })
+    merged["Premium Index"] = merged["Average Premium"] / merged["Average Premium"].mean()
+    merged["Risk Score"] = 0.5 * merged["Premium Index"] + rng.uniform(0.3, 0.7, len(states))
+
+    trend = {
+        "National Avg": list(np.cumprod(rng.uniform(0.95, 1.1, len(YEARS)))),
+        STATE: list(np.cumprod(rng.uniform(0.9, 1.2, len(YEARS)))),
+    }
+    weather = pd.DataFrame({
+        "year": np.arange(1996, 2025),
+        "State Value": rng.uniform(0, 5, 29),
+        "National Value": rng.uniform(0, 5, 29),
+    })
+    mix = pd.DataFrame({
+        "incident_group": ["Fire", "Flood", "Hurricane", "Severe Storm", "Winter"],
+        "count": rng.integers(10, 500, 5),
+    })
+    return {"merged": merged, "trend": trend, "weather": weather, "mix": mix}
+
+
+# ---------------------------------------------------
+# plotly.express versions, as the view built them
+# ---------------------------------------------------
+def px_trend(inputs):
+    rows = [
+        {"Year": year, "Premium Index": value, "Series": name}
+        for name, values in inputs["trend"].items()
+        for year, value in zip(YEARS, values)
+    ]
+    trend_df = pd.DataFrame(rows).sort_values("Year")
+    fig = px.line(
+        trend_df, x="Year", y="Premium Index", color="Series", markers=True,
+        title="Auto Insurance Premium Trend, indexed to base year",
+    )
+    fig.add_hline(y=1.0, line_dash="dash", annotation_text=f"{YEARS[0]} baseline")
+    fig.update_layout(
+        xaxis=dict(type="linear", tickmode="array", tickvals=YEARS),
+        yaxis_title="Premium Index", xaxis_title="Year", yaxis_tickformat=".2f",
+        template="plotly_white", legend_title_text="",
+    )
+    return fig
+
+
+def px_weather(inputs):
+    melted = inputs["weather"].melt(
+        id_vars="year", value_vars=["State Value", "National Value"],
+        var_name="Series", value_name="Value",
+    )
+    fig = px.line(
+        melted, x="year", y="Value", color="Series", markers=True,
+        title=f"NOAA weather trend for {STATE}",
+    )
+    fig.update_layout(
+        xaxis_title="Year", yaxis_title="PRCP", template="plotly_white", legend_title_text="",
+    )
+    return fig
+
+
+def px_mix(inputs):
+    fig = px.pie(
+        inputs["mix"], names="incident_group", values="count",
+        title=f"FEMA disaster mix for {STATE}",
+    )
+    fig.update_layout(template="plotly_white")
+    return fig
+
+
+def px_bar(inputs):
+    bar_df = inputs["merged"].sort_values("Premium Index", ascending=True).copy()
+    bar_df["Highlight"] = bar_df["state"].apply(lambda s: STATE if s == STATE else "Other")
+    fig = px.bar(
+        bar_df, x="Premium Index", y="state", orientation="h", color="Highlight",
+        color_discrete_map={STATE: "#d62728", "Other": "#1f77b4"},
+        title="Auto premium index by state",
+        hover_data={
+            "Average Premium": ":$,.0f",
+            "Premium Index": ":.2f",
+            "disaster_count": True,
+            "Risk Score": ":.2f",
+        },
+    )
+    fig.add_vline(
+        x=1.0, line_dash="dash", line_color="black", annotation_text="National average",
+    )
+    fig.update_layout(
+        xaxis_title="Premium Index", yaxis_title="State", template="plotly_white",
+        legend_title_text="",
+    )
+    return fig
+
+
+def px_correlation(inputs):
+    fig = px.scatter(
+        inputs["merged"], x="disaster_count", y="Premium Index", color="Risk Score",
+        hover_name="state", size="Risk Score",
+        labels={
+            "disaster_count": "Average Annual Disasters",
+            "Premium Index": "Premium Index",
+            "Risk Score": "Composite Risk Score",
+        },
+        title="Relationship Between Disaster Activity and Insurance Premiums",
+        color_continuous_scale=px.colors.sequential.Blues,
+        template="plotly_white",
+    )
+    fig.update_layout(
+        xaxis_title="Average Annual FEMA Disasters",
+        yaxis_title="Premium Index (1.00 = National Average)",
+        coloraxis_colorbar=dict(title="Risk Score", tickformat=".2f"),
+    )
+    return fig
+
+
+def px_map(inputs):
+    return px.choropleth(
+        inputs["merged"], locations="state", locationmode="USA-states", color="Risk Score",
+        scope="usa", color_continuous_scale=px.colors.sequential.Blues, template="plotly_white",
+    )
+
+
+# ---------------------------------------------------
+# dashboard/charts.py versions, as the view builds them now
+# ---------------------------------------------------
+def dict_trend(inputs):
+    return charts.trend_figure(YEARS, inputs["trend"], YEARS[0])
+
+
+def dict_weather(inputs):
+    weather = inputs["weather"]
+    return charts.weather_figure(
+        weather["year"].to_numpy(), weather["State Value"].to_numpy(),
+        weather["National Value"].to_numpy(), STATE, "PRCP",
+    )
+
+
+def dict_mix(inputs):
+    mix = inputs["mix"]
+    return charts.mix_figure(mix["incident_group"].to_numpy(), mix["count"].to_numpy(), STATE)
+
+
+def dict_bar(inputs):
+    bar_df = inputs["merged"].sort_values("Premium Index", ascending=True)
+    return charts.premium_bar_figure(
+        bar_df["state"].to_numpy(), bar_df["Premium Index"].to_numpy(),
+        bar_df["Average Premium"].to_numpy(), bar_df["disaster_count"].to_numpy(),
+        bar_df["Risk Score"].to_numpy(), STATE, "Auto",
+    )
+
+
+def dict_correlation(inputs):
+    merged = inputs["merged"]
+    return charts.correlation_figure(
+        merged["state"].to_numpy(), merged["disaster_count"].to_numpy(),
+        merged["Premium Index"].to_numpy(), merged["Risk Score"].to_numpy(),
+    )
+
+
+def dict_map(inputs):
+    merged = inputs["merged"]
+    return charts.risk_map_figure(merged["state"].to_numpy(), merged["Risk Score"].to_numpy())
+
+
+FIGURES = {
+    "trend": (px_trend, dict_trend),
+    "weather": (px_weather, dict_weather),
+    "mix": (px_mix, dict_mix),
+    "bar": (px_bar, dict_bar),
+    "correlation": (px_correlation, dict_correlation),
+    "map": (px_map, dict_map),
+}
+
+
+# ---------------------------------------------------
+# Equivalence
+# ---------------------------------------------------
+def plain(obj):
+    """Serialized figure with plotly's base64 typed arrays decoded to lists."""
+    if isinstance(obj, dict):
+        if set(obj) >= {"dtype", "bdata"}:
+            values = np.frombuffer(base64.b64decode(obj["bdata"]), dtype=obj["dtype"])
+            if "shape" in obj:
+                values = values.reshape([int(n) for n in obj["shape"].split(",")])
+            return values.tolist()
+        return {key: plain(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [plain(value) for value in obj]
+    return obj
+
+
+def same(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and math.isclose(a, b)
+    return a == b
+
+
+def equivalent(px_fig, fig):
+    return same(
+        plain(json.loads(px_fig.to_json())),
+        plain(json.loads(pio.to_json(fig, validate=False))),
+    )
+
+
+# ---------------------------------------------------
+# Main
+# ---------------------------------------------------
+def time_ms(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark px figures against dashboard/charts.py")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--states", type=int, default=51)
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.states)
+    # first calls pay for imports and the template conversion
+    for px_build, dict_build in FIGURES.values():
+        px_build(inputs)
+        dict_build(inputs)
+
+    print(
+        f"{'figure':<13}{'px (ms)':>10}{'dict (ms)':>11}{'speedup':>9}"
+        f"{'px json':>10}{'dict json':>11}  same"
+    )
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for name, (px_build, dict_build) in FIGURES.items():
+        px_fig, fig = px_build(inputs), dict_build(inputs)
+        row = [
+            time_ms(lambda: px_build(inputs), args.repeat),
+            time_ms(lambda: dict_build(inputs), args.repeat),
+            # figure JSON only; plotly.js is the same in both
+            time_ms(lambda: px_fig.to_json(), args.repeat),
+            time_ms(lambda: pio.to_json(fig, validate=False), args.repeat),
+        ]
+        totals = [t + r for t, r in zip(totals, row)]
+        print(
+            f"{name:<13}{row[0]:>10.2f}{row[1]:>11.3f}{row[0] / row[1]:>8.0f}x"
+            f"{row[2]:>10.2f}{row[3]:>11.3f}  {'yes' if equivalent(px_fig, fig) else 'NO'}"
+        )
+    print(
+        f"{'total':<13}{totals[0]:>10.2f}{totals[1]:>11.3f}{totals[0] / totals[1]:>8.0f}x"
+        f"{totals[2]:>10.2f}{totals[3]:>11.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench_normalization.py
+# Compares the row by row normalizers (Series.apply) with the column
+# versions on synthetic columns shaped like the FEMA / NOAA / NAIC inputs,
+# and checks that both produce identical results.
+#
+# Usage (from the project root):
+#   python -m benchmarks.bench_normalization
+#   python -m benchmarks.bench_normalization --rows 1000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.state_mapping import STATE_MAP, normalize_state, normalize_state_series
+from utils.time_normalization import normalize_year, normalize_year_series
+from utils.value_normalization import normalize_dollar, normalize_dollar_series
+
+
+# ---------------------------------------------------
+# Synthetic columns
+# ---------------------------------------------------
+def make_columns(rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    # full names, codes, odd casing and a few rows that do not map
+    state_values = np.array(
+        list(STATE_MAP) + ["texas", " Ohio ", "D.C.", "Countrywide", "Guam"], dtype=object
+    )
+    states = pd.Series(state_values[rng.integers(0, len(state_values), rows)])
+    states[rng.random(rows) < 0.01] = np.nan
+
+    # declaration style dates and bare years
+    year_values = np.array(
+        [f"{y}-0{m}-15T00:00:00.000Z" for y in range(1990, 2023) for m in range(1, 10)]
+        + [str(y) for y in range(1990, 2023)],
+        dtype=object,
+    )
+    years = pd.Series(year_values[rng.integers(0, len(year_values), rows)])
+
+    # premium strings with about ten thousand distinct values
+    dollar_values = np.array(
+        [f"${v:,.2f}" for v in rng.uniform(300, 5000, 10_000)], dtype=object
+    )
+    dollars = pd.Series(dollar_values[rng.integers(0, len(dollar_values), rows)])
+
+    return {"state": states, "year": years, "dollar": dollars}
+
+
+def timed(func, series):
+    start = time.perf_counter()
+    result = func(series)
+    return result, time.perf_counter() - start
+
+
+# ---------------------------------------------------
+# Main
+# ---------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the column normalizers")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument(
+        "--skip-apply",
+        action="store_true",
+        help="only time the column versions (the apply baseline is slow at 10M rows)",
+    )
+    args = parser.parse_args()
+
+    print(f"Building synthetic columns with {args.rows:,} rows...")
+    columns = make_columns(args.rows)
+
+    pairs = {
+        "state": (normalize_state, normalize_state_series),
+        "year": (normalize_year, normalize_year_series),
+        "dollar": (normalize_dollar, normalize_dollar_series),
+    }
+
+    print(f"\n{'column':<8}{'apply (s)':>12}{'series (s)':>12}{'speedup':>10}  match")
+    for name, (scalar, vectorized) in pairs.items():
+        series = columns[name]
+        fast, fast_s = timed(vectorized, series)
+
+        if args.skip_apply:
+            print(f"{name:<8}{'-':>12}{fast_s:>12.3f}{'-':>10}  -")
+            continue
+
+        slow, slow_s = timed(lambda s: s.apply(scalar), series)
+        pd.testing.assert_series_equal(slow, fast)
+        print(f"{name:<8}{slow_s:>12.3f}{fast_s:>12.3f}{slow_s / fast_s:>9.1f}x  yes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench_trends.py
+# Premium trend fits of dashboard/trends.py: the batched least-squares solve
+# over the whole states × years matrix against fitting one state at a time
+# with np.polyfit, on synthetic premiums with some missing years. Checks
+# that both give the same CAGR, growth, slope, volatility and projection.
+#
+# Usage (from the project root):
+#   python -m benchmarks.bench_trends
+#   python -m benchmarks.bench_trends --states 5000 --repeat 20
+
+import argparse
+import time
+
+import numpy as np
+
+from dashboard.trends import PROJECTION_YEARS, fit_trends
+
+YEARS = list(range(2018, 2023))
+FIELDS = ["cagr", "growth", "slope", "volatility", "projected"]
+
+
+def make_premiums(n_states, seed=0):
+    rng = np.random.default_rng(seed)
+    premiums = rng.uniform(700, 2500, (n_states, 1)) * np.cumprod(
+        rng.uniform(0.95, 1.12, (n_states, len(YEARS))), axis=1
+    )
+    premiums[rng.random(premiums.shape) < 0.05] = np.nan
+    return premiums
+
+
+def fit_loop(years, premiums, horizon=PROJECTION_YEARS):
+    """One np.polyfit per state, as a row-by-row engine would do it."""
+    t = np.asarray(years, dtype=float) - years[0]
+    future = t[-1] + np.arange(1, horizon + 1)
+    out = {name: np.full(len(premiums), np.nan) for name in FIELDS[:-1]}
+    out["projected"] = np.full((len(premiums), horizon), np.nan)
+    for row, values in enumerate(premiums):
+        observed = np.isfinite(values) & (values > 0)
+        if observed.sum() < 2:
+            continue
+        x, y = t[observed], values[observed]
+        slope = np.polyfit(x, y, 1)[0]
+        log_slope, log_intercept = np.polyfit(x, np.log(y), 1)
+        residuals = np.log(y) - (log_intercept + log_slope * x)
+        out["slope"][row] = slope
+        out["growth"][row] = np.expm1(log_slope)
+        if len(x) > 2:
+            out["volatility"][row] = np.sqrt((residuals ** 2).sum() / (len(x) - 2))
+        out["cagr"][row] = (y[-1] / y[0]) ** (1 / (x[-1] - x[0])) - 1
+        out["projected"][row] = np.exp(log_intercept + log_slope * future)
+    return out
+
+
+def time_ms(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched trend fits against a per-state loop")
+    parser.add_argument("--states", type=int, default=51)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    premiums = make_premiums(args.states)
+    batched, looped = fit_trends(YEARS, premiums), fit_loop(YEARS, premiums)
+    same = all(np.allclose(batched[name], looped[name], equal_nan=True) for name in FIELDS)
+
+    loop_ms = time_ms(lambda: fit_loop(YEARS, premiums), args.repeat)
+    batched_ms = time_ms(lambda: fit_trends(YEARS, premiums), args.repeat)
+    print(f"{args.states} states x {len(YEARS)} years")
+    print(f"per-state loop  {loop_ms:10.3f} ms")
+    print(f"batched         {batched_ms:10.3f} ms   {loop_ms / batched_ms:.0f}x faster")
+    print(f"same results    {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
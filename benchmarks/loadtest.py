@@ -0,0 +1,567 @@
+# loadtest.py
+# Concurrent load test of the dashboard over real HTTP. Writes a synthetic
+# data version (every state, NOAA metrics, states without FEMA rows; see
+# synthetic.write_dashboard_fixture) into a temporary data root, starts the
+# project on localhost under one or more WSGI / ASGI servers and drives a
+# mix of insurance / year / state page loads and data bundle fetches from
+# concurrent keep-alive clients. Reports throughput, latency percentiles,
+# error rate, page cache outcomes and the RSS of every server process over
+# the run.
+#
+# Needs nothing beyond the project's requirements, so it runs on an offline
+# box: "wsgiref" is the standard library WSGI server with a thread per
+# connection (HTTP/1.0, so no keep-alive) and "asyncio" a minimal HTTP/1.1
+# server driving the ASGI application. "gunicorn" and "uvicorn" can be
+# selected when they are installed and are the defaults then.
+#
+# Usage (from the project root):
+#   python -m benchmarks.loadtest
+#   python -m benchmarks.loadtest --servers wsgiref asyncio --concurrency 16 --duration 60
+#   python -m benchmarks.loadtest --no-page-cache --requests 200 --json loadtest.json
+
+import argparse
+import asyncio
+import http.client
+import importlib.util
+import itertools
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.parse import unquote, urlencode
+
+from benchmarks.synthetic import write_dashboard_fixture
+from utils.state_mapping import STATE_MAP
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = "127.0.0.1"
+
+# server: interface it serves
+SERVERS = {"wsgiref": "wsgi", "asyncio": "asgi", "gunicorn": "wsgi", "uvicorn": "asgi"}
+EXTERNAL_SERVERS = {"gunicorn", "uvicorn"}
+
+# request mix: most visitors look at Auto, recent years and populous states
+HOME_SHARE = 0.3
+BUNDLE_SHARE = 0.15
+NO_YEAR_SHARE = 0.1
+LOWERCASE_SHARE = 0.05
+YEAR_WEIGHTS = {2022: 40, 2021: 25, 2020: 15, 2019: 10, 2018: 10}
+
+READY_TIMEOUT = 60
+REQUEST_TIMEOUT = 120
+
+
+def available(server):
+    return server not in EXTERNAL_SERVERS or importlib.util.find_spec(server) is not None
+
+
+def default_servers():
+    """The best WSGI and ASGI server installed."""
+    return [
+        "gunicorn" if available("gunicorn") else "wsgiref",
+        "uvicorn" if available("uvicorn") else "asyncio",
+    ]
+
+
+# ---------------------------------------------------
+# Built-in servers (run in the server subprocess)
+# ---------------------------------------------------
+def serve_wsgiref(port):
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    from config.wsgi import application
+
+    class Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    class Handler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    make_server(HOST, port, application, Server, Handler).serve_forever()
+
+
+async def _asgi_connection(app, port, reader, writer):
+    """Serve HTTP/1.1 requests on one connection until the client closes it."""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers.append((name.strip().lower().encode("latin-1"), value.strip().encode("latin-1")))
+            header_map = dict(headers)
+            length = int(header_map.get(b"content-length", b"0"))
+            body = await reader.readexactly(length) if length else b""
+
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0", "spec_version": "2.3"},
+                "http_version": "1.1",
+                "method": method,
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode("latin-1"),
+                "query_string": query.encode("latin-1"),
+                "root_path": "",
+                "headers": headers,
+                "client": writer.get_extra_info("peername")[:2],
+                "server": (HOST, port),
+            }
+            request_sent = False
+            disconnected = asyncio.Event()
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            start = {}
+            chunks = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    start.update(message)
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+
+            await app(scope, receive, send)
+            disconnected.set()
+
+            content = b"".join(chunks)
+            head = [f"HTTP/1.1 {start['status']} {http.client.responses.get(start['status'], '')}"]
+            for name, value in start.get("headers", []):
+                if name.lower() not in (b"content-length", b"connection"):
+                    head.append(f"{name.decode('latin-1')}: {value.decode('latin-1')}")
+            head.append(f"Content-Length: {len(content)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + content)
+            await writer.drain()
+            if header_map.get(b"connection", b"").lower() == b"close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def serve_asyncio(port):
+    from config.asgi import application
+
+    async def main():
+        server = await asyncio.start_server(
+            lambda reader, writer: _asgi_connection(application, port, reader, writer),
+            HOST, port, backlog=128,
+        )
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+BUILTIN_SERVERS = {"wsgiref": serve_wsgiref, "asyncio": serve_asyncio}
+
+
+def server_command(server, port, workers, threads):
+    if server == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--bind", f"{HOST}:{port}", "--workers", str(workers), "--threads", str(threads),
+            "--timeout", str(REQUEST_TIMEOUT), "--log-level", "warning",
+        ]
+    if server == "uvicorn":
+        return [
+            sys.executable, "-m", "uvicorn", "config.asgi:application",
+            "--host", HOST, "--port", str(port), "--workers", str(workers),
+            "--no-access-log", "--log-level", "warning",
+        ]
+    return [sys.executable, "-m", "benchmarks.loadtest", "--serve", server, "--port", str(port)]
+
+
+# ---------------------------------------------------
+# Server process
+# ---------------------------------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def server_env(root, cache_dir, page_cache):
+    env = dict(os.environ)
+    env.update({
+        "DJANGO_SETTINGS_MODULE": "config.settings",
+        "DASHBOARD_DATA_DIR": root,
+        "DASHBOARD_DATA_SOURCE": "summary",
+        "DASHBOARD_PAGE_CACHE": "1" if page_cache else "0",
+        "DASHBOARD_PAGE_CACHE_DIR": cache_dir,
+        "PYTHONPATH": os.pathsep.join(filter(None, [PROJECT_DIR, env.get("PYTHONPATH")])),
+    })
+    return env
+
+
+def wait_ready(proc, port, log_path):
+    """Block until the server answers HTTP; raise with its log if it exits or never does."""
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=5)
+            conn.request("GET", "/__loadtest__")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        log = f.read()[-2000:]
+    raise RuntimeError(f"Server did not start on port {port}:\n{log}")
+
+
+def stop(proc):
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+# ---------------------------------------------------
+# RSS of the server and its worker processes
+# ---------------------------------------------------
+def _children():
+    """{parent pid: [child pids]} from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii", errors="replace") as f:
+                # the command name may contain spaces; ppid is the 2nd field after it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree(pid):
+    children = _children()
+    tree, todo = [], [pid]
+    while todo:
+        pid = todo.pop()
+        tree.append(pid)
+        todo.extend(children.get(pid, []))
+    return tree
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler(threading.Thread):
+    """Samples the RSS of pid and its descendants every interval seconds, on Linux."""
+
+    def __init__(self, pid, interval):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.start_time = time.perf_counter()
+        self.samples = {}  # pid: [(seconds, MB)]
+        self.stopped = threading.Event()
+
+    def run(self):
+        if not os.path.isdir("/proc"):
+            return
+        while not self.stopped.is_set():
+            now = time.perf_counter() - self.start_time
+            for pid in process_tree(self.pid):
+                mb = rss_mb(pid)
+                if mb is not None:
+                    self.samples.setdefault(pid, []).append((round(now, 2), round(mb, 1)))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# ---------------------------------------------------
+# Request mix
+# ---------------------------------------------------
+def state_weights(states, seed):
+    """Zipf-like popularity: a seeded ranking of states, weight 1 / rank."""
+    ranked = list(states)
+    random.Random(seed).shuffle(ranked)
+    return [1 / (ranked.index(state) + 1) for state in states]
+
+
+def pick_path(rng, states, weights, version):
+    insurance = "Home" if rng.random() < HOME_SHARE else "Auto"
+    if rng.random() < BUNDLE_SHARE:
+        return f"/bundle/{version}/{insurance}.json"
+
+    query = {"insurance": insurance, "state": rng.choices(states, weights)[0]}
+    if insurance == "Auto" and rng.random() >= NO_YEAR_SHARE:
+        query["year"] = rng.choices(list(YEAR_WEIGHTS), list(YEAR_WEIGHTS.values()))[0]
+    if rng.random() < LOWERCASE_SHARE:
+        query["insurance"] = insurance.lower()
+    return "/?" + urlencode(query)
+
+
+# ---------------------------------------------------
+# Clients
+# ---------------------------------------------------
+def client(port, next_path, keep_going, headers, records, start):
+    """Send requests on one keep-alive connection while keep_going(); reconnect on errors."""
+    conn = http.client.HTTPConnection(HOST, port, timeout=REQUEST_TIMEOUT)
+    while keep_going():
+        path = next_path()
+        sent = time.perf_counter()
+        status, size, cache = None, 0, None
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            size = len(response.read())
+            status, cache = response.status, response.getheader("X-Page-Cache")
+        except (OSError, http.client.HTTPException):
+            conn.close()
+        done = time.perf_counter()
+        records.append((sent - start, (done - sent) * 1000, status, size, cache))
+    conn.close()
+
+
+def drive(port, args, states, weights, version, seconds=None, requests=None, seed=0):
+    """Run args.concurrency clients for seconds, or until requests were sent. Returns (records, wall seconds)."""
+    headers = {} if args.no_gzip else {"Accept-Encoding": "gzip"}
+    start = time.perf_counter()
+    if requests is not None:
+        counter = itertools.count()
+
+        def keep_going():
+            return next(counter) < requests
+    else:
+        deadline = start + seconds
+
+        def keep_going():
+            return time.perf_counter() < deadline
+
+    records = []
+    threads = []
+    for i in range(args.concurrency):
+        rng = random.Random(seed * 1000 + i)
+        thread = threading.Thread(
+            target=client,
+            args=(port, lambda rng=rng: pick_path(rng, states, weights, version),
+                  keep_going, headers, records, start),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start
+
+
+# ---------------------------------------------------
+# Report
+# ---------------------------------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(records, seconds):
+    latencies = sorted(record[1] for record in records)
+    errors = sum(1 for record in records if record[2] is None or record[2] >= 400)
+    per_second = Counter(int(record[0]) for record in records)
+    n = len(records)
+    return {
+        "requests": n,
+        "errors": errors,
+        "error_rate": errors / n if n else 0.0,
+        "seconds": round(seconds, 2),
+        "rps": n / seconds if seconds else 0.0,
+        "mb_per_s": sum(record[3] for record in records) / seconds / 1e6 if seconds else 0.0,
+        "mean_ms": sum(latencies) / n if n else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+        "status": dict(Counter(str(record[2]) for record in records)),
+        "page_cache": dict(Counter(record[4] for record in records if record[4])),
+        "rps_per_second": [per_second.get(s, 0) for s in range(int(seconds) + 1)],
+    }
+
+
+def rss_summary(samples, server_pid, points=8):
+    workers = []
+    for pid, series in samples.items():
+        values = [mb for _, mb in series]
+        step = max(1, len(values) // points)
+        workers.append({
+            "pid": pid,
+            "role": "main" if pid == server_pid else "worker",
+            "start_mb": values[0],
+            "peak_mb": max(values),
+            "end_mb": values[-1],
+            "timeline_mb": values[::step],
+            "samples": series,
+        })
+    return workers
+
+
+def print_run(run):
+    s = run["summary"]
+    print(f"\n{run['server']} ({run['interface']}), {run['concurrency']} clients")
+    print(
+        f"  {s['requests']} requests in {s['seconds']:.1f}s: {s['rps']:.1f} req/s, "
+        f"{s['mb_per_s']:.1f} MB/s, errors {s['errors']} ({s['error_rate']:.1%})"
+    )
+    print(
+        f"  latency ms  mean {s['mean_ms']:.1f}  p50 {s['p50_ms']:.1f}  p90 {s['p90_ms']:.1f}  "
+        f"p95 {s['p95_ms']:.1f}  p99 {s['p99_ms']:.1f}  max {s['max_ms']:.1f}"
+    )
+    print(f"  status {s['status']}  page cache {s['page_cache'] or '-'}")
+    if not run["rss"]:
+        print("  RSS: not available (no /proc)")
+    for worker in run["rss"]:
+        timeline = " ".join(f"{mb:.0f}" for mb in worker["timeline_mb"])
+        print(
+            f"  RSS {worker['role']:<6} pid {worker['pid']:<7} start {worker['start_mb']:.0f} MB  "
+            f"peak {worker['peak_mb']:.0f} MB  end {worker['end_mb']:.0f} MB  [{timeline}]"
+        )
+
+
+# ---------------------------------------------------
+# One server run
+# ---------------------------------------------------
+def run_server(server, args, root, states, version):
+    port = free_port()
+    cache_dir = os.path.join(root, "cache", server)
+    env = server_env(root, cache_dir, not args.no_page_cache)
+    if args.warm_cache and not args.no_page_cache:
+        subprocess.run(
+            [sys.executable, "manage.py", "warm_cache", "--parallel", str(args.workers)],
+            cwd=PROJECT_DIR, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+    command = server_command(server, port, args.workers, args.threads)
+    log_path = os.path.join(root, f"{server}.log")
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(command, cwd=PROJECT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    sampler = RssSampler(proc.pid, args.sample_interval)
+    try:
+        wait_ready(proc, port, log_path)
+        sampler.start()
+        weights = state_weights(states, args.seed)
+        if args.warmup:
+            drive(port, args, states, weights, version, seconds=args.warmup, seed=args.seed + 1)
+        records, seconds = drive(
+            port, args, states, weights, version,
+            seconds=args.duration, requests=args.requests, seed=args.seed,
+        )
+    finally:
+        sampler.stop()
+        stop(proc)
+
+    return {
+        "server": server,
+        "interface": SERVERS[server],
+        "command": command,
+        "concurrency": args.concurrency,
+        "summary": summarize(records, seconds),
+        "rss": rss_summary(sampler.samples, proc.pid),
+    }
+
+
+# ---------------------------------------------------
+# Main
+# ---------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard over HTTP")
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=None,
+                        help="default: gunicorn or wsgiref, and uvicorn or asyncio")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to measure")
+    parser.add_argument("--requests", type=int, default=None,
+                        help="send this many requests instead of running for --duration")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of unmeasured load first")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn / uvicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--states", type=int, default=None, help="states in the fixture (default all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-page-cache", action="store_true", help="render every request")
+    parser.add_argument("--warm-cache", action="store_true", help="run warm_cache before each server")
+    parser.add_argument("--no-gzip", action="store_true", help="do not send Accept-Encoding: gzip")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between RSS samples")
+    parser.add_argument("--data-dir", default=None, help="keep the fixture here instead of a temp dir")
+    parser.add_argument("--json", default=None, help="also write the full results to this file")
+    parser.add_argument("--serve", choices=sorted(BUILTIN_SERVERS), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        BUILTIN_SERVERS[args.serve](args.port)
+        return
+
+    servers = args.servers or default_servers()
+    missing = [server for server in servers if not available(server)]
+    if missing:
+        parser.error(f"not installed: {', '.join(missing)}")
+
+    states = sorted(set(STATE_MAP.values()))[: args.states]
+    root = args.data_dir or tempfile.mkdtemp(prefix="dashboard-loadtest-")
+    os.makedirs(root, exist_ok=True)
+    try:
+        version = write_dashboard_fixture(root, states, args.seed)
+        print(f"fixture: {len(states)} states, data version {version} in {root}")
+        runs = []
+        for server in servers:
+            run = run_server(server, args, root, states, version)
+            print_run(run)
+            runs.append(run)
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ("serve", "port")}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "data_version": version, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
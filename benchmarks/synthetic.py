@@ -0,0 +1,147 @@
+# synthetic.py
+# Writes raw FEMA / NOAA files shaped like the extractor output, in
+# blocks, so inputs far bigger than memory can be generated for the
+# cleaning benchmarks, and the summary tables the dashboard reads, for
+# load tests against a server (benchmarks/loadtest.py).
+
+import numpy as np
+import pandas as pd
+
+from utils.incidents import INCIDENT_GROUPS
+
+# rows in a 1x file, roughly the size of the real extracts
+FEMA_ROWS = 65_000
+NOAA_ROWS = 300_000
+
+BLOCK_ROWS = 100_000
+
+FEMA_STATES = np.array(["TX", "FL", "CA", "NY", "OH", "AL", "LA", "OK", "PR", "GU"])
+FEMA_INCIDENTS = np.array(
+    ["Flood", "Hurricane", "Fire", "Severe Storm", "Tornado", "Snowstorm",
+     "Winter Storm", "Biological", None],
+    dtype=object,
+)
+NOAA_STATES = np.array(["TEXAS", "FLORIDA", "OHIO", "NEW YORK", "ALABAMA", "GULF OF MEXICO"])
+NOAA_EVENTS = np.array(["Hail", "Flood", "Tornado", "Thunderstorm Wind", "Heavy Snow"])
+
+
+def fema_block(rng, start, rows):
+    return pd.DataFrame(
+        {
+            "femaDeclarationString": [f"DR-{i}" for i in range(start, start + rows)],
+            "disasterNumber": rng.integers(1, 5000, rows),
+            "state": FEMA_STATES[rng.integers(0, len(FEMA_STATES), rows)],
+            "declarationType": "DR",
+            "declarationDate": pd.to_datetime(
+                rng.integers(1_000_000_000, 1_700_000_000, rows), unit="s"
+            ).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "fyDeclared": rng.integers(1990, 2023, rows),
+            "incidentType": FEMA_INCIDENTS[rng.integers(0, len(FEMA_INCIDENTS), rows)],
+            "declarationTitle": "SEVERE STORMS AND FLOODING",
+            "designatedArea": "County",
+        }
+    )
+
+
+def noaa_block(rng, start, rows):
+    return pd.DataFrame(
+        {
+            "EVENT_ID": np.arange(start, start + rows),
+            "state": NOAA_STATES[rng.integers(0, len(NOAA_STATES), rows)],
+            "year": rng.integers(2018, 2023, rows),
+            "EVENT_TYPE": NOAA_EVENTS[rng.integers(0, len(NOAA_EVENTS), rows)],
+            "INJURIES_DIRECT": rng.integers(0, 3, rows),
+            "MAGNITUDE": np.where(rng.random(rows) < 0.5, rng.uniform(0, 3, rows), np.nan),
+            "precip": np.where(rng.random(rows) < 0.9, rng.uniform(0, 80, rows), np.nan),
+            "EVENT_NARRATIVE": "Storm moved east, with hail and gusty winds",
+        }
+    )
+
+
+def write_csv(path, make_block, rows, seed=0):
+    """Write rows generated by make_block to path, BLOCK_ROWS at a time."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, BLOCK_ROWS):
+        block = make_block(rng, start, min(BLOCK_ROWS, rows - start))
+        block.to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+    return path
+
+
+def write_fema(path, scale=1, seed=0):
+    return write_csv(path, fema_block, FEMA_ROWS * scale, seed)
+
+
+def write_noaa(path, scale=1, seed=0):
+    return write_csv(path, noaa_block, NOAA_ROWS * scale, seed)
+
+
+# ---------------------------------------------------
+# Dashboard fixture: the summary tables for every state
+# ---------------------------------------------------
+AUTO_YEARS = range(2018, 2023)
+HOME_YEAR = 2025
+NOAA_YEARS = range(1996, 2025)
+NOAA_METRICS = ["INJURIES_DIRECT", "MAGNITUDE", "precip"]
+
+
+def dashboard_tables(states, seed=0):
+    """
+    The four summary tables the dashboard reads (see utils/summaries.py),
+    with every state present: a few NAIC rows per state, one NerdWallet
+    row, NOAA sums for every year and metric, and FEMA groups including
+    unclassified incidents. A few states have no FEMA declarations.
+    """
+    rng = np.random.default_rng(seed)
+    states = list(states)
+
+    premiums = []
+    for state in states:
+        n = int(rng.integers(1, 4))
+        level = rng.uniform(700, 2500)
+        first = level
+        for year in AUTO_YEARS:
+            values = level * rng.uniform(0.9, 1.1, n)
+            premiums.append(("auto", state, year, values.sum(), n, first))
+            first *= rng.uniform(0.97, 1.12)
+            level *= rng.uniform(0.97, 1.12)
+        premiums.append(("home", state, HOME_YEAR, rng.uniform(900, 4500), 1, np.nan))
+    premiums = pd.DataFrame(premiums, columns=["insurance", "state", "year", "total", "n", "first"])
+
+    fema_states = [state for state in states if rng.random() > 0.05]
+    groups = []
+    for state in fema_states:
+        for group in INCIDENT_GROUPS + [None]:
+            if rng.random() < 0.8:
+                groups.append((state, group, int(rng.integers(1, 400))))
+    fema_groups = pd.DataFrame(groups, columns=["state", "incident_group", "count"])
+    fema_counts = (
+        fema_groups.groupby("state", as_index=False)["count"].sum()
+        .rename(columns={"count": "disaster_count"})
+    )
+
+    noaa = []
+    for state in states:
+        for year in NOAA_YEARS:
+            for position, metric in enumerate(NOAA_METRICS):
+                n = int(rng.integers(5, 300))
+                noaa.append((state, year, metric, position, rng.uniform(0, 3) * n, n))
+    noaa = pd.DataFrame(noaa, columns=["state", "year", "metric", "position", "total", "n"])
+
+    return {
+        "premiums": premiums,
+        "fema_counts": fema_counts,
+        "fema_groups": fema_groups,
+        "noaa_state_year": noaa,
+    }
+
+
+def write_dashboard_fixture(root, states, seed=0):
+    """Write dashboard_tables() into a new published data version under root; returns its name."""
+    from utils import summaries, versions
+
+    name, path = versions.create_version(root)
+    paths = summaries.summary_paths(path)
+    for table, df in dashboard_tables(states, seed).items():
+        versions.write_csv(df, paths[table])
+    versions.publish(root, name)
+    return name
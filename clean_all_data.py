@@ -1,103 +1,422 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
-from utils.state_mapping import normalize_state
-from utils.time_normalization import normalize_year
-from utils.value_normalization import normalize_dollar
+from utils import incidents, manifest, schemas, summaries, versions
+from utils import state_mapping, time_normalization, value_normalization, vectorized
+from utils.state_mapping import normalize_state_series
+from utils.time_normalization import normalize_year_series
+from utils.value_normalization import normalize_dollar_series
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# raw extractor output → clean file read by the dashboard
+DATASETS = {
+    "naic": ("naic_auto_insurance.csv", "clean_naic_auto_insurance.csv"),
+    "nerdwallet": ("nerdwallet_home.csv", "clean_nerdwallet_home.csv"),
+    "fema": ("fema_weather.csv", "clean_fema_weather.csv"),
+    "noaa": ("noaa_weather.csv", "clean_noaa_weather.csv"),
+}
+
+# Shared schema and normalization code; a change here re-cleans every dataset
+NORMALIZATION_MODULES = [
+    schemas, state_mapping, time_normalization, value_normalization, vectorized
+]
 
-print("\n========== CLEANING DATASETS ==========\n")
 
 # ---------------------------------------------------
 # NAIC AUTO INSURANCE
 # ---------------------------------------------------
-naic_raw = "data/naic_auto_insurance.csv"
-naic_clean = "data/clean_naic_auto_insurance.csv"
-
-df_naic = pd.read_csv(naic_raw)
+def clean_naic(naic_raw, naic_clean):
+    df_naic = schemas.read_dataset("naic", "raw", naic_raw)
+    rows_in = len(df_naic)
 
-# state names like 'Alabama' → 'AL'
-df_naic["state"] = df_naic["state"].apply(normalize_state)
+    # state names like 'Alabama' → 'AL'
+    df_naic["state"] = normalize_state_series(df_naic["state"])
 
-# drop rows where state could not be normalized
-df_naic = df_naic[df_naic["state"].notna()].copy()
+    # drop rows where state could not be normalized
+    df_naic = df_naic[df_naic["state"].notna()].copy()
 
-for col in ["avg_2022", "avg_2021", "avg_2020", "avg_2019", "avg_2018"]:
-    if col in df_naic.columns:
-        df_naic[col] = df_naic[col].apply(normalize_dollar)
+    for col in ["avg_2022", "avg_2021", "avg_2020", "avg_2019", "avg_2018"]:
+        if col in df_naic.columns:
+            df_naic[col] = normalize_dollar_series(df_naic[col])
 
-df_naic.to_csv(naic_clean, index=False)
-print("Cleaned NAIC auto insurance data written")
+    versions.write_csv(df_naic, naic_clean)
+    print("Cleaned NAIC auto insurance data written")
+    return {"rows_in": rows_in, "rows_out": len(df_naic), "path": naic_clean}
 
 
 # ---------------------------------------------------
 # NERDWALLET HOME INSURANCE
 # ---------------------------------------------------
-nerd_raw = "data/nerdwallet_home.csv"
-nerd_clean = "data/clean_nerdwallet_home.csv"
+def clean_nerdwallet(nerd_raw, nerd_clean):
+    df_nerd = schemas.read_dataset("nerdwallet", "raw", nerd_raw)
+    rows_in = len(df_nerd)
 
-df_nerd = pd.read_csv(nerd_raw)
+    # NerdWallet file has full names or codes in 'state'
+    df_nerd["state"] = normalize_state_series(df_nerd["state"])
+    df_nerd = df_nerd[df_nerd["state"].notna()].copy()
 
-# NerdWallet file has full names or codes in 'state'
-df_nerd["state"] = df_nerd["state"].apply(normalize_state)
-df_nerd = df_nerd[df_nerd["state"].notna()].copy()
+    # your checked columns: state, avg_annual_usd, avg_monthly_usd, source_year
+    if "source_year" in df_nerd.columns:
+        df_nerd["year"] = normalize_year_series(df_nerd["source_year"]).astype("Int64")
 
-# your checked columns: state, avg_annual_usd, avg_monthly_usd, source_year
-if "source_year" in df_nerd.columns:
-    df_nerd["year"] = df_nerd["source_year"].apply(normalize_year)
+    if "avg_annual_usd" in df_nerd.columns:
+        df_nerd["avg_annual_usd"] = normalize_dollar_series(df_nerd["avg_annual_usd"])
 
-if "avg_annual_usd" in df_nerd.columns:
-    df_nerd["avg_annual_usd"] = df_nerd["avg_annual_usd"].apply(normalize_dollar)
+    versions.write_csv(df_nerd, nerd_clean)
+    print("Cleaned NerdWallet home insurance data written")
+    return {"rows_in": rows_in, "rows_out": len(df_nerd), "path": nerd_clean}
+
+
+# ---------------------------------------------------
+# CHUNKED MODE FOR THE LARGE WEATHER FILES
+# ---------------------------------------------------
+def clean_in_chunks(name, raw_path, clean_path, normalize, chunksize):
+    """
+    Read, normalize and append the output chunk by chunk so peak memory
+    depends on chunksize, not on the input size. The raw schema reads every
+    chunk with the same dtypes and normalize casts the converted columns to
+    the clean schema, so every chunk is written with the same types.
+    """
+    tmp_path = clean_path + ".part"
+    rows_in = 0
+    rows_out = 0
+    first = True
 
-df_nerd.to_csv(nerd_clean, index=False)
-print("Cleaned NerdWallet home insurance data written")
+    for chunk in schemas.read_dataset(name, "raw", raw_path, chunksize=chunksize):
+        rows_in += len(chunk)
+        chunk = normalize(chunk)
+        rows_out += len(chunk)
+
+        chunk.to_csv(tmp_path, index=False, mode="w" if first else "a", header=first)
+        first = False
+
+    if first:
+        # empty input: still write the header, as normalize would shape it
+        normalize(schemas.read_dataset(name, "raw", raw_path)).to_csv(tmp_path, index=False)
+
+    os.replace(tmp_path, clean_path)
+    return rows_in, rows_out
 
 
 # ---------------------------------------------------
 # FEMA WEATHER DISASTERS
 # ---------------------------------------------------
-fema_raw = "data/fema_weather.csv"
-fema_clean = "data/clean_fema_weather.csv"
+def normalize_fema(df_fema):
+    if "state" in df_fema.columns:
+        df_fema["state"] = normalize_state_series(df_fema["state"])
+        df_fema = df_fema[df_fema["state"].notna()].copy()
 
-df_fema = pd.read_csv(fema_raw, low_memory=False)
+    if "year" in df_fema.columns:
+        df_fema["year"] = normalize_year_series(df_fema["year"]).astype("Int64")
 
-if "state" in df_fema.columns:
-    df_fema["state"] = df_fema["state"].apply(normalize_state)
-    df_fema = df_fema[df_fema["state"].notna()].copy()
+    if "declarationDate" in df_fema.columns:
+        df_fema["declarationDate"] = pd.to_datetime(
+            df_fema["declarationDate"], errors="coerce"
+        )
 
-if "year" in df_fema.columns:
-    df_fema["year"] = df_fema["year"].apply(normalize_year)
+    return df_fema
 
-if "declarationDate" in df_fema.columns:
-    df_fema["declarationDate"] = pd.to_datetime(
-        df_fema["declarationDate"], errors="coerce"
-    )
 
-df_fema.to_csv(fema_clean, index=False)
-print("Cleaned FEMA weather data written")
+def clean_fema(fema_raw, fema_clean, chunksize=None):
+    if chunksize:
+        rows_in, rows_out = clean_in_chunks(
+            "fema", fema_raw, fema_clean, normalize_fema, chunksize
+        )
+    else:
+        df_fema = schemas.read_dataset("fema", "raw", fema_raw)
+        rows_in = len(df_fema)
+        df_fema = normalize_fema(df_fema)
+        rows_out = len(df_fema)
+        versions.write_csv(df_fema, fema_clean)
+
+    print("Cleaned FEMA weather data written")
+    return {"rows_in": rows_in, "rows_out": rows_out, "path": fema_clean}
 
 
 # ---------------------------------------------------
 # NOAA WEATHER
 # ---------------------------------------------------
-noaa_raw = "data/noaa_weather.csv"
-noaa_clean = "data/clean_noaa_weather.csv"
+def normalize_noaa(df_noaa):
+    if "state" in df_noaa.columns:
+        df_noaa["state"] = normalize_state_series(df_noaa["state"])
+        df_noaa = df_noaa[df_noaa["state"].notna()].copy()
+
+    if "year" in df_noaa.columns:
+        df_noaa["year"] = normalize_year_series(df_noaa["year"]).astype("Int64")
+
+    for col in df_noaa.columns:
+        if col.lower().endswith(schemas.NOAA_FLOAT_SUFFIXES):
+            df_noaa[col] = pd.to_numeric(df_noaa[col], errors="coerce").astype("float64")
+
+    return df_noaa
 
-df_noaa = pd.read_csv(noaa_raw, low_memory=False)
 
-if "state" in df_noaa.columns:
-    df_noaa["state"] = df_noaa["state"].apply(normalize_state)
-    df_noaa = df_noaa[df_noaa["state"].notna()].copy()
+def clean_noaa(noaa_raw, noaa_clean, chunksize=None):
+    if chunksize:
+        rows_in, rows_out = clean_in_chunks(
+            "noaa", noaa_raw, noaa_clean, normalize_noaa, chunksize
+        )
+    else:
+        df_noaa = schemas.read_dataset("noaa", "raw", noaa_raw)
+        rows_in = len(df_noaa)
+        df_noaa = normalize_noaa(df_noaa)
+        rows_out = len(df_noaa)
+        versions.write_csv(df_noaa, noaa_clean)
+
+    print("Cleaned NOAA weather data written")
+    return {"rows_in": rows_in, "rows_out": rows_out, "path": noaa_clean}
+
+
+# Datasets are independent of each other, so they can be cleaned in any
+# order or all at once. Every cleaner returns {"rows_in", "rows_out", "path"}
+CLEANERS = {
+    "naic": clean_naic,
+    "nerdwallet": clean_nerdwallet,
+    "fema": clean_fema,
+    "noaa": clean_noaa,
+}
+
+# Cleaners that can stream their input with --chunksize
+CHUNKED_CLEANERS = {"fema", "noaa"}
+
+
+def cleaner_version(name):
+    """Hash of the cleaner function plus the normalization code it uses."""
+    extra = [clean_in_chunks, globals()[f"normalize_{name}"]] if name in CHUNKED_CLEANERS else []
+    return manifest.code_version(CLEANERS[name], *extra, *NORMALIZATION_MODULES)
+
+
+def dataset_paths(name, data_dir=DATA_DIR):
+    raw_name, clean_name = DATASETS[name]
+    return (
+        {raw_name: os.path.join(data_dir, raw_name)},
+        {clean_name: os.path.join(data_dir, clean_name)},
+    )
+
+
+def run_cleaner(name, data_dir=DATA_DIR, previous=None, chunksize=None):
+    """
+    Run one cleaner, time it and build its manifest entry.
+    Top level so worker processes can pickle it.
+    """
+    inputs, outputs = dataset_paths(name, data_dir)
+    (raw_name, raw_path), = inputs.items()
+    (clean_name, clean_path), = outputs.items()
+
+    # fingerprint the input before cleaning so the entry describes what was read
+    prev_inputs = (previous or {}).get("inputs", {})
+    input_record = manifest.fingerprint(raw_path, previous=prev_inputs.get(raw_name))
+
+    start = time.perf_counter()
+    if chunksize and name in CHUNKED_CLEANERS:
+        result = CLEANERS[name](raw_path, clean_path, chunksize=chunksize)
+    else:
+        result = CLEANERS[name](raw_path, clean_path)
+    result["dataset"] = name
+    result["status"] = "cleaned"
+    result["seconds"] = round(time.perf_counter() - start, 2)
+
+    input_record["rows"] = result["rows_in"]
+    result["manifest"] = manifest.make_entry(
+        cleaner_version(name),
+        {raw_name: input_record},
+        {clean_name: manifest.fingerprint(clean_path, rows=result["rows_out"])},
+    )
+    return result
+
 
-if "year" in df_noaa.columns:
-    df_noaa["year"] = df_noaa["year"].apply(normalize_year)
+def skipped_result(name, entry, data_dir=DATA_DIR):
+    (clean_name, output), = entry["outputs"].items()
+    input_rows = sum(record.get("rows") or 0 for record in entry["inputs"].values())
+    return {
+        "dataset": name,
+        "status": "skipped",
+        "rows_in": input_rows,
+        "rows_out": output.get("rows") or 0,
+        "seconds": 0.0,
+        "path": os.path.join(data_dir, clean_name),
+    }
 
-for col in df_noaa.columns:
-    col_lower = col.lower()
-    if col_lower.endswith("temp") or col_lower.endswith("temperature") or \
-       col_lower.endswith("precip") or col_lower.endswith("rain") or \
-       col_lower.endswith("snow"):
-        df_noaa[col] = pd.to_numeric(df_noaa[col], errors="coerce")
 
-df_noaa.to_csv(noaa_clean, index=False)
-print("Cleaned NOAA weather data written")
+def clean_all(names=None, parallel=None, data_dir=DATA_DIR, force=False, chunksize=None):
+    """
+    Clean the selected datasets. A dataset is skipped when the manifest shows
+    its raw input, clean output and cleaner code are unchanged since the last
+    run. With parallel > 1 each remaining dataset runs in its own worker
+    process, so the total time is about that of the largest one. With
+    chunksize set, FEMA and NOAA are streamed in chunks of that many rows.
+    """
+    names = list(names or CLEANERS)
+    manifest_path = os.path.join(data_dir, manifest.MANIFEST_NAME)
+    state = manifest.load_manifest(manifest_path)
+    entries = state["datasets"]
+
+    results = {}
+    to_run = []
+    for name in names:
+        inputs, outputs = dataset_paths(name, data_dir)
+        entry = entries.get(name)
+        if not force and manifest.is_up_to_date(entry, inputs, outputs, cleaner_version(name)):
+            print(f"Skipping {name}: inputs and cleaner unchanged")
+            results[name] = skipped_result(name, entry, data_dir)
+        else:
+            to_run.append(name)
+
+    parallel = min(parallel or len(to_run), len(to_run))
+    previous = [entries.get(name) for name in to_run]
+
+    if parallel <= 1:
+        cleaned = [
+            run_cleaner(name, data_dir, prev, chunksize)
+            for name, prev in zip(to_run, previous)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=parallel) as pool:
+            cleaned = list(
+                pool.map(
+                    run_cleaner,
+                    to_run,
+                    [data_dir] * len(to_run),
+                    previous,
+                    [chunksize] * len(to_run),
+                )
+            )
+
+    for result in cleaned:
+        entries[result["dataset"]] = result.pop("manifest")
+        results[result["dataset"]] = result
+
+    if cleaned:
+        manifest.save_manifest(manifest_path, state)
+
+    return [results[name] for name in names]
+
+
+# ---------------------------------------------------
+# DASHBOARD SUMMARY TABLES
+# ---------------------------------------------------
+def summaries_version():
+    return manifest.code_version(summaries, incidents, schemas, vectorized)
+
+
+def summarize_all(data_dir=DATA_DIR, chunksize=None, force=False):
+    """
+    Rebuild the small summary_*.csv tables the dashboard reads (see
+    utils/summaries.py) when a clean file or the summary code changed.
+    Returns a report row like the cleaners', or None if clean files are missing.
+    """
+    manifest_path = os.path.join(data_dir, manifest.MANIFEST_NAME)
+    state = manifest.load_manifest(manifest_path)
+    entry = state.get("summaries")
+
+    inputs = {name: os.path.join(data_dir, name) for name in summaries.CLEAN_FILES.values()}
+    outputs = {
+        os.path.basename(path): path for path in summaries.summary_paths(data_dir).values()
+    }
+
+    missing = [name for name, path in inputs.items() if not os.path.exists(path)]
+    if missing:
+        print(f"Skipping summaries: missing {', '.join(missing)}")
+        return None
+
+    version = summaries_version()
+    clean_rows = sum(
+        record.get("rows") or 0
+        for dataset in state["datasets"].values()
+        for record in dataset.get("outputs", {}).values()
+    )
+    result = {"dataset": "summaries", "rows_in": clean_rows, "seconds": 0.0}
+    if not force and manifest.is_up_to_date(entry, inputs, outputs, version):
+        print("Skipping summaries: clean files and summary code unchanged")
+        recorded = entry["outputs"].values()
+        return {**result, "status": "skipped", "rows_out": sum(r["rows"] or 0 for r in recorded)}
+
+    start = time.perf_counter()
+    rows = summaries.write_summaries(data_dir, chunksize or summaries.CHUNK_ROWS)
+    previous_in = (entry or {}).get("inputs", {})
+    state["summaries"] = manifest.make_entry(
+        version,
+        {name: manifest.fingerprint(path, previous=previous_in.get(name))
+         for name, path in inputs.items()},
+        {os.path.basename(path): manifest.fingerprint(path, rows=rows[name])
+         for name, path in summaries.summary_paths(data_dir).items()},
+    )
+    manifest.save_manifest(manifest_path, state)
+    print("Dashboard summary tables written")
+
+    return {
+        **result,
+        "status": "built",
+        "rows_out": sum(rows.values()),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def print_report(results, total_seconds):
+    print(f"\n{'dataset':<12}{'status':>10}{'rows in':>12}{'rows out':>12}{'seconds':>10}")
+    for r in results:
+        print(
+            f"{r['dataset']:<12}{r['status']:>10}{r['rows_in']:>12,}"
+            f"{r['rows_out']:>12,}{r['seconds']:>10.2f}"
+        )
+    print(f"{'total':<12}{'':>34}{total_seconds:>10.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw extractor outputs")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(CLEANERS),
+        help="clean only this dataset (repeatable)",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=None,
+        help="worker processes to use (default: one per dataset, 1 runs in-process)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-clean every selected dataset even if the manifest says it is current",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="stream FEMA and NOAA in chunks of this many rows to bound memory",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    print("\n========== CLEANING DATASETS ==========\n")
+
+    start = time.perf_counter()
+    # clean into a new data version and publish it when every file is written
+    version, version_path = versions.create_version(DATA_DIR)
+    results = clean_all(
+        args.only,
+        parallel=args.parallel,
+        data_dir=version_path,
+        force=args.force,
+        chunksize=args.chunksize,
+    )
+    summary = summarize_all(version_path, chunksize=args.chunksize, force=args.force)
+    if summary:
+        results.append(summary)
+    versions.publish(DATA_DIR, version)
+    print_report(results, time.perf_counter() - start)
+    print(f"\nPublished data version {version}")
 
-print("\n========== ALL DATASETS CLEANED SUCCESSFULLY ==========\n")
+    print("\n========== ALL DATASETS CLEANED SUCCESSFULLY ==========\n")
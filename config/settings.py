@@ -1,4 +1,5 @@
 """Django settings for the project."""
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,6 +26,9 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # after auth: on-demand profiles are for staff users. Unloads itself
+    # unless DASHBOARD_PROFILE or DASHBOARD_PROFILE_SLOW_MS is set.
+    "dashboard.profiling.ProfileMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -56,6 +60,57 @@ DATABASES = {
     }
 }
 
+# Root of the data folder. Refreshes write versioned copies under
+# <root>/versions/ and the dashboard reads the one named in <root>/CURRENT
+# (utils/versions.py)
+DASHBOARD_DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", str(BASE_DIR / "data"))
+
+# Where the dashboard reads its data (dashboard/data.py): "summary" for the
+# summary_*.csv tables written by clean_all_data.py, "db" for the tables
+# filled by `manage.py load_dashboard_data`, "csv" for the clean CSVs
+DASHBOARD_DATA_SOURCE = os.environ.get("DASHBOARD_DATA_SOURCE", "summary")
+
+# Rendered dashboard pages (dashboard/cache.py). File based, so every server
+# worker and `manage.py warm_cache` share one copy. Keys include the data
+# version, and old pages are cleared when a new version is published.
+# PageCache adds an atomic add() for the single-flight render lock.
+# Set DASHBOARD_PAGE_CACHE=0 to skip it.
+DASHBOARD_PAGE_CACHE = os.environ.get("DASHBOARD_PAGE_CACHE", "1") != "0"
+
+# Static copies of every page written by `manage.py prerender_dashboard`
+# (dashboard/prerender.py), for the reverse proxy to serve directly
+DASHBOARD_PRERENDER_DIR = os.environ.get(
+    "DASHBOARD_PRERENDER_DIR", os.path.join(DASHBOARD_DATA_DIR, "prerendered")
+)
+
+# Request profiles (dashboard/profiling.py). DASHBOARD_PROFILE=1 honours
+# ?profile=cprofile / ?profile=sample from staff users (anyone with DEBUG);
+# DASHBOARD_PROFILE_SLOW_MS samples every request and keeps the profiles of
+# those slower than that. The newest DASHBOARD_PROFILE_KEEP files are kept.
+DASHBOARD_PROFILE = os.environ.get("DASHBOARD_PROFILE", "0") == "1"
+DASHBOARD_PROFILE_SLOW_MS = (
+    float(os.environ["DASHBOARD_PROFILE_SLOW_MS"]) if os.environ.get("DASHBOARD_PROFILE_SLOW_MS") else None
+)
+DASHBOARD_PROFILE_INTERVAL_MS = float(os.environ.get("DASHBOARD_PROFILE_INTERVAL_MS", 5))
+DASHBOARD_PROFILE_DIR = os.environ.get(
+    "DASHBOARD_PROFILE_DIR", os.path.join(DASHBOARD_DATA_DIR, "profiles")
+)
+DASHBOARD_PROFILE_KEEP = int(os.environ.get("DASHBOARD_PROFILE_KEEP", 50))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "pages": {
+        "BACKEND": "dashboard.cache.PageCache",
+        "LOCATION": os.environ.get(
+            "DASHBOARD_PAGE_CACHE_DIR", os.path.join(DASHBOARD_DATA_DIR, "cache", "pages")
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
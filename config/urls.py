@@ -2,9 +2,12 @@
 from django.contrib import admin
 from django.urls import path
 
-from dashboard.views import home
+from dashboard.views import analytics, bundle, home, trends
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", home, name="home"),
+    path("bundle/<str:version>/<str:insurance>.json", bundle, name="bundle"),
+    path("trends/<str:version>.json", trends, name="trends"),
+    path("analytics/<str:version>.json", analytics, name="analytics"),
 ]
\ No newline at end of file
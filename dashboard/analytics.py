@@ -0,0 +1,172 @@
+# dashboard/analytics.py
+#
+# Correlations and simple regressions between every pair of state level
+# variables, for every insurance type and policy year:
+#
+#   Average Premium   the premium the page's bar chart shows
+#   disaster_count    FEMA declarations (0 for states without any)
+#   severity_score    declarations weighted by SEVERITY_WEIGHTS
+#   NOAA <metric>     mean of each NOAA metric
+#   FEMA <group>      declarations per incident group
+#
+# The states with a premium are the rows of a states × variables matrix.
+# All pairs are computed at once from matrix products over that matrix and
+# its "present" mask, so a state missing one variable (no NOAA data, say)
+# only drops out of the pairs that use it. For each pair: n, Pearson r,
+# and the least-squares slope and intercept of row variable on column
+# variable. Percentile bootstrap confidence intervals for r and the slope
+# come from BOOTSTRAP_SAMPLES resamples of the states, stacked and
+# computed in one batch.
+#
+# views.analytics serves the result as JSON per data version.
+
+import warnings
+
+import numpy as np
+
+BOOTSTRAP_SAMPLES = 1000
+CONFIDENCE = 0.95
+# fixed, so a data version always serves the same intervals
+BOOTSTRAP_SEED = 0
+# pairs with fewer states get no statistics
+MIN_STATES = 3
+
+
+# ---------------------------------------------------
+# Statistics
+# ---------------------------------------------------
+def _t(matrix):
+    return np.swapaxes(matrix, -1, -2)
+
+
+def pair_stats(X):
+    """
+    n, r, slope and intercept of every (row variable, column variable) pair
+    over the last two axes of X (... × states × variables, NaN missing);
+    leading axes are batches. slope[i, j] regresses variable i on variable j.
+    """
+    present = np.isfinite(X)
+    mask = present.astype(float)
+    # centre first so the sums of squares do not cancel
+    with np.errstate(invalid="ignore", divide="ignore"):
+        center = np.nansum(X, axis=-2, keepdims=True) / mask.sum(axis=-2, keepdims=True)
+    center = np.nan_to_num(center)
+    values = np.where(present, X - center, 0.0)
+
+    n = _t(mask) @ mask
+    # sums over the states where both variables are present
+    sum_i = _t(values) @ mask
+    sum_j = _t(sum_i)
+    sum_ii = _t(values ** 2) @ mask
+    sum_jj = _t(sum_ii)
+    sum_ij = _t(values) @ values
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sum_ij - sum_i * sum_j / n
+        var_i = sum_ii - sum_i ** 2 / n
+        var_j = sum_jj - sum_j ** 2 / n
+        r = cov / np.sqrt(var_i * var_j)
+        slope = cov / var_j
+        intercept = (sum_i / n + _t(center)) - slope * (sum_j / n + center)
+
+    too_few = n < MIN_STATES
+    for stat in (r, slope, intercept):
+        stat[too_few | ~np.isfinite(stat)] = np.nan
+    return n, np.clip(r, -1.0, 1.0), slope, intercept
+
+
+def bootstrap_intervals(X, samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, seed=BOOTSTRAP_SEED):
+    """Percentile intervals of r and slope over samples resamples of the rows of X."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(X), size=(samples, len(X)))
+    _, r, slope, _ = pair_stats(X[rows])
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        # pairs that are NaN in every resample
+        warnings.simplefilter("ignore", RuntimeWarning)
+        r_low, r_high = np.nanpercentile(r, [tail, 100 - tail], axis=0)
+        slope_low, slope_high = np.nanpercentile(slope, [tail, 100 - tail], axis=0)
+    return {"r": (r_low, r_high), "slope": (slope_low, slope_high)}
+
+
+# ---------------------------------------------------
+# Variables
+# ---------------------------------------------------
+def state_variables(source):
+    """
+    Every variable but the premium, one row per state (index), and the
+    names of the FEMA columns among them.
+    """
+    import pandas as pd
+
+    from dashboard.views import severity_by_state
+
+    counts = source.fema_counts().set_index("state")["disaster_count"]
+    severity = severity_by_state(source).set_index("state")["severity_score"]
+    groups = source.fema_groups().pivot_table(
+        index="state", columns="incident_group", values="count", aggfunc="sum"
+    ).add_prefix("FEMA ")
+    noaa = source.noaa_state_means().set_index("state").add_prefix("NOAA ")
+
+    fema = pd.concat([counts, severity, groups], axis=1)
+    return pd.concat([fema, noaa], axis=1).astype(float), list(fema.columns)
+
+
+def combinations(source):
+    """[(insurance, year or None, premium frame)] for every page the dashboard has."""
+    from dashboard.views import AUTO_YEARS
+
+    combos = [("Auto", year, source.auto_by_state(year)) for year in AUTO_YEARS]
+    combos.append(("Home", None, source.home_by_state()))
+    return combos
+
+
+def _json_matrix(matrix):
+    return [[None if np.isnan(value) else float(f"{value:.6g}") for value in row] for row in matrix]
+
+
+def compute_analytics(source, samples=BOOTSTRAP_SAMPLES):
+    """The analytics of every (insurance, year) as a dict, ready for JSON."""
+    shared, fema_columns = state_variables(source)
+    variables = ["Average Premium", *shared.columns]
+
+    results = []
+    for insurance, year, premiums in combinations(source):
+        premiums = premiums.dropna(subset=["Average Premium"]).set_index("state")["Average Premium"]
+        X = shared.reindex(premiums.index)
+        # a state without declarations has none of any kind, not unknown ones
+        X[fema_columns] = X[fema_columns].fillna(0.0)
+        X.insert(0, "Average Premium", premiums)
+        matrix = X[variables].to_numpy(dtype=float)
+
+        n, r, slope, intercept = pair_stats(matrix)
+        intervals = bootstrap_intervals(matrix, samples)
+        results.append({
+            "insurance": insurance,
+            "year": year,
+            "states": len(matrix),
+            "n": n.astype(int).tolist(),
+            "r": _json_matrix(r),
+            "r_low": _json_matrix(intervals["r"][0]),
+            "r_high": _json_matrix(intervals["r"][1]),
+            "r2": _json_matrix(r ** 2),
+            "slope": _json_matrix(slope),
+            "slope_low": _json_matrix(intervals["slope"][0]),
+            "slope_high": _json_matrix(intervals["slope"][1]),
+            "intercept": _json_matrix(intercept),
+        })
+
+    return {
+        "variables": variables,
+        "bootstrap": {"samples": samples, "confidence": CONFIDENCE, "seed": BOOTSTRAP_SEED},
+        "combinations": results,
+    }
+
+
+def analytics_payload(version, source=None):
+    """compute_analytics for the published data, once per data version."""
+    from dashboard.cache import per_version
+    from dashboard.data import get_source
+
+    result = per_version("analytics", lambda: compute_analytics(source or get_source()))
+    return {"version": version, **result}
@@ -0,0 +1,146 @@
+# dashboard/bundle.py
+#
+# Everything the home page needs for one insurance type, as one compact
+# JSON document, so the page can switch state and year in the browser
+# instead of asking the server for a new page (see the script in
+# home.html). Served at /bundle/<data version>/<insurance>.json: the URL
+# changes with every published version, so browsers may cache it forever.
+#
+# Per-state lists are aligned with "states" and hold null where the server
+# would have NaN:
+#
+#   states          every state with a premium for the insurance type
+#   years           policy years of the premium columns (Auto), else null
+#   premium         average premium per state, one value per year
+#   trend           Auto only: premiums the trend chart is indexed on,
+#                   national per year and per state per year (null if the
+#                   state has no trend row)
+#   disasters       FEMA declarations per state
+#   severity        severity weighted declarations per state
+#   weather_index   NOAA weather index per state
+#   risk_weights    {index: weight} of the composite risk score
+#   trends          Auto only: premium CAGR per state and the premium
+#                   projected for projection_year (dashboard/trends.py)
+#   noaa            yearly means of the first NOAA metric: "national" per
+#                   year of its "years", and per state "index" (positions
+#                   in those years the state has a row for) and "values"
+#                   (null = no readings that year, drawn as a gap)
+#   fema_mix        declarations per incident group and state
+#
+# The page recomputes premium, severity and risk indices from these with
+# the same rules as views.build_dashboard.
+
+import math
+
+from dashboard.views import (
+    AUTO_YEARS,
+    RISK_WEIGHTS,
+    severity_by_state,
+    weather_index_by_state,
+)
+
+
+def _value(value):
+    """JSON has no NaN; the page treats null as missing."""
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _column(df, column, states):
+    """df[column] per state in states order, None for states not in df."""
+    values = dict(zip(df["state"], df[column]))
+    return [_value(values.get(state)) for state in states]
+
+
+def _noaa(source, states):
+    metrics = source.noaa_metrics()
+    if not metrics:
+        return None
+
+    metric = metrics[0]
+    national = source.noaa_year_means(metric)
+    years = [int(year) for year in national["year"]]
+    position = {year: i for i, year in enumerate(years)}
+    by_state = []
+    for state in states:
+        # the state chart joins on the national years, which cover every state's
+        rows = source.noaa_year_means(metric, state)
+        by_state.append({
+            "index": [position[int(year)] for year in rows["year"]],
+            "values": [_value(value) for value in rows["value"]],
+        })
+    return {
+        "metric": metric,
+        "years": years,
+        "national": [_value(value) for value in national["value"]],
+        "states": by_state,
+    }
+
+
+def _fema_mix(source, states):
+    mixes = [source.fema_mix(state) for state in states]
+    groups = sorted({group for mix in mixes for group in mix["incident_group"]})
+    counts = []
+    for mix in mixes:
+        values = dict(zip(mix["incident_group"], mix["count"]))
+        counts.append([int(values.get(group, 0)) for group in groups])
+    return {"groups": groups, "counts": counts}
+
+
+def build_bundle(insurance, version, source=None):
+    """The bundle for insurance ("Auto" or "Home") as a dict, ready for JSON."""
+    if source is None:
+        from dashboard.data import get_source
+
+        source = get_source()
+
+    if insurance == "Auto":
+        states = source.auto_states()
+        years = AUTO_YEARS
+        columns = [source.auto_by_state(year) for year in years]
+    else:
+        states = source.home_states()
+        years = None
+        columns = [source.home_by_state()]
+    premium = [list(row) for row in zip(*(_column(df, "Average Premium", states) for df in columns))]
+
+    trend = None
+    if insurance == "Auto":
+        national = source.auto_national()
+        trend = {"national": [_value(national.get(year)) for year in years], "states": []}
+        for state in states:
+            row = source.auto_state_premiums(state)
+            trend["states"].append(None if row is None else [_value(row.get(year)) for year in years])
+
+    trends = None
+    if insurance == "Auto":
+        from dashboard.trends import projection_years, state_trends
+
+        projection_year = projection_years(years)[0]
+        fits = state_trends(source)
+        trends = {
+            "projection_year": projection_year,
+            "cagr": _column(fits, "cagr", states),
+            "projected": _column(fits, f"projected_{projection_year}", states),
+        }
+
+    weather = weather_index_by_state(source)
+    return {
+        "version": version,
+        "insurance": insurance,
+        "states": states,
+        "years": years,
+        "premium": premium,
+        "trend": trend,
+        "disasters": _column(source.fema_counts(), "disaster_count", states),
+        "severity": _column(severity_by_state(source), "severity_score", states),
+        "weather_index": (
+            [None] * len(states) if weather is None else _column(weather, "Weather Index", states)
+        ),
+        "risk_weights": RISK_WEIGHTS,
+        "trends": trends,
+        "noaa": _noaa(source, states),
+        "fema_mix": _fema_mix(source, states),
+    }
@@ -0,0 +1,302 @@
+# dashboard/cache.py
+#
+# Whole-page cache for the home view. A page only depends on the
+# insurance / year / state it resolves to (views.resolve_params: invalid
+# values fall back, Home ignores the year) and the data version, so
+# rendered pages are stored in the "pages" cache (see settings.CACHES) under
+# both. Every URL that shows the same page shares one entry, and a newly
+# published version never serves old pages. Bodies are kept gzip
+# compressed: browsers get them as-is, other clients get them decompressed.
+#
+# Concurrent misses for one page are single-flight: the first request takes
+# a lock entry in the cache and renders, the others wait for its result
+# instead of rendering the same page again. PageCache makes the lock atomic
+# across server processes.
+#
+# serve_cached() does the same for any response with its own key; the data
+# bundles of dashboard/bundle.py use it. per_version() keeps a computed
+# value in process memory for the current data version.
+#
+# An unversioned data folder (data_version() "-") changes in place, so
+# nothing is cached for it. Requests profiled on demand (?profile=, see
+# dashboard/profiling.py) skip the cache too. Reloading the dashboard tables clears both
+# caches (clear_caches).
+#
+# warm_pages() renders every (insurance, year, state) page ahead of time
+# across a process pool (`python manage.py warm_cache`).
+
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import wraps
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.http import HttpResponse, QueryDict
+from django.utils.cache import patch_vary_headers
+
+from utils import versions
+
+PAGE_PARAMS = ("insurance", "year", "state")
+
+# gzip level 1 is several times faster than 6 and only ~15% larger on these pages
+GZIP_LEVEL = 1
+
+# A render holding the lock longer than LOCK_TIMEOUT is presumed dead and
+# the lock expires. Waiters poll every POLL_SECONDS and render the page
+# themselves after WAIT_SECONDS.
+LOCK_TIMEOUT = 120
+WAIT_SECONDS = 30
+POLL_SECONDS = 0.05
+
+
+class PageCache(FileBasedCache):
+    """
+    FileBasedCache whose add() is atomic across processes (Django's checks
+    for the key and then writes it). The entry is written to a temporary
+    file and hard linked into place, which fails if the key already exists.
+    """
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        fname = self._key_to_file(key, version)
+        self._createdir()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, "wb") as f:
+                self._write_content(f, timeout, value)
+            # a second try only after an expired entry was removed
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, fname)
+                    return True
+                except FileExistsError:
+                    try:
+                        with open(fname, "rb") as f:
+                            # _is_expired() deletes the file if it is
+                            if not self._is_expired(f):
+                                return False
+                    except FileNotFoundError:
+                        pass
+            return False
+        finally:
+            os.remove(tmp_path)
+
+
+def page_cache():
+    return caches["pages"]
+
+
+def data_version():
+    """Published data version (utils/versions.py); "-" for an unversioned data folder."""
+    return versions.current_version(settings.DASHBOARD_DATA_DIR) or "-"
+
+
+# {name: ((data version, data source), value)} of per_version()
+_VERSION_MEMO = {}
+
+
+def caching(version=None):
+    """Whether pages and bundles of the data version may be cached."""
+    return settings.DASHBOARD_PAGE_CACHE and (version or data_version()) != "-"
+
+
+def profiled(request):
+    """Whether ProfileMiddleware profiles request on demand; it must render, not hit the cache."""
+    return getattr(request, "profile_mode", None) is not None
+
+
+def per_version(name, compute):
+    """compute() once per published data version and data source in this process."""
+    key = (data_version(), settings.DASHBOARD_DATA_SOURCE)
+    cached = _VERSION_MEMO.get(name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    value = compute()
+    # an unversioned data folder changes in place, so it is never kept
+    if key[0] != "-":
+        _VERSION_MEMO[name] = (key, value)
+    return value
+
+
+def canonical_params(query):
+    """The (insurance, year, state) page the parameters in query resolve to."""
+    from dashboard.data import get_source
+    from dashboard.views import resolve_params
+
+    params = resolve_params(query, get_source())
+    return [(name, str(params[name])) for name in PAGE_PARAMS]
+
+
+def page_key(query, version=None):
+    """Cache key for the page query (a QueryDict or dict) shows and the data version."""
+    digest = hashlib.sha1(urlencode(canonical_params(query)).encode()).hexdigest()
+    return f"home:{version or data_version()}:{digest}"
+
+
+def _accepts_gzip(request):
+    return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+
+def _from_cache(request, entry, status="hit"):
+    if _accepts_gzip(request):
+        response = HttpResponse(entry["body"], content_type=entry["content_type"])
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(entry["body"]), content_type=entry["content_type"])
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response["X-Page-Cache"] = status
+    return response
+
+
+def store_page(key, response):
+    page_cache().set(key, {
+        "body": gzip.compress(response.content, GZIP_LEVEL),
+        "content_type": response["Content-Type"],
+    })
+
+
+def serve_cached(request, key, render):
+    """
+    The response stored under key, or render() stored under it. On a miss
+    only one request renders; concurrent requests for the same key wait for
+    its result (X-Page-Cache: wait), and one of them takes over if that
+    render fails.
+    """
+    cache = page_cache()
+    lock_key = key + ":lock"
+    status = "hit"
+    deadline = time.monotonic() + WAIT_SECONDS
+    while True:
+        entry = cache.get(key)
+        if entry is not None:
+            return _from_cache(request, entry, status)
+        locked = cache.add(lock_key, os.getpid(), timeout=LOCK_TIMEOUT)
+        # past the deadline the holder is presumed stuck: render without the lock
+        if locked or time.monotonic() > deadline:
+            break
+        status = "wait"
+        time.sleep(POLL_SECONDS)
+
+    try:
+        # the previous holder may have stored it just before releasing
+        entry = cache.get(key) if locked else None
+        if entry is not None:
+            return _from_cache(request, entry, status)
+
+        response = render()
+        if response.status_code == 200 and not response.streaming:
+            store_page(key, response)
+            patch_vary_headers(response, ["Accept-Encoding"])
+            response["X-Page-Cache"] = "miss"
+        return response
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def cache_page(view):
+    """Serve GET requests for view from the page cache (serve_cached)."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        version = data_version()
+        if request.method != "GET" or profiled(request) or not caching(version):
+            return view(request, *args, **kwargs)
+        return serve_cached(
+            request, page_key(request.GET, version), lambda: view(request, *args, **kwargs)
+        )
+
+    return wrapper
+
+
+def clear_pages():
+    page_cache().clear()
+
+
+def clear_caches():
+    """Drop cached pages and this process's per_version() values, e.g. after a table reload."""
+    clear_pages()
+    _VERSION_MEMO.clear()
+
+
+# ---------------------------------------------------
+# Warming
+# ---------------------------------------------------
+def page_params(source=None):
+    """Query parameters of every dashboard page, as the sidebar form submits them."""
+    from dashboard.views import AUTO_YEARS
+
+    if source is None:
+        from dashboard.data import get_source
+
+        source = get_source()
+
+    params = [
+        {"insurance": "Auto", "year": str(year), "state": state}
+        for year in AUTO_YEARS
+        for state in source.auto_states()
+    ]
+    # Home has no year selector, so the form sends insurance and state only
+    params += [{"insurance": "Home", "state": state} for state in source.home_states()]
+    return params
+
+
+def page_urls(source=None):
+    """One URL per dashboard page."""
+    return ["/?" + urlencode(params) for params in page_params(source)]
+
+
+def is_cached(url):
+    return page_cache().has_key(page_key(QueryDict(urlsplit(url).query)))
+
+
+def setup_worker():
+    """ProcessPoolExecutor initializer: configure Django in a worker process."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def render_url(url):
+    """Request url through the full Django stack; a miss renders and stores it."""
+    from django.test import Client
+
+    start = time.perf_counter()
+    response = Client(SERVER_NAME="localhost").get(url)
+    return {
+        "url": url,
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def warm_pages(urls=None, parallel=None, force=False):
+    """
+    Render every page that is not cached yet (all of them with force) on a
+    process pool. Returns one render_url() result per page rendered.
+    """
+    from django.db import connections
+
+    urls = page_urls() if urls is None else list(urls)
+    if force:
+        clear_pages()
+    todo = [url for url in urls if not is_cached(url)]
+    if not todo:
+        return []
+
+    parallel = min(parallel or os.cpu_count() or 1, len(todo))
+    if parallel <= 1:
+        return [render_url(url) for url in todo]
+
+    # forked workers must open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=parallel, initializer=setup_worker) as pool:
+        return list(pool.map(render_url, todo))
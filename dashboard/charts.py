@@ -0,0 +1,258 @@
+# dashboard/charts.py
+#
+# The dashboard figures as plain plotly figure dicts, built straight from
+# arrays. plotly.express goes through a data frame per trace group,
+# resolves the template and validates every property on every call; for
+# six small figures per request that was most of the view's CPU time.
+# These functions emit the traces and layout px emitted for the same charts
+# (hovertemplates, colours, legend groups, shapes), so the pages look the
+# same. The plotly_white template and colour scale are converted once.
+#
+# benchmarks/bench_figures.py times both versions and checks that they
+# produce the same figure.
+
+from functools import lru_cache
+
+import numpy as np
+import plotly.io as pio
+from plotly.colors import make_colorscale, sequential
+
+TEMPLATE = "plotly_white"
+
+# marker size px.scatter gives the largest point
+SIZE_MAX = 20
+
+HIGHLIGHT_COLOR = "#d62728"
+OTHER_COLOR = "#1f77b4"
+
+
+@lru_cache(maxsize=None)
+def template():
+    """plotly_white as a dict. Shared by every figure, so never modify it."""
+    return pio.templates[TEMPLATE].to_plotly_json()
+
+
+@lru_cache(maxsize=None)
+def colorway():
+    return tuple(template()["layout"]["colorway"])
+
+
+@lru_cache(maxsize=None)
+def blues():
+    return make_colorscale(sequential.Blues)
+
+
+def to_html(fig, div_id=None):
+    """Page fragment for fig, like Figure.to_html(full_html=False), without validation."""
+    return pio.to_html(fig, full_html=False, validate=False, div_id=div_id)
+
+
+# ---------------------------------------------------
+# Layout pieces px adds to every figure
+# ---------------------------------------------------
+def _layout(title=None, **extra):
+    layout = {"template": template(), "legend": {"tracegroupgap": 0}}
+    if title is None:
+        layout["margin"] = {"t": 60}
+    else:
+        layout["title"] = {"text": title}
+    layout.update(extra)
+    return layout
+
+
+def _axes(x_title, y_title):
+    return {
+        "xaxis": {"anchor": "y", "domain": [0.0, 1.0], "title": {"text": x_title}},
+        "yaxis": {"anchor": "x", "domain": [0.0, 1.0], "title": {"text": y_title}},
+    }
+
+
+def _coloraxis(title, **colorbar):
+    return {
+        "colorbar": {"title": {"text": title}, **colorbar},
+        "colorscale": blues(),
+        "autocolorscale": False,
+    }
+
+
+def _line_traces(x, series, x_label, y_label, color_label="Series"):
+    """One lines+markers trace per {name: y} entry, coloured in order like px.line(color=...)."""
+    colors = colorway()
+    return [
+        {
+            "hovertemplate": (
+                f"{color_label}={name}<br>{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>"
+            ),
+            "legendgroup": name,
+            "line": {"color": colors[i % len(colors)], "dash": "solid"},
+            "marker": {"symbol": "circle"},
+            "mode": "lines+markers",
+            "name": name,
+            "orientation": "v",
+            "showlegend": True,
+            "x": x,
+            "xaxis": "x",
+            "y": y,
+            "yaxis": "y",
+            "type": "scatter",
+        }
+        for i, (name, y) in enumerate(series.items())
+    ]
+
+
+# ---------------------------------------------------
+# Figures
+# ---------------------------------------------------
+def trend_figure(years, series, base_year):
+    """Premium index per year for each {name: values} series, with a baseline at 1.0."""
+    layout = _layout("Auto Insurance Premium Trend, indexed to base year", **_axes("Year", "Premium Index"))
+    layout["xaxis"].update({"type": "linear", "tickmode": "array", "tickvals": list(years)})
+    layout["yaxis"]["tickformat"] = ".2f"
+    layout["legend"]["title"] = {"text": ""}
+    layout["shapes"] = [{
+        "line": {"dash": "dash"},
+        "type": "line",
+        "x0": 0, "x1": 1, "xref": "x domain",
+        "y0": 1.0, "y1": 1.0, "yref": "y",
+    }]
+    layout["annotations"] = [{
+        "showarrow": False,
+        "text": f"{base_year} baseline",
+        "x": 1, "xanchor": "right", "xref": "x domain",
+        "y": 1.0, "yanchor": "bottom", "yref": "y",
+    }]
+    return {"data": _line_traces(years, series, "Year", "Premium Index"), "layout": layout}
+
+
+def weather_figure(years, state_values, national_values, state, metric):
+    """NOAA metric per year for state against the national mean."""
+    series = {"State Value": state_values, "National Value": national_values}
+    layout = _layout(f"NOAA weather trend for {state}", **_axes("Year", metric))
+    layout["legend"]["title"] = {"text": ""}
+    return {"data": _line_traces(years, series, "year", "Value"), "layout": layout}
+
+
+def mix_figure(groups, counts, state):
+    """Pie of FEMA declarations per incident group."""
+    trace = {
+        "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        "hovertemplate": "incident_group=%{label}<br>count=%{value}<extra></extra>",
+        "labels": groups,
+        "legendgroup": "",
+        "name": "",
+        "showlegend": True,
+        "values": counts,
+        "type": "pie",
+    }
+    return {"data": [trace], "layout": _layout(f"FEMA disaster mix for {state}")}
+
+
+def premium_bar_figure(states, premium_index, average_premium, disaster_count, risk_score,
+                       selected_state, insurance):
+    """
+    Horizontal premium index bars, selected_state in red. Rows are drawn in
+    the order given; like px, each colour group is one trace, in order of
+    first appearance.
+    """
+    states = np.asarray(states, dtype=object)
+    premium_index = np.asarray(premium_index, dtype=float)
+    customdata = np.column_stack([average_premium, disaster_count, risk_score]).astype(float)
+    highlight = np.where(states == selected_state, selected_state, "Other")
+    colors = {selected_state: HIGHLIGHT_COLOR, "Other": OTHER_COLOR}
+
+    traces = []
+    for name in dict.fromkeys(highlight):
+        rows = highlight == name
+        traces.append({
+            "customdata": customdata[rows],
+            "hovertemplate": (
+                f"Highlight={name}<br>Premium Index=%{{x:.2f}}<br>state=%{{y}}"
+                "<br>Average Premium=%{customdata[0]:$,.0f}<br>disaster_count=%{customdata[1]}"
+                "<br>Risk Score=%{customdata[2]:.2f}<extra></extra>"
+            ),
+            "legendgroup": name,
+            "marker": {"color": colors[name], "pattern": {"shape": ""}},
+            "name": name,
+            "orientation": "h",
+            "showlegend": True,
+            "textposition": "auto",
+            "x": premium_index[rows],
+            "xaxis": "x",
+            "y": states[rows],
+            "yaxis": "y",
+            "type": "bar",
+        })
+
+    layout = _layout(f"{insurance} premium index by state", **_axes("Premium Index", "State"))
+    layout["legend"]["title"] = {"text": ""}
+    layout["barmode"] = "relative"
+    layout["shapes"] = [{
+        "line": {"color": "black", "dash": "dash"},
+        "type": "line",
+        "x0": 1.0, "x1": 1.0, "xref": "x",
+        "y0": 0, "y1": 1, "yref": "y domain",
+    }]
+    layout["annotations"] = [{
+        "showarrow": False,
+        "text": "National average",
+        "x": 1.0, "xanchor": "left", "xref": "x",
+        "y": 1, "yanchor": "top", "yref": "y domain",
+    }]
+    return {"data": traces, "layout": layout}
+
+
+def correlation_figure(states, disaster_count, premium_index, risk_score):
+    """Disasters against premium index, one bubble per state sized and coloured by risk."""
+    risk_score = np.asarray(risk_score, dtype=float)
+    trace = {
+        "hovertemplate": (
+            "<b>%{hovertext}</b><br><br>Average Annual Disasters=%{x}<br>Premium Index=%{y}"
+            "<br>Composite Risk Score=%{marker.color}<extra></extra>"
+        ),
+        "hovertext": states,
+        "legendgroup": "",
+        "marker": {
+            "color": risk_score,
+            "coloraxis": "coloraxis",
+            "size": risk_score,
+            "sizemode": "area",
+            # px scales area so the largest value is SIZE_MAX pixels across
+            "sizeref": float(np.nanmax(risk_score)) / SIZE_MAX ** 2,
+            "symbol": "circle",
+        },
+        "mode": "markers",
+        "name": "",
+        "orientation": "v",
+        "showlegend": False,
+        "x": disaster_count,
+        "xaxis": "x",
+        "y": premium_index,
+        "yaxis": "y",
+        "type": "scatter",
+    }
+    layout = _layout(
+        "Relationship Between Disaster Activity and Insurance Premiums",
+        **_axes("Average Annual FEMA Disasters", "Premium Index (1.00 = National Average)"),
+        coloraxis=_coloraxis("Risk Score", tickformat=".2f"),
+    )
+    layout["legend"]["itemsizing"] = "constant"
+    return {"data": [trace], "layout": layout}
+
+
+def risk_map_figure(states, risk_score):
+    """US choropleth of the risk score."""
+    trace = {
+        "coloraxis": "coloraxis",
+        "geo": "geo",
+        "hovertemplate": "state=%{location}<br>Risk Score=%{z}<extra></extra>",
+        "locationmode": "USA-states",
+        "locations": states,
+        "name": "",
+        "z": risk_score,
+        "type": "choropleth",
+    }
+    layout = _layout(
+        geo={"domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]}, "center": {}, "scope": "usa"},
+        coloraxis=_coloraxis("Risk Score"),
+    )
+    return {"data": [trace], "layout": layout}
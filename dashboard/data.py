@@ -0,0 +1,274 @@
+# dashboard/data.py
+#
+# Everything the home view reads, as small aggregate frames. Three
+# sources answer the same questions:
+#
+#   SummarySource  the summary_*.csv tables written by clean_all_data.py
+#                  (a few KB, kept in memory between requests)
+#   DbSource       the indexed tables filled by `manage.py load_dashboard_data`;
+#                  every aggregate is a GROUP BY in SQLite
+#   CsvSource      the clean CSVs, summarized in pandas on each request
+#
+# settings.DASHBOARD_DATA_SOURCE picks one ("summary", "db" or "csv").
+
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import Avg, Count, Sum
+
+from dashboard.models import AutoPremium, FemaDeclaration, HomePremium, NoaaStateYear
+from utils import summaries, versions
+
+
+# ---------------------------------------------------
+# Shared helpers
+# ---------------------------------------------------
+def means_from_totals(df, keys):
+    """Regroup total / n rows by keys and divide; groups with no values give NaN."""
+    grouped = df.groupby(keys, as_index=False)[["total", "n"]].sum()
+    grouped["value"] = grouped["total"] / grouped["n"].where(grouped["n"] > 0)
+    return grouped.drop(columns=["total", "n"])
+
+
+def mix_with_other(groups):
+    """{incident_group or None: count} → pie rows, missing types counted as Other."""
+    counts = {}
+    for group, count in groups:
+        key = group if group is not None else "Other"
+        counts[key] = counts.get(key, 0) + count
+    return pd.DataFrame(
+        sorted(counts.items()), columns=["incident_group", "count"]
+    ).astype({"count": "int64"})
+
+
+# ---------------------------------------------------
+# SQLite tables
+# ---------------------------------------------------
+class DbSource:
+    def auto_states(self):
+        return list(
+            AutoPremium.objects.order_by("state").values_list("state", flat=True).distinct()
+        )
+
+    def auto_by_state(self, year):
+        rows = (
+            AutoPremium.objects.filter(year=year)
+            .values("state")
+            .annotate(premium=Avg("avg_premium"))
+            .order_by("state")
+        )
+        return _frame(rows, {"state": "state", "premium": "Average Premium"})
+
+    def auto_national(self):
+        rows = AutoPremium.objects.values("year").annotate(premium=Avg("avg_premium"))
+        return {r["year"]: _float(r["premium"]) for r in rows}
+
+    def auto_state_premiums(self, state):
+        # a state can appear in several NAIC tables; use its first row
+        first_row = (
+            AutoPremium.objects.filter(state=state)
+            .order_by("source_row")
+            .values_list("source_row", flat=True)
+            .first()
+        )
+        if first_row is None:
+            return None
+        rows = AutoPremium.objects.filter(state=state, source_row=first_row)
+        return {year: _float(premium) for year, premium in rows.values_list("year", "avg_premium")}
+
+    def home_states(self):
+        return list(
+            HomePremium.objects.order_by("state").values_list("state", flat=True).distinct()
+        )
+
+    def home_by_state(self):
+        rows = (
+            HomePremium.objects.values("state")
+            .annotate(premium=Avg("avg_annual_usd"))
+            .order_by("state")
+        )
+        return _frame(rows, {"state": "state", "premium": "Average Premium"})
+
+    def fema_counts(self):
+        rows = (
+            FemaDeclaration.objects.values("state")
+            .annotate(disaster_count=Count("id"))
+            .order_by("state")
+        )
+        return _frame(rows, {"state": "state", "disaster_count": "disaster_count"})
+
+    def fema_groups(self):
+        rows = (
+            FemaDeclaration.objects.filter(incident_group__isnull=False)
+            .values("state", "incident_group")
+            .annotate(count=Count("id"))
+            .order_by("state", "incident_group")
+        )
+        return _frame(
+            rows, {"state": "state", "incident_group": "incident_group", "count": "count"}
+        )
+
+    def fema_mix(self, state):
+        rows = (
+            FemaDeclaration.objects.filter(state=state)
+            .values_list("incident_group")
+            .annotate(count=Count("id"))
+        )
+        return mix_with_other(rows)
+
+    def noaa_metrics(self):
+        return list(
+            NoaaStateYear.objects.order_by("position")
+            .values_list("metric", flat=True)
+            .distinct()
+        )
+
+    def noaa_state_means(self):
+        rows = (
+            NoaaStateYear.objects.values("state", "metric")
+            .annotate(total=Sum("total"), n=Sum("n"))
+            .order_by("state")
+        )
+        return _pivot_means(pd.DataFrame(list(rows)), self.noaa_metrics())
+
+    def noaa_year_means(self, metric, state=None):
+        rows = NoaaStateYear.objects.filter(metric=metric, year__isnull=False)
+        if state is not None:
+            rows = rows.filter(state=state)
+        rows = rows.values("year").annotate(total=Sum("total"), n=Sum("n")).order_by("year")
+        df = pd.DataFrame(list(rows), columns=["year", "total", "n"])
+        return means_from_totals(df, ["year"])
+
+
+# ---------------------------------------------------
+# Summary tables
+# ---------------------------------------------------
+class SummarySource:
+    """Answers from the summary frames of utils.summaries.build_summaries."""
+
+    def __init__(self, tables):
+        self.premiums = tables["premiums"]
+        self.fema_counts_table = tables["fema_counts"]
+        self.fema_groups_table = tables["fema_groups"]
+        self.noaa = tables["noaa_state_year"]
+
+    def _premiums(self, insurance):
+        return self.premiums[self.premiums["insurance"] == insurance]
+
+    def auto_states(self):
+        return sorted(self._premiums("auto")["state"].unique().tolist())
+
+    def auto_by_state(self, year):
+        rows = self._premiums("auto")
+        out = means_from_totals(rows[rows["year"] == year], ["state"])
+        return out.rename(columns={"value": "Average Premium"})
+
+    def auto_national(self):
+        out = means_from_totals(self._premiums("auto"), ["year"])
+        return {int(year): value for year, value in zip(out["year"], out["value"])}
+
+    def auto_state_premiums(self, state):
+        rows = self._premiums("auto")
+        rows = rows[rows["state"] == state]
+        if rows.empty:
+            return None
+        return {int(year): value for year, value in zip(rows["year"], rows["first"])}
+
+    def home_states(self):
+        return sorted(self._premiums("home")["state"].unique().tolist())
+
+    def home_by_state(self):
+        out = means_from_totals(self._premiums("home"), ["state"])
+        return out.rename(columns={"value": "Average Premium"})
+
+    def fema_counts(self):
+        return self.fema_counts_table.copy()
+
+    def fema_groups(self):
+        return self.fema_groups_table.dropna(subset=["incident_group"]).reset_index(drop=True)
+
+    def fema_mix(self, state):
+        rows = self.fema_groups_table[self.fema_groups_table["state"] == state]
+        groups = rows["incident_group"].astype(object).where(rows["incident_group"].notna(), None)
+        return mix_with_other(zip(groups, rows["count"]))
+
+    def noaa_metrics(self):
+        return self.noaa.sort_values("position")["metric"].drop_duplicates().tolist()
+
+    def noaa_state_means(self):
+        rows = self.noaa.groupby(["state", "metric"], as_index=False)[["total", "n"]].sum()
+        return _pivot_means(rows, self.noaa_metrics())
+
+    def noaa_year_means(self, metric, state=None):
+        rows = self.noaa[(self.noaa["metric"] == metric) & self.noaa["year"].notna()]
+        if state is not None:
+            rows = rows[rows["state"] == state]
+        out = means_from_totals(rows[["year", "total", "n"]], ["year"])
+        out["year"] = out["year"].astype("int64")
+        return out
+
+
+class CsvSource(SummarySource):
+    """Summarizes the clean CSVs on every request; slow, needs no build step."""
+
+    def __init__(self, data_dir):
+        super().__init__(summaries.build_summaries(data_dir))
+
+
+# summary tables already read, by name: ((path, size, mtime_ns), frame)
+_SUMMARY_MEMO = {}
+
+
+def load_summary_tables(data_dir):
+    """
+    Read the summary files, reusing the frames from earlier requests while
+    the files are unchanged on disk.
+    """
+    tables = {}
+    for name, path in summaries.summary_paths(data_dir).items():
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        cached = _SUMMARY_MEMO.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, summaries.read_summary(name, path))
+            _SUMMARY_MEMO[name] = cached
+        tables[name] = cached[1]
+    return tables
+
+
+# ---------------------------------------------------
+# Helpers
+# ---------------------------------------------------
+def _float(value):
+    return np.nan if value is None else float(value)
+
+
+def _frame(rows, columns):
+    """Values queryset → DataFrame with renamed columns; null averages become NaN."""
+    df = pd.DataFrame(list(rows), columns=list(columns)).rename(columns=columns)
+    for col in df.columns:
+        if col not in ("state", "incident_group"):
+            df[col] = pd.to_numeric(df[col])
+    return df
+
+
+def _pivot_means(rows, metrics):
+    """(state, metric, total, n) rows → one row per state, one column per metric."""
+    if rows.empty or not metrics:
+        return pd.DataFrame(columns=["state", *metrics])
+    rows = rows.assign(value=rows["total"] / rows["n"].where(rows["n"] > 0))
+    wide = rows.pivot(index="state", columns="metric", values="value")
+    return wide.reindex(columns=metrics).reset_index().rename_axis(columns=None)
+
+
+def get_source():
+    # only the published version, never a refresh in progress
+    data_dir = versions.current_dir(settings.DASHBOARD_DATA_DIR)
+    kind = getattr(settings, "DASHBOARD_DATA_SOURCE", "summary")
+    if kind == "db":
+        return DbSource()
+    if kind == "csv":
+        return CsvSource(data_dir)
+    return SummarySource(load_summary_tables(data_dir))
@@ -0,0 +1,150 @@
+# bench_dashboard.py
+# Replays a request mix against the home view through the Django test client
+# (the full middleware, view and template stack, no network) and prints
+# latency percentiles and throughput.
+#
+# The mix is either every dashboard page (the default) or a file with one
+# "<weight> <url>" or "<url>" per line; requests are drawn from it at random.
+#
+# Usage:
+#   python manage.py bench_dashboard
+#   python manage.py bench_dashboard --requests 500 --concurrency 4
+#   python manage.py bench_dashboard --mix mix.txt --no-cache --json
+
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from dashboard.cache import page_urls
+
+
+def read_mix(path):
+    """[(url, weight)] from a mix file; blank lines and # comments are skipped."""
+    mix = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) == 1:
+                mix.append((parts[0], 1.0))
+            else:
+                mix.append((parts[1], float(parts[0])))
+    if not mix:
+        raise CommandError(f"{path} has no requests")
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, wall_seconds):
+    ms = sorted(s * 1000 for s in latencies)
+    return {
+        "requests": len(ms),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(ms) / wall_seconds, 2) if wall_seconds else None,
+        "mean_ms": round(statistics.fmean(ms), 2),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(ms[-1], 2),
+    }
+
+
+class Command(BaseCommand):
+    help = "Replay a request mix through the test client and report p50/p95/p99 latency and throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="timed requests (default: 200)")
+        parser.add_argument("--concurrency", type=int, default=1, help="client threads (default: 1)")
+        parser.add_argument("--warmup", type=int, default=5, help="untimed requests first (default: 5)")
+        parser.add_argument("--mix", default=None, help="file of '<weight> <url>' lines (default: every page)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--no-cache", action="store_true", help="bypass the page cache")
+        parser.add_argument(
+            "--no-gzip",
+            action="store_true",
+            help="do not send Accept-Encoding: gzip (browsers do)",
+        )
+        parser.add_argument("--json", action="store_true", help="print the result as JSON")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1")
+
+        if options["mix"]:
+            mix = read_mix(options["mix"])
+        else:
+            mix = [(url, 1.0) for url in page_urls()]
+        urls, weights = zip(*mix)
+
+        rng = random.Random(options["seed"])
+        plan = rng.choices(urls, weights=weights, k=options["warmup"] + options["requests"])
+        warmup, timed = plan[: options["warmup"]], plan[options["warmup"]:]
+
+        headers = {} if options["no_gzip"] else {"Accept-Encoding": "gzip"}
+        with override_settings(DASHBOARD_PAGE_CACHE=not options["no_cache"]):
+            result = self.replay(warmup, timed, options["concurrency"], headers)
+        result["mix_urls"] = len(urls)
+        result["page_cache"] = not options["no_cache"]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(
+            f"{result['requests']} requests over {result['mix_urls']} URLs, "
+            f"concurrency {options['concurrency']}, page cache {'on' if result['page_cache'] else 'off'}"
+        )
+        self.stdout.write(
+            f"p50 {result['p50_ms']:.1f} ms   p95 {result['p95_ms']:.1f} ms   "
+            f"p99 {result['p99_ms']:.1f} ms   max {result['max_ms']:.1f} ms   "
+            f"mean {result['mean_ms']:.1f} ms"
+        )
+        self.stdout.write(
+            f"throughput {result['throughput_rps']} req/s   status {result['status']}   "
+            f"cache {result['cache']}"
+        )
+
+    def replay(self, warmup, timed, concurrency, headers):
+        local = threading.local()
+
+        def client():
+            # the test client keeps cookies, so each thread gets its own
+            if not hasattr(local, "client"):
+                local.client = Client(SERVER_NAME="localhost", headers=headers)
+            return local.client
+
+        def fetch(url):
+            start = time.perf_counter()
+            response = client().get(url)
+            return time.perf_counter() - start, response.status_code, response.get("X-Page-Cache", "off")
+
+        for url in warmup:
+            client().get(url)
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            results = [fetch(url) for url in timed]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(fetch, timed))
+        wall = time.perf_counter() - start
+
+        out = summarize([r[0] for r in results], wall)
+        out["status"] = dict(Counter(r[1] for r in results))
+        out["cache"] = dict(Counter(r[2] for r in results))
+        out["accept_gzip"] = bool(headers)
+        return out
@@ -0,0 +1,68 @@
+# data_versions.py
+# Lists, rolls back and prunes the versioned data directories written by
+# the pipeline (utils/versions.py). Rolling back only moves the CURRENT
+# pointer; with DASHBOARD_DATA_SOURCE=db the tables are reloaded from the
+# version as well.
+#
+# Usage:
+#   python manage.py data_versions
+#   python manage.py data_versions --rollback
+#   python manage.py data_versions --rollback 20261018T120000Z
+#   python manage.py data_versions --prune --keep 3
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.cache import clear_pages
+from utils import versions
+
+
+class Command(BaseCommand):
+    help = "List, roll back or prune the published data versions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rollback",
+            nargs="?",
+            const="",
+            default=None,
+            metavar="VERSION",
+            help="publish VERSION, or the previous published version if none is given",
+        )
+        parser.add_argument("--prune", action="store_true", help="delete old versions")
+        parser.add_argument("--keep", type=int, default=5, help="published versions --prune keeps")
+        parser.add_argument("--data-dir", default=settings.DASHBOARD_DATA_DIR)
+
+    def handle(self, *args, **options):
+        root = options["data_dir"]
+
+        if options["rollback"] is not None:
+            try:
+                name = versions.rollback(root, options["rollback"] or None)
+            except FileNotFoundError as e:
+                raise CommandError(str(e)) from e
+            if settings.DASHBOARD_DATA_SOURCE == "db":
+                call_command("load_dashboard_data", data_dir=versions.version_dir(root, name))
+            clear_pages()
+            self.stdout.write(self.style.SUCCESS(f"Published data version {name}"))
+
+        if options["prune"]:
+            deleted = versions.prune(root, keep=options["keep"])
+            self.stdout.write(f"Deleted {len(deleted)} versions: {', '.join(deleted) or '-'}")
+
+        self.list_versions(root)
+
+    def list_versions(self, root):
+        rows = versions.list_versions(root)
+        if not rows:
+            self.stdout.write(f"No data versions in {root}; the dashboard reads its files directly")
+            return
+        self.stdout.write(f"\n  {'version':<22}{'published':>10}{'files':>7}{'MB':>10}")
+        for v in rows:
+            marker = "*" if v["current"] else " "
+            self.stdout.write(
+                f"{marker} {v['name']:<22}{'yes' if v['published'] else 'no':>10}"
+                f"{v['files']:>7}{v['bytes'] / 1e6:>10.1f}"
+            )
+        self.stdout.write("(* = current; files are hard links shared between versions)")
@@ -0,0 +1,140 @@
+# load_dashboard_data.py
+# Loads the clean CSVs into the dashboard tables (dashboard/models.py).
+# Every table is replaced inside one transaction and rows are inserted
+# with bulk_create in large batches; FEMA and NOAA are streamed in chunks.
+#
+# Usage:
+#   python manage.py load_dashboard_data
+#   python manage.py load_dashboard_data --data-dir /path/to/data --batch-size 20000
+
+import os
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dashboard.cache import clear_caches
+from dashboard.models import AutoPremium, FemaDeclaration, HomePremium, NoaaStateYear
+from utils import schemas, summaries, versions
+from utils.summaries import CLEAN_FILES
+from utils.incidents import incident_group_series
+
+BATCH_SIZE = 10_000
+
+
+def _records(df):
+    """Rows of df as tuples with NaN / NA / NaT replaced by None."""
+    df = df.astype(object).where(df.notna(), None)
+    return df.itertuples(index=False, name=None)
+
+
+# ---------------------------------------------------
+# One loader per table; each returns the rows inserted
+# ---------------------------------------------------
+def load_auto(data_dir, batch_size):
+    columns = ["state", *schemas.AUTO_PREMIUM_COLUMNS]
+    df = schemas.read_dataset(
+        "naic", "clean", os.path.join(data_dir, CLEAN_FILES["naic"]),
+        usecols=columns, missing="empty",
+    ).reindex(columns=columns)
+    objs = [
+        AutoPremium(state=row[0], year=year, avg_premium=premium, source_row=source_row)
+        for source_row, row in enumerate(_records(df))
+        for year, premium in zip(schemas.AUTO_YEARS, row[1:])
+    ]
+    AutoPremium.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def load_home(data_dir, batch_size):
+    columns = ["state", "year", "avg_annual_usd", "avg_monthly_usd"]
+    df = schemas.read_dataset(
+        "nerdwallet", "clean", os.path.join(data_dir, CLEAN_FILES["nerdwallet"]),
+        usecols=columns, missing="empty",
+    ).reindex(columns=columns)
+    objs = [
+        HomePremium(state=state, year=year, avg_annual_usd=annual, avg_monthly_usd=monthly)
+        for state, year, annual, monthly in _records(df)
+    ]
+    HomePremium.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def load_fema(data_dir, batch_size):
+    path = os.path.join(data_dir, CLEAN_FILES["fema"])
+    columns = ["state", "incidentType", "declarationDate"]
+    total = 0
+    chunks = schemas.read_dataset(
+        "fema", "clean", path, usecols=columns, chunksize=batch_size, missing="empty"
+    )
+    for chunk in chunks:
+        chunk = chunk.reindex(columns=columns)
+        chunk["incident_group"] = incident_group_series(chunk["incidentType"])
+        # dates that parse_dates could not read stay text; drop them here
+        chunk["declarationDate"] = pd.to_datetime(
+            chunk["declarationDate"], errors="coerce", utc=True
+        )
+        objs = [
+            FemaDeclaration(
+                state=state,
+                incident_type=incident_type,
+                incident_group=group,
+                declaration_date=declared,
+            )
+            for state, incident_type, declared, group in _records(chunk)
+        ]
+        FemaDeclaration.objects.bulk_create(objs, batch_size=batch_size)
+        total += len(objs)
+    return total
+
+
+def load_noaa(data_dir, batch_size):
+    totals = summaries.summarize_noaa(
+        os.path.join(data_dir, CLEAN_FILES["noaa"]), chunksize=batch_size * 10
+    )
+    objs = [
+        NoaaStateYear(state=state, year=year, metric=metric, position=position, total=total, n=n)
+        for state, year, metric, position, total, n in _records(totals)
+    ]
+    NoaaStateYear.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+LOADERS = {
+    AutoPremium: load_auto,
+    HomePremium: load_home,
+    FemaDeclaration: load_fema,
+    NoaaStateYear: load_noaa,
+}
+
+
+class Command(BaseCommand):
+    help = "Load the clean CSVs into the dashboard's SQLite tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data-dir",
+            default=None,
+            help="folder with the clean_*.csv files (default: the published data version)",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        data_dir = options["data_dir"] or versions.current_dir(settings.DASHBOARD_DATA_DIR)
+        batch_size = options["batch_size"]
+
+        start = time.perf_counter()
+        # all or nothing: the dashboard never sees half loaded tables
+        with transaction.atomic():
+            for model, loader in LOADERS.items():
+                model.objects.all().delete()
+                rows = loader(data_dir, batch_size)
+                self.stdout.write(f"{model.__name__:<16}{rows:>10,} rows")
+        # pages and memos of this data version were built from the old rows
+        clear_caches()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Loaded dashboard tables in {time.perf_counter() - start:.1f}s")
+        )
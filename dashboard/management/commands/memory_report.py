@@ -0,0 +1,56 @@
+# memory_report.py
+# Renders one dashboard page under tracemalloc and prints the peak and net
+# allocation of every stage of the view, with the source lines that
+# allocated most in each (dashboard/memory.py). The page cache is bypassed.
+# A first, untraced render loads pandas and plotly and fills the data
+# source's in-memory tables, so the report shows what a warm worker
+# allocates per request; --cold traces that first render instead.
+#
+# Usage:
+#   python manage.py memory_report
+#   python manage.py memory_report --insurance Auto --year 2019 --state TX --top 5
+#   python manage.py memory_report --insurance Home --state FL --json
+
+import json
+
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+from django.template.loader import render_to_string
+
+from dashboard.memory import stage, trace_memory
+
+
+class Command(BaseCommand):
+    help = "Report tracemalloc peak / net allocations per stage of one dashboard render"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--insurance", default="Auto")
+        parser.add_argument("--year", default=None)
+        parser.add_argument("--state", default=None)
+        parser.add_argument("--top", type=int, default=10, help="allocating lines per stage (default: 10)")
+        parser.add_argument("--cold", action="store_true", help="trace the first render in this process")
+        parser.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    def handle(self, *args, **options):
+        from dashboard.views import build_dashboard
+
+        query = QueryDict(mutable=True)
+        for name in ("insurance", "year", "state"):
+            if options[name]:
+                query[name] = options[name]
+
+        def render():
+            context = build_dashboard(query)["context"]
+            stage("template")
+            return render_to_string("home.html", context)
+
+        if not options["cold"]:
+            render()
+        with trace_memory(options["top"]) as report:
+            render()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict(), indent=2))
+        else:
+            self.stdout.write(f"GET /?{query.urlencode()}")
+            self.stdout.write(report.format())
@@ -0,0 +1,49 @@
+# prerender_dashboard.py
+# Writes every dashboard page (insurance × year × state) as static HTML plus
+# per-panel JSON (dashboard/prerender.py) on a process pool. Only pages
+# whose data or rendering code changed since the last run are rendered.
+#
+# Usage:
+#   python manage.py prerender_dashboard
+#   python manage.py prerender_dashboard --parallel 8 --gzip
+#   python manage.py prerender_dashboard --force --out /srv/dashboard
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.prerender import prerender_dir, prerender_pages
+
+
+class Command(BaseCommand):
+    help = "Pre-render every dashboard page to static HTML and panel JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--out",
+            default=None,
+            help="output folder (default: settings.DASHBOARD_PRERENDER_DIR)",
+        )
+        parser.add_argument("--parallel", type=int, default=None, help="worker processes (default: one per CPU)")
+        parser.add_argument("--force", action="store_true", help="re-render every page")
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="also write .gz copies for the proxy to send as-is (nginx gzip_static)",
+        )
+
+    def handle(self, *args, **options):
+        out_dir = options["out"] or prerender_dir()
+        start = time.perf_counter()
+        result = prerender_pages(
+            out_dir, parallel=options["parallel"], force=options["force"], compress=options["gzip"]
+        )
+
+        rendered = result["rendered"]
+        self.stdout.write(
+            f"{len(rendered)} pages rendered, {result['skipped']} unchanged, "
+            f"{result['removed']} removed ({sum(r['bytes'] for r in rendered) / 1e6:,.1f} MB written)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Pre-rendered into {out_dir} in {time.perf_counter() - start:.1f}s")
+        )
@@ -0,0 +1,64 @@
+# refresh_data.py
+# Downloads, cleans and aggregates the data the dashboard reads, clears the
+# page cache when the data changed and (with --warm / --prerender) renders
+# every page into the page cache / as static files.
+# It is run_pipeline without the need to list stages; the run report is
+# written to data/reports/ as usual.
+#
+# Usage:
+#   python manage.py refresh_data
+#   python manage.py refresh_data --only fema --parallel 4 --warm
+#   python manage.py refresh_data --skip-extract --force
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+import clean_all_data
+import run_all_extractors
+
+
+class Command(BaseCommand):
+    help = "Refresh the dashboard data: extract, clean, aggregate and optionally warm the page cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            choices=sorted(set(run_all_extractors.EXTRACTORS) | set(clean_all_data.CLEANERS)),
+            help="dataset to refresh; repeat for several (default: all)",
+        )
+        parser.add_argument("--parallel", type=int, default=None)
+        parser.add_argument("--force", action="store_true", help="ignore the manifest and rebuild")
+        parser.add_argument("--chunksize", type=int, default=None)
+        parser.add_argument(
+            "--skip-extract",
+            action="store_true",
+            help="clean and aggregate the raw files already on disk",
+        )
+        parser.add_argument("--warm", action="store_true", help="render every page afterwards")
+        parser.add_argument(
+            "--prerender",
+            action="store_true",
+            help="write the static pages of dashboard/prerender.py afterwards",
+        )
+
+    def handle(self, *args, **options):
+        stages = ["extract", "clean", "aggregate", "warm", "prerender"]
+        if options["skip_extract"]:
+            stages.remove("extract")
+        if not options["warm"]:
+            stages.remove("warm")
+        if not options["prerender"]:
+            stages.remove("prerender")
+
+        call_command(
+            "run_pipeline",
+            stages=stages,
+            only=options["only"],
+            parallel=options["parallel"],
+            force=options["force"],
+            chunksize=options["chunksize"],
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
@@ -0,0 +1,239 @@
+# run_pipeline.py
+# Runs a full data refresh in one process: extract, clean, aggregate and
+# cache-warm. Each stage is timed and a JSON run report (wall time, CPU
+# time, peak RSS, bytes downloaded, rows in / out per stage) is written to
+# data/reports/, so refreshes can be compared over time.
+#
+# Extract, clean and aggregate write into a new data version
+# (utils/versions.py) that is published after the last of them succeeds;
+# the dashboard keeps serving the previous version until then.
+#
+# Usage:
+#   python manage.py run_pipeline
+#   python manage.py run_pipeline --only fema --parallel 4
+#   python manage.py run_pipeline --stages clean aggregate warm --force
+
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+import clean_all_data
+import run_all_extractors
+from dashboard.cache import caching, clear_pages, page_urls, warm_pages
+from dashboard.prerender import prerender_pages
+from utils import versions
+from utils.http import ByteCounter, make_session
+from utils.run_report import RunReport
+
+STAGES = ["extract", "clean", "aggregate", "warm", "prerender"]
+
+# what runs without --stages; pre-rendering writes every page to disk, so ask for it
+DEFAULT_STAGES = ["extract", "clean", "aggregate", "warm"]
+
+# stages that write data files, into the new version
+DATA_STAGES = {"extract", "clean", "aggregate"}
+
+# published versions kept for rollback
+KEEP_VERSIONS = 5
+
+
+# ---------------------------------------------------
+# Stages; each fills in its record from the report
+# ---------------------------------------------------
+def extract(record, options, data_dir):
+    counter = ByteCounter()
+    names = [n for n in options["only"] if n in run_all_extractors.EXTRACTORS] or None
+    try:
+        results = run_all_extractors.run_extractors(
+            names,
+            options["parallel"] or 1,
+            session=make_session(byte_counter=counter),
+            data_dir=data_dir,
+        )
+    finally:
+        record["bytes_downloaded"] = counter.bytes
+        record["responses"] = counter.responses
+    record["rows_out"] = sum(r["rows"] or 0 for r in results)
+    record["datasets"] = {r["name"]: r["rows"] for r in results}
+
+
+def clean(record, options, data_dir):
+    names = [n for n in options["only"] if n in clean_all_data.CLEANERS] or None
+    if options["only"] and names is None:
+        record["status"] = "skipped"
+        return
+    results = clean_all_data.clean_all(
+        names,
+        parallel=options["parallel"],
+        data_dir=data_dir,
+        force=options["force"],
+        chunksize=options["chunksize"],
+    )
+    record["rows_in"] = sum(r["rows_in"] or 0 for r in results)
+    record["rows_out"] = sum(r["rows_out"] or 0 for r in results)
+    record["datasets"] = {r["dataset"]: r["status"] for r in results}
+
+
+def aggregate(record, options, data_dir):
+    result = clean_all_data.summarize_all(
+        data_dir, chunksize=options["chunksize"], force=options["force"]
+    )
+    if result is None:
+        record["status"] = "skipped"
+        return
+    record["rows_in"] = result["rows_in"]
+    record["rows_out"] = result["rows_out"]
+    record["summaries"] = result["status"]
+
+    if settings.DASHBOARD_DATA_SOURCE == "db":
+        # the tables are not versioned; they switch just before the pointer does
+        call_command("load_dashboard_data", data_dir=data_dir)
+
+
+def publish(record, options, data_dir):
+    root = options["data_dir"]
+    name = os.path.basename(data_dir)
+    versions.publish(root, name)
+    record["version"] = name
+    record["pruned"] = versions.prune(root, keep=options["keep_versions"])
+    # pages are keyed by data version, so the old ones are never served again
+    clear_pages()
+
+
+def warm(record, options, data_dir):
+    if not caching():
+        record["status"] = "skipped"
+        return
+    urls = page_urls()
+    results = warm_pages(urls, parallel=options["parallel"])
+    failed = [r["url"] for r in results if r["status"] != 200]
+    if failed:
+        raise RuntimeError(f"{len(failed)} pages failed to render, first: {failed[0]}")
+    record["rows_in"] = len(urls)
+    record["rows_out"] = len(results)
+    record["bytes_rendered"] = sum(r["bytes"] for r in results)
+
+
+def prerender(record, options, data_dir):
+    result = prerender_pages(parallel=options["parallel"])
+    record["rows_in"] = len(result["rendered"]) + result["skipped"]
+    record["rows_out"] = len(result["rendered"])
+    record["pages_removed"] = result["removed"]
+
+
+STAGE_FUNCS = {
+    "extract": extract,
+    "clean": clean,
+    "aggregate": aggregate,
+    "publish": publish,
+    "warm": warm,
+    "prerender": prerender,
+}
+
+
+class Command(BaseCommand):
+    help = "Run extract, clean, aggregate and cache-warm with a timed run report"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            choices=sorted(set(run_all_extractors.EXTRACTORS) | set(clean_all_data.CLEANERS)),
+            help="dataset to refresh; repeat for several (default: all)",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=None,
+            help=(
+                "extractor threads / cleaner and render processes "
+                "(default: serial extract, one cleaner per dataset, one renderer per CPU)"
+            ),
+        )
+        parser.add_argument(
+            "--stages",
+            nargs="+",
+            choices=STAGES,
+            default=DEFAULT_STAGES,
+            help="stages to run, always in pipeline order (default: all but prerender)",
+        )
+        parser.add_argument("--force", action="store_true", help="ignore the manifest and rebuild")
+        parser.add_argument("--chunksize", type=int, default=None)
+        parser.add_argument(
+            "--data-dir",
+            default=settings.DASHBOARD_DATA_DIR,
+            help="data root holding CURRENT and versions/ (default: settings.DASHBOARD_DATA_DIR)",
+        )
+        parser.add_argument(
+            "--keep-versions",
+            type=int,
+            default=KEEP_VERSIONS,
+            help=f"published data versions to keep for rollback (default: {KEEP_VERSIONS})",
+        )
+        parser.add_argument(
+            "--report-dir",
+            default=None,
+            help="where to write the JSON run report (default: <data-dir>/reports)",
+        )
+
+    def handle(self, *args, **options):
+        stages = [s for s in STAGES if s in options["stages"]]
+        root = options["data_dir"]
+
+        version, data_dir = versions.current_version(root), versions.current_dir(root)
+        if DATA_STAGES.intersection(stages):
+            # publish right after the last stage that writes data
+            last = max(stages.index(s) for s in DATA_STAGES.intersection(stages))
+            stages.insert(last + 1, "publish")
+            version, data_dir = versions.create_version(root)
+            self.stdout.write(f"Writing data version {version}")
+
+        report = RunReport({
+            "stages": stages,
+            "only": options["only"],
+            "parallel": options["parallel"],
+            "force": options["force"],
+            "chunksize": options["chunksize"],
+            "data_source": settings.DASHBOARD_DATA_SOURCE,
+            "data_version": version,
+        })
+
+        failed = None
+        for name in stages:
+            self.stdout.write(f"\n=== {name} ===")
+            try:
+                with report.stage(name) as record:
+                    STAGE_FUNCS[name](record, options, data_dir)
+            except Exception as e:
+                failed = e
+                break
+
+        # the report is written even when a stage fails
+        report_dir = options["report_dir"] or os.path.join(root, "reports")
+        path = report.write(report_dir)
+        self.print_summary(report.as_dict())
+        self.stdout.write(f"Run report: {path}")
+
+        if failed is not None:
+            raise CommandError(f"Pipeline failed: {failed}") from failed
+
+    def print_summary(self, data):
+        self.stdout.write("\n--------------------------------------------------")
+        self.stdout.write(
+            f"{'stage':<10}{'status':<9}{'rows in':>11}{'rows out':>11}"
+            f"{'MB down':>9}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}"
+        )
+        for s in data["stages"]:
+            self.stdout.write(
+                f"{s['stage']:<10}{s['status']:<9}{s['rows_in']:>11,}{s['rows_out']:>11,}"
+                f"{s['bytes_downloaded'] / 1e6:>9.1f}{s['wall_seconds']:>9.2f}"
+                f"{s['cpu_seconds']:>9.2f}{s['peak_rss_mb']:>9.1f}"
+            )
+        total = data["total"]
+        self.stdout.write(
+            f"Total {total['wall_seconds']:.2f}s wall, {total['cpu_seconds']:.2f}s CPU, "
+            f"status {data['status']}"
+        )
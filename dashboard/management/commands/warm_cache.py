@@ -0,0 +1,52 @@
+# warm_cache.py
+# Renders every dashboard page (insurance × year × state) into the page
+# cache (dashboard/cache.py) on a process pool, so no visitor waits for a
+# first render after a refresh. Pages already cached are skipped.
+#
+# Usage:
+#   python manage.py warm_cache
+#   python manage.py warm_cache --parallel 8 --force
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.cache import caching, page_urls, warm_pages
+
+
+class Command(BaseCommand):
+    help = "Pre-render every (insurance, year, state) dashboard page into the page cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=None,
+            help="worker processes (default: one per CPU)",
+        )
+        parser.add_argument("--force", action="store_true", help="clear the cache and re-render every page")
+
+    def handle(self, *args, **options):
+        if not settings.DASHBOARD_PAGE_CACHE:
+            raise CommandError("The page cache is disabled (DASHBOARD_PAGE_CACHE=0)")
+        if not caching():
+            raise CommandError("Pages of an unversioned data folder are not cached")
+
+        start = time.perf_counter()
+        urls = page_urls()
+        results = warm_pages(urls, parallel=options["parallel"], force=options["force"])
+
+        failed = [r for r in results if r["status"] != 200]
+        for r in failed:
+            self.stderr.write(f"GET {r['url']} returned {r['status']}")
+
+        rendered = len(results) - len(failed)
+        render_seconds = sum(r["seconds"] for r in results)
+        self.stdout.write(
+            f"{len(urls)} pages: {rendered} rendered, {len(urls) - len(results)} already cached, "
+            f"{len(failed)} failed ({render_seconds:.1f}s of rendering)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Warmed page cache in {time.perf_counter() - start:.1f}s"))
+        if failed:
+            raise CommandError(f"{len(failed)} pages failed to render")
@@ -0,0 +1,139 @@
+# dashboard/memory.py
+#
+# tracemalloc accounting of one dashboard request, stage by stage.
+# build_dashboard calls stage("...") at each of its sections; that is a
+# no-op unless the request runs inside trace_memory(), which records for
+# every stage:
+#
+#   net_kb    memory allocated during the stage and still held at its end
+#   peak_kb   highest traced memory during the stage, above its start
+#   top       source lines with the largest net allocations in the stage
+#
+# plus the peak and net of the whole request. Used by
+# `manage.py memory_report` and by ?profile=memory (dashboard/profiling.py).
+#
+# tracemalloc traces every thread, so only one request is traced at a time
+# and concurrent requests add noise to the figures.
+
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# allocations of the tracing itself
+IGNORED_FILES = [tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<unknown>"]
+
+_local = threading.local()
+_trace_lock = threading.Lock()
+
+
+def short_path(filename):
+    """filename relative to the sys.path entry it was imported from."""
+    for root in sorted(filter(None, sys.path), key=len, reverse=True):
+        if filename.startswith(root.rstrip(os.sep) + os.sep):
+            return filename[len(root.rstrip(os.sep)) + 1:]
+    return filename
+
+
+class MemoryReport:
+    """Stage records of one traced request; see the module comment."""
+
+    def __init__(self, top=10):
+        self.top = top
+        self.stages = []
+        self._name = None
+        self._snapshot = None
+        self._stage_start = 0
+        self._request_start = 0
+        self.peak_kb = 0.0
+        self.net_kb = 0.0
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, path) for path in IGNORED_FILES]
+        )
+
+    def _top_lines(self, snapshot):
+        lines = []
+        for stat in snapshot.compare_to(self._snapshot, "lineno")[: self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            lines.append({
+                "line": f"{short_path(frame.filename)}:{frame.lineno}",
+                "kb": round(stat.size_diff / 1024, 1),
+                "blocks": stat.count_diff,
+            })
+        return lines
+
+    def start(self):
+        self._snapshot = self._take_snapshot()
+        self._request_start = self._stage_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def mark(self, name):
+        """End the running stage, if any, and start name."""
+        current, peak = tracemalloc.get_traced_memory()
+        if self._name is not None:
+            snapshot = self._take_snapshot()
+            self.stages.append({
+                "stage": self._name,
+                "net_kb": round((current - self._stage_start) / 1024, 1),
+                "peak_kb": round((peak - self._stage_start) / 1024, 1),
+                "top": self._top_lines(snapshot),
+            })
+            self._snapshot = snapshot
+        self.peak_kb = max(self.peak_kb, round((peak - self._request_start) / 1024, 1))
+        self._name = name
+        # the snapshot just taken belongs to no stage
+        self._stage_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def finish(self):
+        current = tracemalloc.get_traced_memory()[0]
+        self.mark(None)
+        self.net_kb = round((current - self._request_start) / 1024, 1)
+        self._snapshot = None
+
+    def as_dict(self):
+        return {"peak_kb": self.peak_kb, "net_kb": self.net_kb, "stages": self.stages}
+
+    def format(self):
+        """The report as a text table, top lines under each stage."""
+        lines = [
+            f"request peak {self.peak_kb:,.1f} KB, net {self.net_kb:,.1f} KB",
+            "",
+            f"{'stage':<22}{'peak KB':>12}{'net KB':>12}",
+        ]
+        for record in self.stages:
+            lines.append(f"{record['stage']:<22}{record['peak_kb']:>12,.1f}{record['net_kb']:>12,.1f}")
+            for line in record["top"]:
+                lines.append(f"    {line['kb']:>10,.1f} KB {line['blocks']:>6} blocks  {line['line']}")
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def trace_memory(top=10):
+    """Trace the stages of the request run inside the block; yields its MemoryReport."""
+    with _trace_lock:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        report = MemoryReport(top)
+        report.start()
+        _local.report = report
+        try:
+            yield report
+        finally:
+            _local.report = None
+            report.finish()
+            if not was_tracing:
+                tracemalloc.stop()
+
+
+def stage(name):
+    """Start stage name of the traced request on this thread; a no-op otherwise."""
+    report = getattr(_local, "report", None)
+    if report is not None:
+        report.mark(name)
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutoPremium',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=2)),
+                ('year', models.SmallIntegerField()),
+                ('avg_premium', models.FloatField(null=True)),
+                ('source_row', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'year'], name='dashboard_a_state_9947db_idx'), models.Index(fields=['year'], name='dashboard_a_year_8be85f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FemaDeclaration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=2)),
+                ('incident_type', models.CharField(max_length=64, null=True)),
+                ('incident_group', models.CharField(max_length=16, null=True)),
+                ('declaration_date', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'incident_group'], name='dashboard_f_state_d669c3_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HomePremium',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=2)),
+                ('year', models.SmallIntegerField(null=True)),
+                ('avg_annual_usd', models.FloatField(null=True)),
+                ('avg_monthly_usd', models.FloatField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'year'], name='dashboard_h_state_dc3c8e_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NoaaStateYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=2)),
+                ('year', models.SmallIntegerField(null=True)),
+                ('metric', models.CharField(max_length=32)),
+                ('position', models.SmallIntegerField()),
+                ('total', models.FloatField()),
+                ('n', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'year'], name='dashboard_n_state_b59db7_idx')],
+            },
+        ),
+    ]
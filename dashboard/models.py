@@ -1,3 +1,66 @@
 from django.db import models
 
-# Create your models here.
+
+# Tables filled from the clean CSVs by `python manage.py load_dashboard_data`.
+# They hold what the dashboard queries, so each request only reads the rows
+# and aggregates it needs instead of parsing every file.
+
+
+class AutoPremium(models.Model):
+    """One NAIC row and year of clean_naic_auto_insurance.csv."""
+
+    state = models.CharField(max_length=2)
+    year = models.SmallIntegerField()
+    avg_premium = models.FloatField(null=True)
+    # position of the row in the clean file; a state can appear in more
+    # than one NAIC table and the trend chart uses its first row
+    source_row = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["state", "year"]),
+            models.Index(fields=["year"]),
+        ]
+
+
+class HomePremium(models.Model):
+    """One row of clean_nerdwallet_home.csv."""
+
+    state = models.CharField(max_length=2)
+    year = models.SmallIntegerField(null=True)
+    avg_annual_usd = models.FloatField(null=True)
+    avg_monthly_usd = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["state", "year"])]
+
+
+class FemaDeclaration(models.Model):
+    """One row of clean_fema_weather.csv, with its incident group."""
+
+    state = models.CharField(max_length=2)
+    incident_type = models.CharField(max_length=64, null=True)
+    # utils.incidents.incident_group; null when incident_type is missing
+    incident_group = models.CharField(max_length=16, null=True)
+    declaration_date = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["state", "incident_group"])]
+
+
+class NoaaStateYear(models.Model):
+    """
+    Sum and count of one numeric NOAA column for a state and year, so
+    state, year and national means are exact regroupings of these rows.
+    """
+
+    state = models.CharField(max_length=2)
+    year = models.SmallIntegerField(null=True)
+    metric = models.CharField(max_length=32)
+    # column order in the clean file; the trend chart plots the first one
+    position = models.SmallIntegerField()
+    total = models.FloatField()
+    n = models.IntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["state", "year"])]
@@ -0,0 +1,197 @@
+# dashboard/prerender.py
+#
+# Static copies of every dashboard page, so a reverse proxy can answer most
+# requests without Python (see README):
+#
+#   <out>/Auto/2022/TX.html   the page for ?insurance=Auto&year=2022&state=TX
+#   <out>/Auto/2022/TX.json   its figures as plotly JSON, risk score and table
+#   <out>/Home/TX.html        Home pages have no year
+#   <out>/index.json          data version and input digest of every page
+#
+# A page's digest covers the summary rows it is built from (premiums of its
+# insurance type, FEMA and NOAA tables), the code and template that render
+# it, and the data version, which every page embeds in its panel JSON and
+# bundle URL. Pages whose digest is unchanged since the last run are
+# skipped, so re-running after a failed or --gzip run only renders what is
+# missing.
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from dashboard.cache import data_version, page_params, setup_worker
+from utils import manifest, summaries, versions
+
+INDEX_FILE = "index.json"
+
+
+def prerender_dir():
+    return settings.DASHBOARD_PRERENDER_DIR
+
+
+def page_path(params):
+    """Path of a page relative to the output folder, without extension."""
+    if params["insurance"] == "Auto":
+        return os.path.join("Auto", params["year"], params["state"])
+    return os.path.join(params["insurance"], params["state"])
+
+
+# ---------------------------------------------------
+# Input digests
+# ---------------------------------------------------
+def _frame_digest(df):
+    return hashlib.sha256(df.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+def code_digest():
+    """The view and every module it renders with, plus the template; a change re-renders everything."""
+    from dashboard import cache, charts, data, trends, views
+    from utils import incidents
+
+    template = os.path.join(settings.BASE_DIR, "dashboard", "home.html")
+    with open(template, "rb") as f:
+        template_hash = hashlib.sha256(f.read()).hexdigest()
+    return manifest.code_version(views, data, charts, trends, cache, incidents) + template_hash[:16]
+
+
+def insurance_digests(data_dir, version="-"):
+    """{insurance: digest of every summary row its pages read}; {} without summaries."""
+    paths = summaries.summary_paths(data_dir)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return {}
+
+    tables = {name: summaries.read_summary(name, path) for name, path in paths.items()}
+    shared = "".join(
+        _frame_digest(tables[name]) for name in ("fema_counts", "fema_groups", "noaa_state_year")
+    )
+    code = code_digest() + version
+    premiums = tables["premiums"]
+    return {
+        insurance.capitalize(): hashlib.sha256(
+            (code + shared + _frame_digest(premiums[premiums["insurance"] == insurance])).encode()
+        ).hexdigest()
+        for insurance in ("auto", "home")
+    }
+
+
+# ---------------------------------------------------
+# Rendering
+# ---------------------------------------------------
+def _write(path, content, compress):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".part", "wb") as f:
+        f.write(content)
+    os.replace(path + ".part", path)
+    if compress:
+        with open(path + ".gz.part", "wb") as f:
+            f.write(gzip.compress(content, 6))
+        os.replace(path + ".gz.part", path + ".gz")
+
+
+def render_page(params, out_dir, compress=False):
+    """Render one page and its panel JSON into out_dir. Top level for the process pool."""
+    from plotly.utils import PlotlyJSONEncoder
+
+    from dashboard.views import build_dashboard
+
+    start = time.perf_counter()
+    page = build_dashboard(params)
+    context = page["context"]
+    html = render_to_string("home.html", context).encode("utf-8")
+
+    panels = {
+        "params": {
+            "insurance": context["selected_insurance"],
+            "year": context["selected_year"],
+            "state": context["selected_state"],
+        },
+        "data_version": data_version(),
+        "risk_score": context["risk_score"],
+        "panels": page["figures"],
+        "table": page["table"].to_dict(orient="records"),
+    }
+    body = json.dumps(panels, cls=PlotlyJSONEncoder).encode("utf-8")
+
+    base = os.path.join(out_dir, page_path(params))
+    _write(base + ".html", html, compress)
+    _write(base + ".json", body, compress)
+    return {
+        "path": page_path(params),
+        "bytes": len(html) + len(body),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _load_index(out_dir):
+    try:
+        with open(os.path.join(out_dir, INDEX_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"pages": {}}
+
+
+def _remove_page(out_dir, rel):
+    for ext in (".html", ".json", ".html.gz", ".json.gz"):
+        try:
+            os.remove(os.path.join(out_dir, rel + ext))
+        except FileNotFoundError:
+            pass
+
+
+def prerender_pages(out_dir=None, parallel=None, force=False, compress=False):
+    """
+    Render every page whose inputs changed since the last run (all with
+    force) on a process pool, and delete pages that no longer exist.
+    Returns {"rendered": [render_page() results], "skipped": n, "removed": n}.
+    """
+    from django.db import connections
+
+    out_dir = out_dir or prerender_dir()
+    index = _load_index(out_dir)
+    version = data_version()
+    digests = insurance_digests(versions.current_dir(settings.DASHBOARD_DATA_DIR), version)
+
+    pages = {page_path(params): params for params in page_params()}
+    todo = []
+    new_index = {}
+    for rel, params in pages.items():
+        digest = digests.get(params["insurance"])
+        new_index[rel] = digest
+        up_to_date = (
+            not force
+            and digest is not None
+            and index["pages"].get(rel) == digest
+            and os.path.exists(os.path.join(out_dir, rel + ".html"))
+            and (not compress or os.path.exists(os.path.join(out_dir, rel + ".html.gz")))
+        )
+        if not up_to_date:
+            todo.append(params)
+
+    parallel = min(parallel or os.cpu_count() or 1, max(len(todo), 1))
+    if parallel <= 1:
+        rendered = [render_page(params, out_dir, compress) for params in todo]
+    else:
+        # forked workers must open their own database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=parallel, initializer=setup_worker) as pool:
+            rendered = list(
+                pool.map(render_page, todo, [out_dir] * len(todo), [compress] * len(todo))
+            )
+
+    removed = [rel for rel in index["pages"] if rel not in pages]
+    for rel in removed:
+        _remove_page(out_dir, rel)
+
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_path = os.path.join(out_dir, INDEX_FILE + ".part")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"data_version": version, "pages": new_index}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(out_dir, INDEX_FILE))
+
+    return {"rendered": rendered, "skipped": len(pages) - len(todo), "removed": len(removed)}
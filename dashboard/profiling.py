@@ -0,0 +1,210 @@
+# dashboard/profiling.py
+#
+# Opt-in profiles of single requests, for slow pages that do not reproduce
+# with a profiler attached. Two ways to capture one:
+#
+#   on demand   add ?profile=cprofile (or sample, or memory) to any URL.
+#               Only honoured with DEBUG on or for staff users.
+#   slow        with DASHBOARD_PROFILE_SLOW_MS set, every request is sampled
+#               and the profile kept when it took longer than that.
+#
+# cProfile runs are written as .pstats (python -m pstats, snakeviz). The
+# sampler records the request thread's stack every few milliseconds and
+# writes .folded files, one "frame;frame;frame count" line per stack, which
+# flamegraph.pl, inferno and speedscope read directly. Files go to
+# DASHBOARD_PROFILE_DIR, keeping only the newest DASHBOARD_PROFILE_KEEP, and
+# the response names its file in an X-Profile header. ?profile=memory writes
+# a .memory.txt report of tracemalloc peak / net allocations per stage of
+# the view, with the top allocating lines (dashboard/memory.py). Profiled
+# requests bypass the page cache, so they always measure a render.
+#
+# With neither DASHBOARD_PROFILE nor DASHBOARD_PROFILE_SLOW_MS set, the
+# middleware removes itself at startup and costs nothing.
+
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from dashboard.memory import trace_memory
+
+PROFILE_PARAM = "profile"
+MODES = ("cprofile", "sample", "memory")
+
+# allocating lines listed per stage in memory reports
+MEMORY_TOP_LINES = 10
+
+
+# ---------------------------------------------------
+# Stack sampler
+# ---------------------------------------------------
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold(frame):
+    """The stack ending at frame as one root-first "a;b;c" line."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler(threading.Thread):
+    """
+    One background thread sampling the stacks of the threads currently
+    registered with track(). Sleeps while no request is being sampled.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stacks = {}  # thread id: Counter of folded stacks
+        self.active = threading.Event()
+
+    def track(self, ident):
+        with self.lock:
+            self.stacks[ident] = Counter()
+            self.active.set()
+
+    def untrack(self, ident):
+        with self.lock:
+            stacks = self.stacks.pop(ident, Counter())
+            if not self.stacks:
+                self.active.clear()
+        return stacks
+
+    def run(self):
+        while True:
+            self.active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, stacks in self.stacks.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[fold(frame)] += 1
+            del frames
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = Sampler(settings.DASHBOARD_PROFILE_INTERVAL_MS / 1000)
+            _sampler.start()
+    return _sampler
+
+
+# ---------------------------------------------------
+# Output
+# ---------------------------------------------------
+def profile_dir():
+    return settings.DASHBOARD_PROFILE_DIR
+
+
+def profile_path(request, elapsed_ms, ext):
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.get_full_path()).strip("_")[:80] or "root"
+    return os.path.join(profile_dir(), f"{stamp}-{elapsed_ms:.0f}ms-{slug}.{ext}")
+
+
+def write_folded(path, stacks):
+    tmp_path = path + ".part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp_path, path)
+
+
+def rotate(keep):
+    """Delete all but the newest keep profiles; names start with their timestamp."""
+    try:
+        names = sorted(name for name in os.listdir(profile_dir()) if not name.endswith(".part"))
+    except FileNotFoundError:
+        return
+    for name in names[:-keep] if keep else names:
+        try:
+            os.remove(os.path.join(profile_dir(), name))
+        except FileNotFoundError:
+            pass
+
+
+# ---------------------------------------------------
+# Middleware
+# ---------------------------------------------------
+class ProfileMiddleware:
+    """Writes a profile of requests asked for with ?profile= or slower than the threshold."""
+
+    def __init__(self, get_response):
+        if not settings.DASHBOARD_PROFILE and settings.DASHBOARD_PROFILE_SLOW_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.on_demand = settings.DASHBOARD_PROFILE
+        self.slow_ms = settings.DASHBOARD_PROFILE_SLOW_MS
+
+    def requested_mode(self, request):
+        """The mode this request asks for, if it may have a profile, else None."""
+        mode = request.GET.get(PROFILE_PARAM) if self.on_demand else None
+        if mode is None:
+            return None
+        mode = mode if mode in MODES else MODES[0]
+        if settings.DEBUG:
+            return mode
+        user = getattr(request, "user", None)
+        return mode if user is not None and user.is_staff else None
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        # the page cache serves profiled requests from the view (cache.profiled)
+        request.profile_mode = mode
+        if mode is None and self.slow_ms is None:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self.get_response, request)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            path = profile_path(request, elapsed_ms, "pstats")
+            os.makedirs(profile_dir(), exist_ok=True)
+            profiler.dump_stats(path)
+        elif mode == "memory":
+            with trace_memory(MEMORY_TOP_LINES) as report:
+                response = self.get_response(request)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            path = profile_path(request, elapsed_ms, "memory.txt")
+            os.makedirs(profile_dir(), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(report.format())
+        else:
+            sampler = get_sampler()
+            ident = threading.get_ident()
+            sampler.track(ident)
+            try:
+                response = self.get_response(request)
+            finally:
+                stacks = sampler.untrack(ident)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if mode is None and elapsed_ms < self.slow_ms:
+                return response
+            path = profile_path(request, elapsed_ms, "folded")
+            os.makedirs(profile_dir(), exist_ok=True)
+            write_folded(path, stacks)
+
+        rotate(settings.DASHBOARD_PROFILE_KEEP)
+        response["X-Profile"] = os.path.basename(path)
+        return response
@@ -1,3 +1,1311 @@
-from django.test import TestCase
+import io
+import json
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from dashboard.analytics import bootstrap_intervals, pair_stats
+from dashboard.memory import stage, trace_memory
+from dashboard.profiling import ProfileMiddleware
+from dashboard.trends import fit_trends
+from utils import manifest, schemas, versions
+from utils.checkpoint_store import SQLiteCheckpointStore
+from utils.state_mapping import normalize_state, normalize_state_series
+from utils.time_normalization import normalize_year, normalize_year_series
+from utils.value_normalization import normalize_dollar, normalize_dollar_series
+from utils.fetch_engine import FetchEngine, year_batches
+from utils.weather_classification import (
+    COUNT_COLUMNS,
+    PRECIP_THRESHOLD_MM,
+    WIND_MAX_THRESHOLD_MS,
+    classify_days,
+    count_bad_weather_days,
+)
+
+# What every manage.py command, migration and test run pays before doing any
+# work: Django setup plus the URLconf the system checks load.
+STARTUP_SCRIPT = (
+    "import os, django\n"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')\n"
+    "django.setup()\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+# Imports that only rendering the dashboard should pay for
+HEAVY_MODULES = ["pandas", "numpy", "plotly"]
+
+# Django alone takes roughly half of this; pandas and plotly.express would
+# add more than the rest. Override on slow machines with IMPORT_BUDGET_MS.
+STARTUP_BUDGET_MS = int(os.environ.get("IMPORT_BUDGET_MS", 1000))
+
+
+def import_time_report(script):
+    """Run script under `python -X importtime`; returns [(module, self_us, cumulative_us)]."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class StartupImportTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = import_time_report(STARTUP_SCRIPT)
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        loaded = sorted({
+            name.split(".")[0] for name, _, _ in self.report
+            if name.split(".")[0] in HEAVY_MODULES
+        })
+        self.assertEqual(loaded, [], "imported at startup, defer them to first use")
+
+    def test_startup_imports_fit_the_budget(self):
+        total_ms = sum(self_us for _, self_us, _ in self.report) / 1000
+        slowest = sorted(self.report, key=lambda row: row[1], reverse=True)[:5]
+        self.assertLess(
+            total_ms,
+            STARTUP_BUDGET_MS,
+            "slowest imports: " + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us, _ in slowest),
+        )
+
+
+def slow_view(request):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return HttpResponse("ok")
+
+
+class ProfileMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.factory = RequestFactory()
+
+    def settings_for(self, **overrides):
+        values = {
+            "DASHBOARD_PROFILE": True,
+            "DASHBOARD_PROFILE_SLOW_MS": None,
+            "DASHBOARD_PROFILE_INTERVAL_MS": 1,
+            "DASHBOARD_PROFILE_DIR": self.tmp.name,
+            "DASHBOARD_PROFILE_KEEP": 50,
+            "DEBUG": True,
+        }
+        values.update(overrides)
+        return override_settings(**values)
+
+    def get(self, path, view=slow_view):
+        request = self.factory.get(path)
+        request.user = AnonymousUser()
+        return ProfileMiddleware(view)(request)
+
+    def test_disabled_middleware_unloads_itself(self):
+        with self.settings_for(DASHBOARD_PROFILE=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfileMiddleware(slow_view)
+
+    def test_on_demand_cprofile_writes_pstats(self):
+        with self.settings_for():
+            response = self.get("/?profile=cprofile")
+        self.assertTrue(response["X-Profile"].endswith(".pstats"))
+        stats = pstats.Stats(os.path.join(self.tmp.name, response["X-Profile"]))
+        self.assertTrue(any(func[2] == "slow_view" for func in stats.stats))
+
+    def test_on_demand_needs_debug_or_staff(self):
+        with self.settings_for(DEBUG=False):
+            response = self.get("/?profile=cprofile")
+        self.assertFalse(response.has_header("X-Profile"))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_slow_requests_keep_a_folded_sample(self):
+        with self.settings_for(DASHBOARD_PROFILE=False, DASHBOARD_PROFILE_SLOW_MS=20):
+            fast = self.get("/", view=lambda request: HttpResponse("ok"))
+            slow = self.get("/")
+        self.assertFalse(fast.has_header("X-Profile"))
+        with open(os.path.join(self.tmp.name, slow["X-Profile"]), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any("slow_view" in line.rsplit(" ", 1)[0] for line in lines))
+
+    def test_old_profiles_are_rotated_out(self):
+        with self.settings_for(DASHBOARD_PROFILE_KEEP=2):
+            names = [self.get(f"/?profile=sample&n={i}")["X-Profile"] for i in range(4)]
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), names[2:])
+
+
+class MemoryReportTests(SimpleTestCase):
+    def test_stages_record_peak_net_and_top_lines(self):
+        with trace_memory(top=3) as report:
+            stage("transient")
+            block = bytearray(4 << 20)
+            del block
+            stage("kept")
+            kept = [bytearray(1 << 20) for _ in range(2)]
+        stages = {record["stage"]: record for record in report.stages}
+
+        self.assertEqual(list(stages), ["transient", "kept"])
+        self.assertGreater(stages["transient"]["peak_kb"], 4000)
+        self.assertLess(stages["transient"]["net_kb"], 100)
+        self.assertGreater(stages["kept"]["net_kb"], 2000)
+        self.assertTrue(stages["kept"]["top"][0]["line"].startswith("dashboard/tests.py:"))
+        self.assertGreater(report.peak_kb, 4000)
+        self.assertEqual(len(kept), 2)
+
+    def test_stage_is_a_no_op_without_tracing(self):
+        stage("untraced")
+
+
+class TrendFitTests(SimpleTestCase):
+    YEARS = [2018, 2019, 2020, 2021, 2022]
+
+    def test_batched_fit_matches_per_state_fits(self):
+        rng = np.random.default_rng(0)
+        premiums = rng.uniform(800, 2000, (6, 1)) * np.cumprod(rng.uniform(0.95, 1.1, (6, 5)), axis=1)
+        premiums[1, 2] = np.nan
+        premiums[2, :3] = np.nan
+        fit = fit_trends(self.YEARS, premiums)
+
+        t = np.arange(5.0)
+        for row, values in enumerate(premiums):
+            observed = np.isfinite(values)
+            slope = np.polyfit(t[observed], values[observed], 1)[0]
+            log_slope, log_intercept = np.polyfit(t[observed], np.log(values[observed]), 1)
+            self.assertAlmostEqual(fit["slope"][row], slope)
+            self.assertAlmostEqual(fit["growth"][row], np.expm1(log_slope))
+            self.assertAlmostEqual(fit["projected"][row, 0], np.exp(log_intercept + log_slope * 5), places=6)
+        self.assertEqual(list(fit["years"]), [5, 4, 2, 5, 5, 5])
+        self.assertTrue(np.isnan(fit["volatility"][2]))
+
+    def test_exact_growth_and_short_rows(self):
+        premiums = np.array([
+            [1000 * 1.05 ** i for i in range(5)],
+            [np.nan, np.nan, np.nan, np.nan, 1200.0],
+        ])
+        fit = fit_trends(self.YEARS, premiums, horizon=1)
+        self.assertAlmostEqual(fit["cagr"][0], 0.05)
+        self.assertAlmostEqual(fit["growth"][0], 0.05)
+        self.assertAlmostEqual(fit["volatility"][0], 0.0)
+        self.assertAlmostEqual(fit["projected"][0, 0], 1000 * 1.05 ** 5)
+        for name in ("cagr", "growth", "slope", "volatility"):
+            self.assertTrue(np.isnan(fit[name][1]))
+
+
+class PairStatsTests(SimpleTestCase):
+    def test_pairs_match_pairwise_complete_fits(self):
+        rng = np.random.default_rng(1)
+        X = rng.normal(1000, 200, (12, 3))
+        X[:, 1] += 0.5 * X[:, 0]
+        X[[2, 7], 2] = np.nan
+        n, r, slope, intercept = pair_stats(X)
+
+        self.assertEqual(n[0, 1], 12)
+        self.assertEqual(n[0, 2], 10)
+        for i, j in [(0, 1), (1, 0), (0, 2), (2, 1)]:
+            both = np.isfinite(X[:, i]) & np.isfinite(X[:, j])
+            x, y = X[both, j], X[both, i]
+            expected_slope, expected_intercept = np.polyfit(x, y, 1)
+            self.assertAlmostEqual(r[i, j], np.corrcoef(x, y)[0, 1])
+            self.assertAlmostEqual(slope[i, j], expected_slope)
+            self.assertAlmostEqual(intercept[i, j], expected_intercept, places=6)
+
+    def test_too_few_states_and_bootstrap_intervals(self):
+        X = np.array([[1.0, 2.0], [2.0, np.nan], [3.0, np.nan], [4.0, 8.0]])
+        n, r, _, _ = pair_stats(X)
+        self.assertEqual(n[0, 1], 2)
+        self.assertTrue(np.isnan(r[0, 1]))
+
+        rng = np.random.default_rng(2)
+        x = rng.normal(size=40)
+        X = np.column_stack([x, 3 * x + rng.normal(scale=0.1, size=40)])
+        intervals = bootstrap_intervals(X, samples=200)
+        low, high = intervals["slope"][0][1, 0], intervals["slope"][1][1, 0]
+        self.assertLess(low, 3.0)
+        self.assertGreater(high, 3.0)
+        self.assertGreater(intervals["r"][0][0, 1], 0.99)
+
+
+class CheckpointStoreTests(SimpleTestCase):
+    def test_resume_and_upsert(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "fetch.sqlite3")
+            key = ("openmeteo", "TX", "2020-01-01")
+            with SQLiteCheckpointStore(path, batch_size=1) as store:
+                store.save(key, {"v": 1}, [
+                    ("TX", "2020-01-01", 1.0, 5.0, {}),
+                    ("TX", "2020-01-02", 0.0, 2.0, {}),
+                ])
+                # saved again after the first one was flushed: replaces it
+                store.save(key, {"v": 2}, [("TX", "2020-01-01", 9.0, 5.0, {})])
+                self.assertFalse(store.is_done(("openmeteo", "TX", "2021-01-01")))
+
+            with SQLiteCheckpointStore(path) as store:
+                self.assertTrue(store.is_done(key))
+                self.assertTrue(store.is_done(list(key)))
+                self.assertEqual(list(store.results("openmeteo")), [(key, {"v": 2})])
+                daily = store.daily_frame("openmeteo", states=["TX"])
+                self.assertEqual(list(daily["date"]), ["2020-01-01", "2020-01-02"])
+                self.assertEqual(list(daily["precip_total"]), [9.0, 0.0])
+                self.assertTrue(store.daily_frame("openmeteo", states=["CA"]).empty)
+
+
+class WeatherClassificationTests(SimpleTestCase):
+    # (date, precip_total, wind_max): thresholds exactly, just under, NaN
+    DAYS = [
+        ("2019-12-31", PRECIP_THRESHOLD_MM, 0.0),
+        ("2020-01-01", 0.09, WIND_MAX_THRESHOLD_MS),
+        ("2020-01-02", np.nan, 13.39),
+        ("2020-01-03", 5.0, np.nan),
+        ("2020-01-04", np.nan, np.nan),
+        ("2020-01-05", 2.0, 20.0),
+    ]
+
+    @staticmethod
+    def archived_rule(precip, wind):
+        """classify_weather of the archived extractor; get_numeric reads missing as 0.0."""
+        precip = 0.0 if np.isnan(precip) else precip
+        wind = 0.0 if np.isnan(wind) else wind
+        precip_bad = precip >= PRECIP_THRESHOLD_MM
+        wind_bad = wind >= WIND_MAX_THRESHOLD_MS
+        return precip_bad, wind_bad, precip_bad or wind_bad
+
+    def test_matches_the_archived_rule(self):
+        _, precip, wind = zip(*self.DAYS)
+        batched = classify_days(precip, wind)
+        for i, day in enumerate(self.DAYS):
+            expected = self.archived_rule(day[1], day[2])
+            self.assertEqual(tuple(bool(flags[i]) for flags in batched), expected, day)
+
+    def test_counts_per_state_and_year(self):
+        import pandas as pd
+
+        daily = pd.DataFrame(self.DAYS, columns=["date", "precip_total", "wind_max"])
+        daily.insert(0, "state", "TX")
+        counts = count_bad_weather_days(daily).set_index("year")
+        self.assertEqual(counts.loc[2019, "bad_days_total"], 1)
+        self.assertEqual(counts.loc[2020, COUNT_COLUMNS].tolist(), [5, 3, 2, 2, 1])
+
+
+class NormalizerTests(SimpleTestCase):
+    NORMALIZERS = [
+        (normalize_state, normalize_state_series),
+        (normalize_year, normalize_year_series),
+        (normalize_dollar, normalize_dollar_series),
+    ]
+    TEXT = [
+        "$1,200.50", " 2019-01-01T00:00:00Z ", "2019.0", "Texas", " tx ", "D.C.",
+        "inf", "nan", "1_000", "", "abc", None, np.nan, "١٢٣٤",
+    ]
+
+    def columns(self):
+        import pandas as pd
+
+        return {
+            "object": pd.Series(self.TEXT, dtype=object),
+            "only missing": pd.Series([None, "", "abc"], dtype=object),
+            "string": pd.Series(["$12", " 2020 ", None, "Ohio"], dtype="string"),
+            "float": pd.Series([2019.0, np.nan, 1200.5]),
+            "int": pd.Series([2019, 2020]),
+            "empty": pd.Series([], dtype=object),
+        }
+
+    def test_series_versions_match_apply(self):
+        import pandas as pd
+
+        for name, series in self.columns().items():
+            for scalar, vectorized in self.NORMALIZERS:
+                with self.subTest(column=name, normalizer=scalar.__name__):
+                    pd.testing.assert_series_equal(vectorized(series), series.apply(scalar))
+
+    def test_categorical_dollars_are_floats_with_nan(self):
+        import pandas as pd
+
+        for values in (["abc", ""], ["abc", None], ["$1,200", "", None], ["1", "2"]):
+            series = pd.Series(values, dtype="category")
+            expected = series.astype(object).apply(normalize_dollar).astype("float64")
+            pd.testing.assert_series_equal(normalize_dollar_series(series), expected)
+
+
+class ManifestTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.raw = os.path.join(tmp.name, "raw.csv")
+        self.clean = os.path.join(tmp.name, "clean.csv")
+        for path in (self.raw, self.clean):
+            with open(path, "w") as f:
+                f.write("state,year\nTX,2019\n")
+        self.inputs, self.outputs = {"raw.csv": self.raw}, {"clean.csv": self.clean}
+        self.entry = manifest.make_entry(
+            "v1",
+            {"raw.csv": manifest.fingerprint(self.raw)},
+            {"clean.csv": manifest.fingerprint(self.clean, rows=1)},
+        )
+
+    def up_to_date(self, version="v1"):
+        return manifest.is_up_to_date(self.entry, self.inputs, self.outputs, version)
+
+    def touch(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_skips_when_fingerprint_and_code_match(self):
+        self.assertTrue(self.up_to_date())
+        # a new mtime alone is re-hashed, and the content is the same
+        self.touch(self.raw)
+        self.assertTrue(self.up_to_date())
+
+    def test_reruns_when_code_changes(self):
+        self.assertFalse(self.up_to_date("v2"))
+        self.assertFalse(manifest.is_up_to_date(None, self.inputs, self.outputs, "v1"))
+
+    def test_reruns_when_input_changes(self):
+        # same size, new content
+        with open(self.raw, "w") as f:
+            f.write("state,year\nOH,2019\n")
+        self.touch(self.raw)
+        self.assertFalse(self.up_to_date())
+
+    def test_reruns_when_output_is_gone(self):
+        os.remove(self.clean)
+        self.assertFalse(self.up_to_date())
+
+    def test_code_version_follows_the_source(self):
+        self.assertEqual(manifest.code_version(fit_trends), manifest.code_version(fit_trends))
+        self.assertNotEqual(manifest.code_version(fit_trends), manifest.code_version(pair_stats))
+
+
+class ChunkedCleaningTests(SimpleTestCase):
+    def test_chunked_output_equals_whole_file_output(self):
+        import clean_all_data
+        from benchmarks import synthetic
+
+        blocks = {"fema": synthetic.fema_block, "noaa": synthetic.noaa_block}
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+            for name, block in blocks.items():
+                raw = synthetic.write_csv(os.path.join(tmp, f"{name}.csv"), block, 500, seed=3)
+                whole = os.path.join(tmp, f"{name}_whole.csv")
+                chunked = os.path.join(tmp, f"{name}_chunked.csv")
+                clean = getattr(clean_all_data, f"clean_{name}")
+                whole_result = clean(raw, whole)
+                # an odd chunk size, so chunks split years and states unevenly
+                chunked_result = clean(raw, chunked, chunksize=37)
+
+                with self.subTest(dataset=name):
+                    with open(whole, "rb") as a, open(chunked, "rb") as b:
+                        self.assertEqual(a.read(), b.read())
+                    self.assertEqual(whole_result["rows_out"], chunked_result["rows_out"])
+                    self.assertEqual(chunked_result["rows_in"], 500)
+                    self.assertLess(chunked_result["rows_out"], 500)
+
+    def test_empty_input_gets_the_normalized_header(self):
+        import clean_all_data
+
+        headers = {
+            "fema": "femaDeclarationString,state,declarationDate,incidentType\n",
+            "noaa": "EVENT_ID,state,year,precip\n",
+        }
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+            for name, header in headers.items():
+                raw = os.path.join(tmp, f"{name}.csv")
+                with open(raw, "w") as f:
+                    f.write(header)
+                clean = getattr(clean_all_data, f"clean_{name}")
+                clean(raw, raw + ".whole")
+                result = clean(raw, raw + ".chunked", chunksize=10)
+
+                with self.subTest(dataset=name):
+                    with open(raw + ".whole") as a, open(raw + ".chunked") as b:
+                        self.assertEqual(a.read(), b.read())
+                    self.assertEqual((result["rows_in"], result["rows_out"]), (0, 0))
+
+    def test_normalized_columns_reach_the_empty_header(self):
+        import clean_all_data
+
+        def normalize(df):
+            return df.assign(extra=1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            raw = os.path.join(tmp, "noaa.csv")
+            with open(raw, "w") as f:
+                f.write("state,year\n")
+            clean_all_data.clean_in_chunks("noaa", raw, raw + ".clean", normalize, 10)
+            with open(raw + ".clean") as f:
+                self.assertEqual(f.read(), "state,year,extra\n")
+
+
+class SchemaReadTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "clean_fema_weather.csv")
+        with open(self.path, "w") as f:
+            f.write("incidentType,foo\nFlood,1\n")
+
+    def test_missing_required_columns_raise(self):
+        with self.assertRaises(schemas.SchemaError):
+            schemas.read_dataset("fema", "clean", self.path)
+
+    def test_empty_fallback_keeps_required_and_requested_columns(self):
+        frame = schemas.read_dataset(
+            "fema", "clean", self.path, usecols=["state", "incidentType", "year"], missing="empty"
+        )
+        self.assertTrue(frame.empty)
+        self.assertEqual(list(frame.columns), ["state", "incidentType", "year"])
+        self.assertEqual(str(frame["year"].dtype), "Int64")
+
+        (chunk,) = schemas.read_dataset("fema", "clean", self.path, chunksize=10, missing="empty")
+        self.assertEqual(list(chunk.columns), ["state", "incidentType", "foo"])
+
+
+class LoadAutoTests(TestCase):
+    def load(self, text):
+        from dashboard.management.commands.load_dashboard_data import load_auto
+        from dashboard.models import AutoPremium
+        from utils.summaries import CLEAN_FILES
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, CLEAN_FILES["naic"]), "w") as f:
+                f.write(text)
+            rows = load_auto(tmp, 100)
+        return rows, AutoPremium.objects.order_by("year")
+
+    def test_file_without_state_loads_nothing(self):
+        rows, objects = self.load("foo,avg_2019\n1,2\n")
+        self.assertEqual(rows, 0)
+        self.assertFalse(objects.exists())
+
+    def test_missing_year_columns_load_as_null(self):
+        rows, objects = self.load("state,avg_2019\nTX,1500.5\n")
+        self.assertEqual(rows, 5)
+        self.assertEqual(
+            [(o.year, o.avg_premium) for o in objects],
+            [(2018, None), (2019, 1500.5), (2020, None), (2021, None), (2022, None)],
+        )
+
+
+class LoadDashboardDataTests(TestCase):
+    def test_reload_clears_pages_and_memos(self):
+        from dashboard import cache
+
+        from utils.summaries import CLEAN_FILES
+
+        root = isolated_data_root(self)
+        # header-only files load as empty tables
+        for filename in CLEAN_FILES.values():
+            with open(os.path.join(root, filename), "w") as f:
+                f.write("unused\n")
+        cache.page_cache().set("home:v1:page", {"body": b"", "content_type": "text/html"})
+        cache._VERSION_MEMO["tables"] = (("v1", "db"), "old rows")
+
+        call_command("load_dashboard_data", data_dir=root, stdout=io.StringIO())
+        self.assertIsNone(cache.page_cache().get("home:v1:page"))
+        self.assertEqual(cache._VERSION_MEMO, {})
+
+
+class FemaSummaryTests(SimpleTestCase):
+    def summarize(self, text):
+        from utils.summaries import summarize_fema
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clean_fema_weather.csv")
+            with open(path, "w") as f:
+                f.write(text)
+            return summarize_fema(path, chunksize=1)
+
+    def test_file_without_state_summarizes_to_nothing(self):
+        counts, groups = self.summarize("incidentType,foo\nFlood,1\n")
+        self.assertTrue(counts.empty)
+        self.assertTrue(groups.empty)
+        self.assertEqual(list(groups.columns), ["state", "incident_group", "count"])
+
+    def test_file_without_incident_types_still_counts(self):
+        counts, groups = self.summarize("state,foo\nTX,1\nTX,2\nOH,3\n")
+        self.assertEqual(counts.to_dict("records"), [
+            {"state": "OH", "disaster_count": 1},
+            {"state": "TX", "disaster_count": 2},
+        ])
+        self.assertTrue(groups["incident_group"].isna().all())
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers /<name> with the next response scripted for name in
+    server.script: (status, headers, body) tuples, the last one repeating.
+    """
+
+    def do_GET(self):
+        name = self.path.split("?")[0].strip("/")
+        with self.server.lock:
+            self.server.hits[name] = self.server.hits.get(name, 0) + 1
+            self.server.headers.append((name, dict(self.headers)))
+            responses = self.server.script[name]
+            status, headers, body = responses[min(self.server.hits[name], len(responses)) - 1]
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+OK = (200, {"Content-Type": "application/json"}, b'{"daily": {"time": ["2020-01-01"]}}')
+
+
+class FetchEngineStubServerTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.lock = threading.Lock()
+        self.server.hits = {}
+        self.server.headers = []
+        self.server.script = {}
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.checkpoint_path = os.path.join(self.tmp.name, "fetch.sqlite3")
+
+    def run_engine(self, names, **kwargs):
+        tasks = [
+            {"key": ("stub", name, "2020-01-01"), "url": f"http://127.0.0.1:{self.server.server_port}/{name}"}
+            for name in names
+        ]
+        with SQLiteCheckpointStore(self.checkpoint_path) as store, redirect_stdout(io.StringIO()):
+            engine = FetchEngine(store, rate=100, concurrency=1, retry_delay=0.01, **kwargs)
+            return engine.run(tasks)
+
+    def test_429_honours_retry_after_then_succeeds(self):
+        self.server.script["limited"] = [(429, {"Retry-After": "0.3"}, b""), OK]
+        start = time.monotonic()
+        counts = self.run_engine(["limited"])
+        self.assertEqual(counts["fetched"], 1)
+        self.assertEqual(self.server.hits["limited"], 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+    def test_5xx_is_retried_until_retries_run_out(self):
+        self.server.script["flaky"] = [(503, {}, b""), (500, {}, b""), OK]
+        self.server.script["down"] = [(502, {}, b"")]
+        self.assertEqual(self.run_engine(["flaky"])["fetched"], 1)
+        self.assertEqual(self.server.hits["flaky"], 3)
+
+        counts = self.run_engine(["down"], max_retries=2)
+        self.assertEqual(counts["stopped"], 1)
+        self.assertEqual(self.server.hits["down"], 3)
+
+    def test_401_stops_the_run_and_bad_bodies_fail(self):
+        self.server.script["html"] = [(200, {"Content-Type": "text/html"}, b"<html>maintenance</html>")]
+        self.server.script["denied"] = [(401, {}, b"")]
+        self.server.script["ok"] = [OK]
+        counts = self.run_engine(["html", "denied", "ok"])
+        self.assertEqual(counts, {"fetched": 0, "skipped": 0, "failed": 1, "stopped": 2})
+        self.assertEqual(self.server.hits["denied"], 1)
+        self.assertNotIn("ok", self.server.hits)
+
+    def test_resume_skips_checkpointed_keys(self):
+        self.server.script["a"] = [OK]
+        self.server.script["b"] = [(401, {}, b""), OK]
+        self.assertEqual(self.run_engine(["a", "b"])["fetched"], 1)
+
+        counts = self.run_engine(["a", "b"])
+        self.assertEqual(counts, {"fetched": 1, "skipped": 1, "failed": 0, "stopped": 0})
+        self.assertEqual(self.server.hits, {"a": 1, "b": 2})
+
+    def test_naic_pdf_is_revalidated_with_a_conditional_get(self):
+        from extractors import extractor_insurance_car_naic as naic
+
+        self.server.script["aut-db.pdf"] = [
+            (200, {"ETag": '"v1"'}, b"%PDF-old"),
+            (304, {}, b""),
+            (200, {"ETag": '"v2"'}, b"%PDF-new"),
+        ]
+        url = f"http://127.0.0.1:{self.server.server_port}/aut-db.pdf"
+        with mock.patch.object(naic, "CACHE_DIR", self.tmp.name), redirect_stdout(io.StringIO()):
+            for expected in (b"%PDF-old", b"%PDF-old", b"%PDF-new"):
+                with open(naic.download_pdf(url), "rb") as f:
+                    self.assertEqual(f.read(), expected)
+
+        sent = [headers.get("If-None-Match") for _, headers in self.server.headers]
+        self.assertEqual(sent, [None, '"v1"', '"v1"'])
+
+    def test_year_batches_follow_calendar_years(self):
+        self.assertEqual(
+            list(year_batches(date(2018, 3, 1), date(2020, 6, 30))),
+            [
+                (date(2018, 3, 1), date(2018, 12, 31)),
+                (date(2019, 1, 1), date(2019, 12, 31)),
+                (date(2020, 1, 1), date(2020, 6, 30)),
+            ],
+        )
+
+
+class ExtractorRunnerTests(SimpleTestCase):
+    def fake_extractor(self, name, fail=False):
+        def run(session=None, data_dir=None):
+            self.calls.append((name, session, data_dir))
+            if fail:
+                raise RuntimeError(f"{name} is down")
+            return {"name": name, "path": os.path.join(data_dir, f"{name}.csv"), "rows": 3}
+
+        return run
+
+    def setUp(self):
+        self.calls = []
+
+    def test_every_extractor_runs_in_process_with_the_shared_session(self):
+        import run_all_extractors
+
+        session = object()
+        fakes = {name: self.fake_extractor(name) for name in ("noaa", "fema")}
+        with mock.patch.dict(run_all_extractors.EXTRACTORS, fakes), redirect_stdout(io.StringIO()):
+            results = run_all_extractors.run_extractors(["noaa", "fema"], session=session, data_dir="/v1")
+            parallel = run_all_extractors.run_extractors(
+                ["noaa", "fema"], parallel=2, session=session, data_dir="/v1"
+            )
+
+        self.assertEqual([r["name"] for r in results], ["noaa", "fema"])
+        self.assertEqual([r["name"] for r in parallel], ["noaa", "fema"])
+        self.assertTrue(all("seconds" in r for r in results))
+        self.assertEqual(sorted(self.calls), sorted([
+            ("noaa", session, "/v1"), ("fema", session, "/v1"),
+        ] * 2))
+
+    def test_failures_are_reported_and_raised(self):
+        import run_all_extractors
+
+        fakes = {"noaa": self.fake_extractor("noaa", fail=True)}
+        out = io.StringIO()
+        with mock.patch.dict(run_all_extractors.EXTRACTORS, fakes), redirect_stdout(out):
+            with self.assertRaisesMessage(RuntimeError, "noaa is down"):
+                run_all_extractors.run_extractors(["noaa"], session=object(), data_dir="/v1")
+        self.assertIn("ERROR running noaa", out.getvalue())
+
+    def test_missing_output_fails_verification(self):
+        import run_all_extractors
+
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                run_all_extractors.verify_output(["noaa"], tmp)
+            open(os.path.join(tmp, "noaa_weather.csv"), "w").close()
+            run_all_extractors.verify_output(["noaa"], tmp)
+
+
+def write_raw_files(data_dir, rows=300):
+    """Small raw extractor outputs for every dataset clean_all_data.py cleans."""
+    from benchmarks import synthetic
+
+    with open(os.path.join(data_dir, "naic_auto_insurance.csv"), "w") as f:
+        f.write("state,avg_2022,avg_2021,avg_2020,avg_2019,avg_2018\n")
+        f.write('Texas,"1,500.10",1400,1300,1200,1100\nOhio,900,880,860,840,820\nCountrywide,1,1,1,1,1\n')
+    with open(os.path.join(data_dir, "nerdwallet_home.csv"), "w") as f:
+        f.write("state,avg_annual_usd,avg_monthly_usd,source_year\n")
+        f.write("Texas,\"$4,000\",333.3,2025\nOH,\"$1,500\",125,2025\n")
+    synthetic.write_csv(os.path.join(data_dir, "fema_weather.csv"), synthetic.fema_block, rows, seed=1)
+    synthetic.write_csv(os.path.join(data_dir, "noaa_weather.csv"), synthetic.noaa_block, rows, seed=2)
+
+
+class CleanAllTests(SimpleTestCase):
+    def clean_all(self, data_dir, **kwargs):
+        import clean_all_data
+
+        with redirect_stdout(io.StringIO()):
+            return clean_all_data.clean_all(data_dir=data_dir, **kwargs)
+
+    def test_parallel_output_equals_serial_output(self):
+        import clean_all_data
+
+        with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as parallel:
+            write_raw_files(serial)
+            write_raw_files(parallel)
+            serial_results = self.clean_all(serial, parallel=1)
+            parallel_results = self.clean_all(parallel, parallel=4)
+
+            for (name, (_, clean_name)), a, b in zip(
+                clean_all_data.DATASETS.items(), serial_results, parallel_results
+            ):
+                with self.subTest(dataset=name):
+                    self.assertEqual((a["dataset"], a["status"]), (name, "cleaned"))
+                    self.assertEqual((a["rows_in"], a["rows_out"]), (b["rows_in"], b["rows_out"]))
+                    with open(os.path.join(serial, clean_name), "rb") as f, \
+                            open(os.path.join(parallel, clean_name), "rb") as g:
+                        self.assertEqual(f.read(), g.read())
+
+    def test_unchanged_datasets_are_skipped(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_raw_files(data_dir)
+            self.clean_all(data_dir, parallel=1)
+            with open(os.path.join(data_dir, "nerdwallet_home.csv"), "a") as f:
+                f.write("Ohio,\"$1,600\",133,2024\n")
+
+            results = {r["dataset"]: r for r in self.clean_all(data_dir, parallel=2)}
+            self.assertEqual(
+                {name: r["status"] for name, r in results.items()},
+                {"naic": "skipped", "nerdwallet": "cleaned", "fema": "skipped", "noaa": "skipped"},
+            )
+            self.assertEqual(results["naic"]["rows_out"], 2)
+            self.assertEqual(results["nerdwallet"]["rows_out"], 3)
+
+
+class NoaaMetricTests(SimpleTestCase):
+    def test_metrics_match_the_baseline_numeric_columns(self):
+        import pandas as pd
+
+        import clean_all_data
+        from benchmarks import synthetic
+        from utils.summaries import noaa_metrics, summarize_noaa
+
+        raw = synthetic.noaa_block(np.random.default_rng(4), 0, 200)
+        raw["YEAR"] = raw["year"]
+        raw["Max_Temperature"] = np.where(raw.index % 7 == 0, "n/a", raw.index * 0.5)
+        raw["SNOW"] = 1.5
+        raw["DAMAGE_PROPERTY"] = "10K"
+
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+            raw_path, clean_path = os.path.join(tmp, "noaa.csv"), os.path.join(tmp, "clean.csv")
+            raw.to_csv(raw_path, index=False)
+            clean_all_data.clean_noaa(raw_path, clean_path)
+
+            # the dashboard before the schema registry: inferred types, every numeric column
+            inferred = pd.read_csv(clean_path)
+            baseline = [
+                c for c in inferred.columns
+                if c not in ["state", "year"] and pd.api.types.is_numeric_dtype(inferred[c])
+            ]
+            summary = summarize_noaa(clean_path, chunksize=64)
+
+        self.assertIn("precip", baseline)
+        self.assertIn("Max_Temperature", baseline)
+        self.assertEqual(noaa_metrics(inferred.columns), baseline)
+        self.assertEqual(
+            summary.sort_values("position")["metric"].drop_duplicates().tolist(), baseline
+        )
+
+
+def isolated_data_root(test):
+    """Point DASHBOARD_DATA_DIR and the page cache at a new temporary folder for one test."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    pages = {**settings.CACHES["pages"], "LOCATION": os.path.join(tmp.name, "cache", "pages")}
+    override = override_settings(DASHBOARD_DATA_DIR=tmp.name, CACHES={**settings.CACHES, "pages": pages})
+    override.enable()
+    test.addCleanup(override.disable)
+    # per-version memos are keyed by version name, which another root may share
+    memo = mock.patch.dict("dashboard.cache._VERSION_MEMO", clear=True)
+    memo.start()
+    test.addCleanup(memo.stop)
+    return tmp.name
+
+
+def write_fixture(root, states=("TX", "FL")):
+    from benchmarks import synthetic
+
+    return synthetic.write_dashboard_fixture(root, states, seed=5)
+
+
+class RunPipelineTests(SimpleTestCase):
+    def setUp(self):
+        from utils import versions
+
+        self.root = isolated_data_root(self)
+        self.first, path = versions.create_version(self.root)
+        write_raw_files(path)
+        versions.publish(self.root, self.first)
+
+    def run_pipeline(self):
+        with redirect_stdout(io.StringIO()):
+            call_command(
+                "run_pipeline",
+                stages=["clean", "aggregate"],
+                data_dir=self.root,
+                stdout=io.StringIO(),
+            )
+
+    def report(self):
+        (name,) = os.listdir(os.path.join(self.root, "reports"))
+        with open(os.path.join(self.root, "reports", name)) as f:
+            return json.load(f)
+
+    def test_report_covers_every_stage_and_publishes(self):
+        from utils import versions
+
+        self.run_pipeline()
+        report = self.report()
+        stages = {s["stage"]: s for s in report["stages"]}
+
+        self.assertEqual(report["status"], "ok")
+        self.assertEqual(list(stages), ["clean", "aggregate", "publish"])
+        self.assertEqual(set(stages["clean"]["datasets"].values()), {"cleaned"})
+        self.assertGreater(stages["clean"]["rows_out"], 0)
+        self.assertEqual(stages["aggregate"]["summaries"], "built")
+        for record in stages.values():
+            self.assertGreaterEqual(record["wall_seconds"], 0)
+            self.assertGreater(record["peak_rss_mb"], 0)
+
+        self.assertEqual(versions.current_version(self.root), report["options"]["data_version"])
+        self.assertNotEqual(report["options"]["data_version"], self.first)
+        published = versions.current_dir(self.root)
+        self.assertTrue(os.path.exists(os.path.join(published, "summary_premiums.csv")))
+
+    def test_failed_stage_is_reported_and_not_published(self):
+        from utils import versions
+
+        with mock.patch("clean_all_data.summarize_all", side_effect=RuntimeError("disk full")):
+            with self.assertRaisesMessage(CommandError, "disk full"):
+                self.run_pipeline()
+
+        report = self.report()
+        self.assertEqual(report["status"], "failed")
+        self.assertEqual([s["status"] for s in report["stages"]], ["ok", "failed"])
+        self.assertEqual(report["stages"][1]["error"], "RuntimeError: disk full")
+        self.assertEqual(versions.current_version(self.root), self.first)
+
+
+class PageCacheTests(SimpleTestCase):
+    URL = "/?insurance=Auto&year=2020&state=TX"
+
+    def setUp(self):
+        from django.test import Client
+
+        self.root = isolated_data_root(self)
+        write_fixture(self.root)
+        # render_url() requests pages as localhost, which DEBUG alone allows
+        hosts = override_settings(ALLOWED_HOSTS=["localhost", "testserver"])
+        hosts.enable()
+        self.addCleanup(hosts.disable)
+        self.client = Client()
+
+    def test_second_request_is_a_hit_stored_gzipped(self):
+        import gzip
+
+        miss = self.client.get(self.URL)
+        self.assertEqual(miss["X-Page-Cache"], "miss")
+
+        hit = self.client.get(self.URL)
+        self.assertEqual(hit["X-Page-Cache"], "hit")
+        self.assertEqual(hit.content, miss.content)
+        self.assertIn("Accept-Encoding", hit["Vary"])
+
+        compressed = self.client.get(self.URL, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), miss.content)
+
+    def test_warm_pages_renders_only_what_is_missing(self):
+        from dashboard.cache import is_cached, page_urls, warm_pages
+
+        urls = page_urls()
+        self.assertIn("/?insurance=Home&state=TX", urls)
+        self.assertEqual(len(urls), 5 * 2 + 2)
+
+        self.client.get(urls[0])
+        with redirect_stdout(io.StringIO()):
+            rendered = warm_pages(urls[:3], parallel=1)
+        self.assertEqual([r["url"] for r in rendered], urls[1:3])
+        self.assertEqual({r["status"] for r in rendered}, {200})
+        self.assertTrue(all(is_cached(url) for url in urls[:3]))
+        self.assertEqual(warm_pages(urls[:3], parallel=1), [])
+
+
+class DataVersionTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+
+    def make_version(self, rows):
+        import pandas as pd
+
+        name, path = versions.create_version(self.root)
+        versions.write_csv(pd.DataFrame({"x": rows}), os.path.join(path, "summary.csv"))
+        return name
+
+    def read_current(self):
+        import pandas as pd
+
+        return list(pd.read_csv(os.path.join(versions.current_dir(self.root), "summary.csv"))["x"])
+
+    def test_publish_flips_current_and_rollback_restores_previous(self):
+        self.assertEqual(versions.current_dir(self.root), self.root)
+        first = self.make_version([1])
+        self.assertIsNone(versions.current_version(self.root))
+        versions.publish(self.root, first)
+        second = self.make_version([2])
+        self.assertEqual(self.read_current(), [1])
+
+        versions.publish(self.root, second)
+        self.assertEqual(versions.current_version(self.root), second)
+        self.assertEqual(self.read_current(), [2])
+
+        self.assertEqual(versions.rollback(self.root), first)
+        self.assertEqual(self.read_current(), [1])
+        with self.assertRaises(FileNotFoundError):
+            versions.rollback(self.root)
+        with self.assertRaises(FileNotFoundError):
+            versions.publish(self.root, "missing")
+
+    def test_new_version_links_files_without_touching_the_source(self):
+        import pandas as pd
+
+        first = self.make_version([1, 2])
+        versions.publish(self.root, first)
+        source = os.path.join(versions.version_dir(self.root, first), "summary.csv")
+
+        second, path = versions.create_version(self.root)
+        seeded = os.path.join(path, "summary.csv")
+        self.assertTrue(os.path.samefile(seeded, source))
+
+        versions.write_csv(pd.DataFrame({"x": [3]}), seeded)
+        self.assertFalse(os.path.samefile(seeded, source))
+        self.assertEqual(list(pd.read_csv(source)["x"]), [1, 2])
+
+    def test_prune_keeps_the_newest_published_versions(self):
+        names = []
+        for n in range(4):
+            names.append(self.make_version([n]))
+            versions.publish(self.root, names[-1])
+        versions.rollback(self.root, names[0])
+        pending = self.make_version([9])
+
+        deleted = versions.prune(self.root, keep=2)
+        self.assertEqual(deleted, [names[1]])
+        self.assertEqual(
+            [v["name"] for v in versions.list_versions(self.root)],
+            [names[0], names[2], names[3], pending],
+        )
+        self.assertEqual(self.read_current(), [0])
+
+    def test_data_versions_command(self):
+        first = self.make_version([1])
+        versions.publish(self.root, first)
+        second = self.make_version([2])
+        versions.publish(self.root, second)
+
+        out = io.StringIO()
+        with override_settings(DASHBOARD_DATA_SOURCE="summary"), mock.patch(
+            "dashboard.management.commands.data_versions.clear_pages"
+        ) as clear_pages:
+            call_command("data_versions", rollback="", data_dir=self.root, stdout=out)
+        clear_pages.assert_called_once_with()
+        self.assertIn(f"Published data version {first}", out.getvalue())
+        self.assertIn(f"* {first}", out.getvalue())
+
+        # keeps the newest published version and the current one
+        call_command("data_versions", prune=True, keep=1, data_dir=self.root, stdout=io.StringIO())
+        self.assertEqual([v["name"] for v in versions.list_versions(self.root)], [first, second])
+        with self.assertRaises(CommandError):
+            call_command("data_versions", rollback="", data_dir=self.root, stdout=io.StringIO())
+
+    def test_recount_publishes_a_new_version(self):
+        import pandas as pd
+
+        from extractors import extractor_weather_openmeteo as openmeteo
+
+        published = self.make_version([1])
+        versions.publish(self.root, published)
+        counts_file = os.path.join(versions.current_dir(self.root), openmeteo.COUNTS_FILENAME)
+        versions.write_csv(pd.DataFrame({"state": ["TX"]}), counts_file)
+
+        checkpoint = os.path.join(self.root, "cache", "fetch.sqlite3")
+        with SQLiteCheckpointStore(checkpoint) as store:
+            store.save(("openmeteo", "TX", "2020-01-01"), {}, [
+                ("TX", "2020-01-01", 20.0, 5.0, {}),
+                ("TX", "2020-01-02", 0.0, 2.0, {}),
+            ])
+        with redirect_stdout(io.StringIO()):
+            version, counts = openmeteo.recount(checkpoint_path=checkpoint, root=self.root)
+
+        self.assertNotEqual(version, published)
+        self.assertEqual(versions.current_version(self.root), version)
+        self.assertEqual(list(pd.read_csv(counts_file).columns), ["state"])
+        recounted = pd.read_csv(os.path.join(versions.current_dir(self.root), openmeteo.COUNTS_FILENAME))
+        self.assertEqual(len(recounted), len(counts))
+        # the other files carry over
+        self.assertEqual(self.read_current(), [1])
+
+
+class PrerenderTests(SimpleTestCase):
+    def setUp(self):
+        self.root = isolated_data_root(self)
+        self.out = os.path.join(self.root, "prerendered")
+
+    def prerender(self):
+        from dashboard.prerender import prerender_pages
+
+        return prerender_pages(self.out, parallel=1)
+
+    def test_unchanged_pages_are_skipped_until_the_data_version_changes(self):
+        write_fixture(self.root, ["TX"])
+        first = self.prerender()
+        self.assertEqual(len(first["rendered"]), 5 + 1)
+        self.assertEqual(first["skipped"], 0)
+
+        os.remove(os.path.join(self.out, "Home", "TX.html"))
+        again = self.prerender()
+        self.assertEqual([r["path"] for r in again["rendered"]], [os.path.join("Home", "TX")])
+        self.assertEqual(again["skipped"], 5)
+
+        # same rows in a new version: the pages embed the version, so all change
+        version = write_fixture(self.root, ["TX"])
+        refreshed = self.prerender()
+        self.assertEqual(len(refreshed["rendered"]), 6)
+        for rel in (os.path.join("Auto", "2020", "TX.json"), "index.json"):
+            with open(os.path.join(self.out, rel), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["data_version"], version)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.root = isolated_data_root(self)
+
+    def test_equivalent_params_share_a_key(self):
+        from dashboard.cache import page_key
+
+        write_fixture(self.root)
+        key = page_key(QueryDict("insurance=Home&state=TX"))
+        self.assertEqual(page_key({"insurance": "Home", "state": "TX", "year": "2019"}), key)
+        self.assertEqual(page_key(QueryDict("state=TX&insurance=Home&year=bogus&x=1")), key)
+        self.assertNotEqual(page_key({"insurance": "Home", "state": "FL"}), key)
+        self.assertNotEqual(page_key({"insurance": "Home", "state": "TX"}, version="other"), key)
+
+    def test_concurrent_misses_render_once(self):
+        from dashboard.cache import serve_cached
+
+        renders = []
+        started = threading.Event()
+
+        def render():
+            renders.append(1)
+            started.set()
+            time.sleep(0.3)
+            return HttpResponse("page")
+
+        responses = [None] * 4
+
+        def get(i):
+            if i:
+                started.wait(5)
+            responses[i] = serve_cached(RequestFactory().get("/"), "home:v1:page", render)
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(renders), 1)
+        self.assertEqual(
+            sorted(r["X-Page-Cache"] for r in responses), ["miss", "wait", "wait", "wait"]
+        )
+        self.assertEqual({r.content for r in responses}, {b"page"})
+
+    def test_unversioned_data_is_not_cached(self):
+        from benchmarks import synthetic
+        from django.test import Client
+
+        from dashboard.cache import caching, page_cache
+        from utils import summaries
+
+        paths = summaries.summary_paths(self.root)
+        for table, df in synthetic.dashboard_tables(["TX"], 5).items():
+            versions.write_csv(df, paths[table])
+        self.assertFalse(caching())
+
+        client = Client()
+        for _ in range(2):
+            response = client.get("/?insurance=Auto&year=2020&state=TX")
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("X-Page-Cache", response)
+        bundle = client.get("/bundle/-/auto.json")
+        self.assertEqual(bundle["Cache-Control"], "no-cache")
+        self.assertNotIn("X-Page-Cache", bundle)
+        self.assertFalse(page_cache().has_key("bundle:-:Auto"))
+
+
+class ChartFigureTests(SimpleTestCase):
+    def test_figure_dicts_match_plotly_express(self):
+        from benchmarks import bench_figures
+
+        for n_states in (51, 3):
+            inputs = bench_figures.make_inputs(n_states, seed=1)
+            for name, (px_build, dict_build) in bench_figures.FIGURES.items():
+                with self.subTest(figure=name, states=n_states):
+                    self.assertTrue(bench_figures.equivalent(px_build(inputs), dict_build(inputs)))
+
+    def test_comparison_notices_a_changed_value(self):
+        from benchmarks import bench_figures
+
+        inputs = bench_figures.make_inputs(5)
+        fig = bench_figures.dict_bar(inputs)
+        fig["data"][0]["x"] = fig["data"][0]["x"] * 1.01
+        self.assertFalse(bench_figures.equivalent(bench_figures.px_bar(inputs), fig))
+
+
+class BundleTests(SimpleTestCase):
+    STATES = ["CA", "FL", "NY", "OH", "TX", "WA"]
+
+    def setUp(self):
+        from benchmarks import synthetic
+        from utils import summaries
+
+        root = isolated_data_root(self)
+        tables = synthetic.dashboard_tables(self.STATES, 3)
+        noaa = tables["noaa_state_year"]
+        first = noaa["year"].min()
+        noaa = noaa[noaa["state"] != "CA"].copy()
+        # a year without readings (a gap) and a year without a row
+        noaa.loc[(noaa["state"] == "OH") & (noaa["year"] == first + 2), "n"] = 0
+        tables["noaa_state_year"] = noaa[(noaa["state"] != "NY") | (noaa["year"] != first + 4)]
+        groups = tables["fema_groups"]
+        tables["fema_groups"] = groups[groups["state"] != "WA"]
+
+        self.version, path = versions.create_version(root)
+        for table, df in tables.items():
+            versions.write_csv(df, summaries.summary_paths(path)[table])
+        versions.publish(root, self.version)
+
+    def test_state_payload_matches_the_rendered_charts(self):
+        from dashboard.bundle import build_bundle
+        from dashboard.views import build_dashboard
+
+        bundle = build_bundle("Auto", self.version)
+        self.assertEqual(bundle["states"], self.STATES)
+        noaa, mix = bundle["noaa"], bundle["fema_mix"]
+
+        def as_float(values):
+            return np.array([np.nan if v is None else v for v in values], float)
+
+        for i, state in enumerate(bundle["states"]):
+            with self.subTest(state=state):
+                figures = build_dashboard({"insurance": "Auto", "year": "2020", "state": state})["figures"]
+
+                row = noaa["states"][i]
+                weather = figures.get("weather_trend_chart")
+                self.assertEqual(weather is not None, bool(row["index"]))
+                if weather is not None:
+                    state_trace, national_trace = weather["data"]
+                    self.assertEqual(list(state_trace["x"]), [noaa["years"][j] for j in row["index"]])
+                    np.testing.assert_allclose(as_float(state_trace["y"]), as_float(row["values"]))
+                    np.testing.assert_allclose(
+                        as_float(national_trace["y"]), as_float([noaa["national"][j] for j in row["index"]])
+                    )
+                    self.assertEqual(weather["layout"]["title"]["text"], f"NOAA weather trend for {state}")
+
+                counts = mix["counts"][i]
+                pie = figures.get("fema_breakdown_chart")
+                self.assertEqual(pie is not None, any(counts))
+                if pie is not None:
+                    trace = pie["data"][0]
+                    self.assertEqual(list(trace["labels"]), [g for g, n in zip(mix["groups"], counts) if n])
+                    self.assertEqual(list(trace["values"]), [n for n in counts if n])
+                    self.assertEqual(pie["layout"]["title"]["text"], f"FEMA disaster mix for {state}")
+
+        ohio = noaa["states"][self.STATES.index("OH")]["values"]
+        self.assertIn(None, ohio)
+
+
+class TrendChartTests(SimpleTestCase):
+    def build(self, premiums):
+        from benchmarks import synthetic
+        from dashboard.data import SummarySource
+        from dashboard.views import build_dashboard
+
+        tables = synthetic.dashboard_tables(["TX", "FL"], 2)
+        tables["premiums"] = premiums(tables["premiums"])
+        with mock.patch("dashboard.data.get_source", return_value=SummarySource(tables)):
+            page = build_dashboard({"insurance": "Auto", "year": "2020", "state": "TX"})
+        return {trace["name"]: list(trace["y"]) for trace in page["figures"]["trend_chart"]["data"]}
+
+    def test_base_year_without_premiums_gives_nan(self):
+        def drop_base_year(df):
+            return df[(df["insurance"] != "auto") | (df["year"] != 2018)]
+
+        series = self.build(drop_base_year)
+        self.assertEqual(list(series), ["National Avg", "TX"])
+        for values in series.values():
+            self.assertTrue(np.isnan(values).all())
+
+    def test_indexes_to_the_base_year(self):
+        series = self.build(lambda df: df)
+        self.assertEqual(series["National Avg"][0], 1.0)
+        self.assertEqual(series["TX"][0], 1.0)
+        self.assertFalse(np.isnan(series["TX"]).any())
+
+
+class ProfiledPageTests(SimpleTestCase):
+    URL = "/?insurance=Auto&year=2020&state=TX"
+
+    def setUp(self):
+        from django.test import Client
+
+        root = isolated_data_root(self)
+        write_fixture(root)
+        self.profiles = os.path.join(root, "profiles")
+        profiling = override_settings(
+            DASHBOARD_PROFILE=True,
+            DASHBOARD_PROFILE_SLOW_MS=None,
+            DASHBOARD_PROFILE_DIR=self.profiles,
+            DEBUG=True,
+        )
+        profiling.enable()
+        self.addCleanup(profiling.disable)
+        # the middleware reads its settings when the client loads it
+        self.client = Client()
+
+    def test_cached_page_is_rendered_when_profiled(self):
+        self.assertEqual(self.client.get(self.URL)["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get(self.URL)["X-Page-Cache"], "hit")
+
+        response = self.client.get(self.URL + "&profile=memory")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Page-Cache", response)
+        with open(os.path.join(self.profiles, response["X-Profile"]), encoding="utf-8") as f:
+            report = f.read()
+        for name in ("imports", "bar chart", "template"):
+            self.assertIn(f"\n{name} ", report)
+
+        response = self.client.get(self.URL + "&profile=cprofile")
+        self.assertNotIn("X-Page-Cache", response)
+        stats = pstats.Stats(os.path.join(self.profiles, response["X-Profile"]))
+        self.assertIn("build_dashboard", {name for _, _, name in stats.stats})
+
+        # the cached copy is still served to everyone else
+        self.assertEqual(self.client.get(self.URL)["X-Page-Cache"], "hit")
+
+    def test_profiled_bundle_skips_the_cache(self):
+        from dashboard.cache import data_version
+
+        url = f"/bundle/{data_version()}/Auto.json"
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "miss")
+        profiled = self.client.get(url + "?profile=sample")
+        self.assertTrue(profiled["X-Profile"].endswith(".folded"))
+        self.assertNotIn("X-Page-Cache", profiled)
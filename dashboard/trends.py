@@ -0,0 +1,150 @@
+# dashboard/trends.py
+#
+# Auto premium trends for every state at once. The average premium per
+# state and policy year (as the bar chart shows it) forms a states × years
+# matrix; one batched least-squares solve fits a line to every row of it
+# and of its log, with missing years weighted out. Per state:
+#
+#   years       policy years with a premium
+#   cagr        compound annual growth from the first to the last of them
+#   growth      annual growth of the log-linear fit
+#   slope       dollars per year of the linear fit
+#   volatility  standard deviation of log premiums around the log-linear
+#               fit (roughly a fraction of the premium); needs 3 years
+#   projected   premiums the log-linear fit gives for the next
+#               PROJECTION_YEARS years
+#
+# Fits are kept in memory per published data version (views.trends serves
+# them as JSON, the risk table and the data bundle show CAGR and the first
+# projected year). benchmarks/bench_trends.py compares the batched fit with
+# a per-state loop.
+
+import numpy as np
+
+PROJECTION_YEARS = 2
+
+
+def fit_trends(years, premiums, horizon=PROJECTION_YEARS):
+    """
+    Fit every row of premiums (rows × len(years), NaN where missing) in one
+    go. Returns {name: array over rows} with the fields of the module
+    comment; "projected" is rows × horizon. Rows with fewer than two years
+    get NaN.
+    """
+    premiums = np.asarray(premiums, dtype=float)
+    t = np.asarray(years, dtype=float) - years[0]
+    observed = np.isfinite(premiums) & (premiums > 0)
+    weights = observed.astype(float)
+    n = weights.sum(axis=1)
+    fitted = n >= 2
+
+    # weighted normal equations, one 2 × 2 system per row, solved together
+    # for the premiums and their logs
+    X = np.column_stack([np.ones_like(t), t])
+    A = np.einsum("ry,yi,yj->rij", weights, X, X)
+    A[~fitted] = np.eye(2)
+    values = np.where(observed, premiums, 0.0)
+    logs = np.log(np.where(observed, premiums, 1.0))
+    rhs = np.stack([weights * values, weights * logs], axis=-1)
+    coef = np.linalg.solve(A, np.einsum("yi,ryk->rik", X, rhs))
+    coef[~fitted] = np.nan
+    linear, loglinear = coef[..., 0], coef[..., 1]
+
+    residuals = weights * (logs - loglinear @ X.T)
+    dof = n - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        volatility = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+    volatility[dof < 1] = np.nan
+
+    rows = np.arange(len(premiums))
+    first = observed.argmax(axis=1)
+    last = observed.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)
+    span = t[last] - t[first]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cagr = (premiums[rows, last] / premiums[rows, first]) ** (1 / span) - 1
+    cagr[~fitted | (span <= 0)] = np.nan
+
+    future = t[-1] + np.arange(1, horizon + 1)
+    return {
+        "years": n.astype(int),
+        "cagr": cagr,
+        "growth": np.expm1(loglinear[:, 1]),
+        "slope": linear[:, 1],
+        "volatility": volatility,
+        "projected": np.exp(loglinear[:, :1] + loglinear[:, 1:] * future),
+    }
+
+
+def projection_years(years, horizon=PROJECTION_YEARS):
+    return [years[-1] + i for i in range(1, horizon + 1)]
+
+
+def premium_matrix(source, years):
+    """(states, states × years matrix of average auto premiums, national row)."""
+    states = source.auto_states()
+    position = {state: i for i, state in enumerate(states)}
+    matrix = np.full((len(states), len(years)), np.nan)
+    for j, year in enumerate(years):
+        df = source.auto_by_state(year)
+        rows = df["state"].map(position)
+        keep = rows.notna().to_numpy()
+        matrix[rows[keep].astype(int).to_numpy(), j] = df["Average Premium"].to_numpy()[keep]
+    national = source.auto_national()
+    return states, matrix, np.array([national.get(year, np.nan) for year in years], dtype=float)
+
+
+def compute_trends(source, years):
+    """Trend frame of every state, plus the national average as the last row (state None)."""
+    import pandas as pd
+
+    states, matrix, national = premium_matrix(source, years)
+    fit = fit_trends(years, np.vstack([matrix, national]))
+    df = pd.DataFrame({"state": [*states, None]})
+    for name in ("years", "cagr", "growth", "slope", "volatility"):
+        df[name] = fit[name]
+    for i, year in enumerate(projection_years(years)):
+        df[f"projected_{year}"] = fit["projected"][:, i]
+    return df
+
+
+def state_trends(source=None):
+    """compute_trends for the published data, computed once per data version."""
+    from dashboard.cache import per_version
+    from dashboard.data import get_source
+    from dashboard.views import AUTO_YEARS
+
+    return per_version("trends", lambda: compute_trends(source or get_source(), AUTO_YEARS))
+
+
+def _json_values(values):
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def trends_payload(version, source=None):
+    """Every state's trend as a dict, ready for JSON."""
+    from dashboard.views import AUTO_YEARS
+
+    df = state_trends(source)
+    projected = projection_years(AUTO_YEARS)
+
+    def record(row):
+        return {
+            "years": int(row["years"]),
+            **dict(zip(
+                ("cagr", "growth", "slope", "volatility"),
+                _json_values([row["cagr"], row["growth"], row["slope"], row["volatility"]]),
+            )),
+            "projected": dict(zip(
+                [str(year) for year in projected],
+                _json_values([row[f"projected_{year}"] for year in projected]),
+            )),
+        }
+
+    rows = df.to_dict(orient="records")
+    return {
+        "version": version,
+        "years": AUTO_YEARS,
+        "projection_years": projected,
+        "national": record(rows[-1]),
+        "states": {row["state"]: record(row) for row in rows[:-1]},
+    }
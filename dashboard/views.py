@@ -1,104 +1,221 @@
-from django.shortcuts import render
-from django.conf import settings
-import pandas as pd
-import os
-import plotly.express as px
+import json
+import math
 
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
 
+from dashboard.cache import cache_page, caching, data_version, profiled, serve_cached
+from dashboard.memory import stage
+
+INSURANCE_TYPES = ["Auto", "Home"]
+AUTO_YEARS = list(range(2018, 2023))
+
+# weight by perceived severity
+SEVERITY_WEIGHTS = {
+    "Hurricane": 2.0,
+    "Flood": 1.7,
+    "Fire": 1.8,
+    "Severe Storm": 1.4,
+    "Winter": 1.2,
+    "Other": 1.0,
+}
+
+# composite risk score = sum of weight * index
+RISK_WEIGHTS = {"Premium Index": 0.5, "Severity Index": 0.3, "Weather Index": 0.2}
+
+
+@cache_page
 def home(request):
-    base_dir = settings.BASE_DIR
+    context = build_dashboard(request.GET)["context"]
+    stage("template")
+    return render(request, "home.html", context)
 
-    # ---------------------------------------------------
-    # LOAD DATA
-    # ---------------------------------------------------
-    df_auto = pd.read_csv(os.path.join(base_dir, "data", "clean_naic_auto_insurance.csv"))
-    df_home = pd.read_csv(os.path.join(base_dir, "data", "clean_nerdwallet_home.csv"))
-    df_fema = pd.read_csv(os.path.join(base_dir, "data", "clean_fema_weather.csv"), low_memory=False)
-    df_noaa = pd.read_csv(os.path.join(base_dir, "data", "clean_noaa_weather.csv"))
 
-    # ---------------------------------------------------
-    # BASIC CLEANUP
-    # ---------------------------------------------------
-    def clean_states(df, col="state"):
-        if col not in df.columns:
-            return df.iloc[0:0].copy()
-        out = df[df[col].notna()].copy()
-        out[col] = (
-            out[col]
-            .astype(str)
-            .str.strip()
-            .str.upper()
-            .str.replace(".", "", regex=False)
-        )
-        # keep two character codes only
-        out = out[out[col].str.len() == 2]
-        return out
+def _versioned_json(request, version, url_name, build, **kwargs):
+    """
+    build(data version) as JSON, for URLs that name the data version. Old
+    versions redirect to the current one; current ones never change, so
+    browsers keep them.
+    """
+    current = data_version()
+    if version != current:
+        return redirect(url_name, version=current, **kwargs)
+
+    def render_json():
+        body = json.dumps(build(current), separators=(",", ":"))
+        return HttpResponse(body, content_type="application/json")
+
+    if caching(current) and not profiled(request):
+        key = ":".join([url_name, current, *kwargs.values()])
+        response = serve_cached(request, key, render_json)
+    else:
+        response = render_json()
+    # an unversioned data folder changes in place
+    if current != "-":
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = "no-cache"
+    return response
 
-    df_auto = clean_states(df_auto, "state")
-    df_home = clean_states(df_home, "state")
-    df_fema = clean_states(df_fema, "state")
-    df_noaa = clean_states(df_noaa, "state")
 
-    # try to force numeric where relevant
-    for col in df_auto.columns:
-        if col.startswith("avg_"):
-            df_auto[col] = pd.to_numeric(df_auto[col], errors="coerce")
+def bundle(request, version, insurance):
+    """The data bundle for one insurance type (dashboard/bundle.py)."""
+    insurance = insurance.capitalize()
+    if insurance not in INSURANCE_TYPES:
+        raise Http404(f"No insurance type {insurance!r}")
 
-    if "avg_annual_usd" in df_home.columns:
-        df_home["avg_annual_usd"] = pd.to_numeric(df_home["avg_annual_usd"], errors="coerce")
+    def build(current):
+        from dashboard.bundle import build_bundle
 
-    # ---------------------------------------------------
-    # INSURANCE TYPE AND YEAR SELECTION
-    # ---------------------------------------------------
-    insurance_types = ["Auto", "Home"]
-    selected_insurance = request.GET.get("insurance", "Auto").capitalize()
-    if selected_insurance not in insurance_types:
+        return build_bundle(insurance, current)
+
+    return _versioned_json(request, version, "bundle", build, insurance=insurance)
+
+
+def trends(request, version):
+    """Auto premium trend of every state and the national average (dashboard/trends.py)."""
+
+    def build(current):
+        from dashboard.trends import trends_payload
+
+        return trends_payload(current)
+
+    return _versioned_json(request, version, "trends", build)
+
+
+def analytics(request, version):
+    """Correlations and regressions between the state level variables (dashboard/analytics.py)."""
+
+    def build(current):
+        from dashboard.analytics import analytics_payload
+
+        return analytics_payload(current)
+
+    return _versioned_json(request, version, "analytics", build)
+
+
+def resolve_params(query, source):
+    """
+    The insurance, year and state a page is built for. Invalid or missing
+    values fall back the way the page always has, so many URLs resolve to
+    the same page; the page cache keys on the result.
+    """
+    selected_insurance = query.get("insurance", "Auto").capitalize()
+    if selected_insurance not in INSURANCE_TYPES:
         selected_insurance = "Auto"
 
-    auto_years = list(range(2018, 2023))
-    selected_year_param = request.GET.get("year", str(auto_years[-1]))
+    selected_year_param = query.get("year", str(AUTO_YEARS[-1]))
 
     if selected_insurance == "Auto":
         try:
             selected_year = int(selected_year_param)
         except ValueError:
-            selected_year = auto_years[-1]
-        states = sorted(df_auto["state"].unique().tolist())
+            selected_year = AUTO_YEARS[-1]
+        states = source.auto_states()
     else:
         # Home data is effectively a single snapshot year
         selected_year = "Current (2025)"
-        states = sorted(df_home["state"].unique().tolist())
+        states = source.home_states()
 
     if not states:
         states = ["TX"]
 
-    selected_state = request.GET.get("state", states[0])
+    selected_state = query.get("state", states[0])
     if selected_state not in states:
         selected_state = states[0]
 
+    return {
+        "insurance": selected_insurance,
+        "year": selected_year,
+        "state": selected_state,
+        "states": states,
+    }
+
+
+def severity_by_state(source):
+    """FEMA declarations per state weighted by incident group: [state, severity_score]."""
+    grp = source.fema_groups()
+    grp["weight"] = grp["incident_group"].map(SEVERITY_WEIGHTS).fillna(1.0)
+    grp["severity_score_part"] = grp["count"] * grp["weight"]
+
+    return (
+        grp.groupby("state", as_index=False)
+        .agg(severity_score=("severity_score_part", "sum"))
+    )
+
+
+def weather_index_by_state(source):
+    """
+    Mean of the NOAA metrics per state relative to the mean over states:
+    [state, Weather Index], or None without NOAA data.
+    """
+    noaa_state = source.noaa_state_means()
+    numeric_cols = [c for c in noaa_state.columns if c != "state"]
+
+    if noaa_state.empty or not numeric_cols:
+        return None
+
+    noaa_state["weather_score_raw"] = noaa_state[numeric_cols].mean(axis=1)
+    w_mean = noaa_state["weather_score_raw"].mean()
+    if w_mean and w_mean != 0:
+        noaa_state["Weather Index"] = noaa_state["weather_score_raw"] / w_mean
+    else:
+        noaa_state["Weather Index"] = 1.0
+    return noaa_state[["state", "Weather Index"]]
+
+
+def build_dashboard(query):
+    """
+    Everything the home page shows for the insurance / year / state in query:
+    {"context": template context, "figures": {panel: plotly figure dict},
+    "table": risk table}. manage.py prerender_dashboard also writes the
+    figures as JSON.
+    """
+    stage("imports")
+    # pandas and plotly take most of a second to import, so they load on
+    # the first request instead of in every manage.py command, migration
+    # and test run that only imports the URLconf.
+    import pandas as pd
+
+    from dashboard import charts
+    from dashboard.data import get_source
+
+    # ---------------------------------------------------
+    # DATA SOURCE
+    # ---------------------------------------------------
+    stage("data source")
+    # Aggregates come from the indexed SQLite tables (or the clean CSVs,
+    # see dashboard/data.py), so only the rows a chart needs are read.
+    source = get_source()
+
+    # ---------------------------------------------------
+    # INSURANCE TYPE AND YEAR SELECTION
+    # ---------------------------------------------------
+    stage("params")
+    insurance_types = INSURANCE_TYPES
+    auto_years = AUTO_YEARS
+
+    params = resolve_params(query, source)
+    selected_insurance = params["insurance"]
+    selected_year = params["year"]
+    selected_state = params["state"]
+    states = params["states"]
+
     # ---------------------------------------------------
     # BUILD INSURANCE DATAFRAME: df_ins
     # ---------------------------------------------------
+    stage("premiums")
     if selected_insurance == "Auto":
-        year_col = f"avg_{selected_year}"
-        if year_col not in df_auto.columns:
+        premium_year = selected_year
+        if premium_year not in auto_years:
             # fail safe, default to last known year
-            year_col = "avg_2022"
+            premium_year = 2022
 
-        df_ins = (
-            df_auto[["state", year_col]]
-            .rename(columns={year_col: "Average Premium"})
-            .groupby("state", as_index=False)
-            .agg({"Average Premium": "mean"})
-        )
+        df_ins = source.auto_by_state(premium_year)
     else:
         # Home: single snapshot
-        df_ins = (
-            df_home
-            .rename(columns={"avg_annual_usd": "Average Premium"})
-            .groupby("state", as_index=False)
-            .agg({"Average Premium": "mean"})
-        )
+        df_ins = source.home_by_state()
 
     # drop states with missing premium
     df_ins = df_ins.dropna(subset=["Average Premium"])
@@ -106,95 +223,19 @@ def home(request):
     # ---------------------------------------------------
     # FEMA: DISASTER COUNTS AND SEVERITY
     # ---------------------------------------------------
-    if "declarationDate" in df_fema.columns:
-        df_fema["declarationDate"] = pd.to_datetime(
-            df_fema["declarationDate"], errors="coerce"
-        )
-
+    stage("fema")
     # basic frequency by state
-    fema_counts = (
-        df_fema
-        .groupby("state", as_index=False)
-        .agg(disaster_count=("state", "count"))
-    )
+    fema_counts = source.fema_counts()
 
     # severity by incident type
-    if "incidentType" in df_fema.columns:
-        tmp = df_fema.dropna(subset=["incidentType"]).copy()
-        tmp["incidentTypeClean"] = tmp["incidentType"].astype(str).str.upper()
-
-        def map_incident(cat):
-            if "HURRICANE" in cat or "TROPICAL" in cat:
-                return "Hurricane"
-            if "FLOOD" in cat:
-                return "Flood"
-            if "FIRE" in cat or "WILDFIRE" in cat:
-                return "Fire"
-            if "STORM" in cat or "TORNADO" in cat or "WIND" in cat or "HAIL" in cat:
-                return "Severe Storm"
-            if "SNOW" in cat or "BLIZZARD" in cat or "FREEZE" in cat or "WINTER" in cat or "ICE" in cat:
-                return "Winter"
-            return "Other"
-
-        tmp["incident_group"] = tmp["incidentTypeClean"].apply(map_incident)
-
-        grp = (
-            tmp.groupby(["state", "incident_group"])
-            .size()
-            .reset_index(name="count")
-        )
-
-        # weight by perceived severity
-        severity_weights = {
-            "Hurricane": 2.0,
-            "Flood": 1.7,
-            "Fire": 1.8,
-            "Severe Storm": 1.4,
-            "Winter": 1.2,
-            "Other": 1.0,
-        }
-
-        grp["weight"] = grp["incident_group"].map(severity_weights).fillna(1.0)
-        grp["severity_score_part"] = grp["count"] * grp["weight"]
-
-        fema_severity = (
-            grp.groupby("state", as_index=False)
-            .agg(severity_score=("severity_score_part", "sum"))
-        )
-    else:
-        fema_severity = pd.DataFrame({"state": df_ins["state"].unique(), "severity_score": 1.0})
+    fema_severity = severity_by_state(source)
 
     # ---------------------------------------------------
     # NOAA WEATHER INDEX
     # ---------------------------------------------------
-    weather_index_df = None
-    if not df_noaa.empty:
-        if "year" in df_noaa.columns:
-            df_noaa["year"] = pd.to_numeric(df_noaa["year"], errors="coerce")
-
-        numeric_cols = [
-            c for c in df_noaa.columns
-            if c not in ["state", "year"] and pd.api.types.is_numeric_dtype(df_noaa[c])
-        ]
-
-        if numeric_cols:
-            noaa_state = (
-                df_noaa
-                .groupby("state", as_index=False)[numeric_cols]
-                .mean()
-            )
-            noaa_state["weather_score_raw"] = noaa_state[numeric_cols].mean(axis=1)
-            w_mean = noaa_state["weather_score_raw"].mean()
-            if w_mean and w_mean != 0:
-                noaa_state["Weather Index"] = noaa_state["weather_score_raw"] / w_mean
-            else:
-                noaa_state["Weather Index"] = 1.0
-            weather_index_df = noaa_state[["state", "Weather Index"]]
-        else:
-            weather_index_df = pd.DataFrame(
-                {"state": df_ins["state"].unique(), "Weather Index": 1.0}
-            )
-    else:
+    stage("weather index")
+    weather_index_df = weather_index_by_state(source)
+    if weather_index_df is None:
         weather_index_df = pd.DataFrame(
             {"state": df_ins["state"].unique(), "Weather Index": 1.0}
         )
@@ -202,6 +243,7 @@ def home(request):
     # ---------------------------------------------------
     # MERGE INSURANCE, FEMA, NOAA
     # ---------------------------------------------------
+    stage("merge")
     merged_df = df_ins.merge(fema_counts, on="state", how="left")
     merged_df = merged_df.merge(fema_severity, on="state", how="left")
     merged_df = merged_df.merge(weather_index_df, on="state", how="left")
@@ -215,6 +257,7 @@ def home(request):
     # ---------------------------------------------------
     # PREMIUM INDEX AND COMPONENT INDICES
     # ---------------------------------------------------
+    stage("indices")
     merged_df["Premium Index"] = merged_df["Average Premium"] / merged_df["Average Premium"].mean()
 
     disaster_mean = merged_df["disaster_count"].mean()
@@ -235,10 +278,9 @@ def home(request):
     # ---------------------------------------------------
     # FINAL RISK SCORE
     # ---------------------------------------------------
-    merged_df["Risk Score"] = (
-        0.5 * merged_df["Premium Index"]
-        + 0.3 * merged_df["Severity Index"]
-        + 0.2 * merged_df["Weather Index"]
+    stage("risk score")
+    merged_df["Risk Score"] = sum(
+        weight * merged_df[index] for index, weight in RISK_WEIGHTS.items()
     )
 
     # risk score for header card
@@ -253,222 +295,105 @@ def home(request):
     # ---------------------------------------------------
     # TREND CHART (AUTO ONLY)
     # ---------------------------------------------------
+    stage("trend chart")
+    figures = {}
     trend_chart = None
 
     if selected_insurance == "Auto":
         base_year = auto_years[0]
 
-        trend_rows = []
+        # premium index per series, in year order
+        trend_series = {}
 
-        nat_base = df_auto[f"avg_{base_year}"].mean()
+        def indexed(premiums):
+            # years without premiums (none at all without auto rows) stay NaN
+            base = premiums.get(base_year, math.nan)
+            return [premiums.get(y, math.nan) / base if base else 1.0 for y in auto_years]
 
-        for y in auto_years:
-            nat_val = df_auto[f"avg_{y}"].mean()
-            trend_rows.append(
-                {
-                    "Year": int(y),
-                    "Premium Index": nat_val / nat_base if nat_base else 1.0,
-                    "Series": "National Avg",
-                }
-            )
+        trend_series["National Avg"] = indexed(source.auto_national())
 
-        # if state exists in df_auto
-        if selected_state in df_auto["state"].values:
-            state_row = df_auto[df_auto["state"] == selected_state].iloc[0]
-            state_base = state_row[f"avg_{base_year}"]
-            for y in auto_years:
-                val = state_row[f"avg_{y}"]
-                trend_rows.append(
-                    {
-                        "Year": int(y),
-                        "Premium Index": val / state_base if state_base else 1.0,
-                        "Series": selected_state,
-                    }
-                )
+        # if state exists in the auto data
+        state_row = source.auto_state_premiums(selected_state)
+        if state_row is not None:
+            trend_series[selected_state] = indexed(state_row)
 
-        trend_df = pd.DataFrame(trend_rows)
-        trend_df["Year"] = trend_df["Year"].astype(int)
-        trend_df = trend_df.sort_values("Year")
-
-        trend_fig = px.line(
-            trend_df,
-            x="Year",
-            y="Premium Index",
-            color="Series",
-            markers=True,
-            title="Auto Insurance Premium Trend, indexed to base year",
-        )
-
-        trend_fig.add_hline(
-            y=1.0,
-            line_dash="dash",
-            annotation_text=f"{base_year} baseline",
-        )
-
-        trend_fig.update_layout(
-            xaxis=dict(
-                type="linear",
-                tickmode="array",
-                tickvals=auto_years,
-            ),
-            yaxis_title="Premium Index",
-            xaxis_title="Year",
-            yaxis_tickformat=".2f",
-            template="plotly_white",
-            legend_title_text="",
-        )
-
-        trend_chart = trend_fig.to_html(full_html=False)
+        trend_fig = charts.trend_figure(auto_years, trend_series, base_year)
+        figures["trend_chart"] = trend_fig
+        trend_chart = charts.to_html(trend_fig, div_id="trend_chart")
 
     # ---------------------------------------------------
     # NOAA WEATHER TREND CHART (STATE vs NATIONAL)
     # ---------------------------------------------------
+    stage("weather chart")
     weather_trend_chart = None
     try:
-        noaa_state = df_noaa[df_noaa["state"] == selected_state].copy()
-        if not noaa_state.empty and "year" in noaa_state.columns:
-            noaa_state["year"] = pd.to_numeric(noaa_state["year"], errors="coerce")
-            numeric_cols = [
-                c for c in noaa_state.columns
-                if c not in ["state", "year"] and pd.api.types.is_numeric_dtype(noaa_state[c])
-            ]
-
-            if numeric_cols:
-                metric = numeric_cols[0]
-
-                state_series = (
-                    noaa_state
-                    .groupby("year", as_index=False)[metric]
-                    .mean()
-                    .rename(columns={metric: "State Value"})
-                )
-
-                nat_series = (
-                    df_noaa
-                    .groupby("year", as_index=False)[metric]
-                    .mean()
-                    .rename(columns={metric: "National Value"})
+        metrics = source.noaa_metrics()
+        if metrics:
+            metric = metrics[0]
+            state_series = source.noaa_year_means(metric, selected_state)
+            if not state_series.empty:
+                state_series = state_series.rename(columns={"value": "State Value"})
+                nat_series = source.noaa_year_means(metric).rename(
+                    columns={"value": "National Value"}
                 )
 
                 joined = state_series.merge(nat_series, on="year", how="inner")
-                melted = joined.melt(
-                    id_vars="year",
-                    value_vars=["State Value", "National Value"],
-                    var_name="Series",
-                    value_name="Value",
-                )
-
-                weather_fig = px.line(
-                    melted,
-                    x="year",
-                    y="Value",
-                    color="Series",
-                    markers=True,
-                    title=f"NOAA weather trend for {selected_state}",
-                )
 
-                weather_fig.update_layout(
-                    xaxis_title="Year",
-                    yaxis_title=metric,
-                    template="plotly_white",
-                    legend_title_text="",
+                weather_fig = charts.weather_figure(
+                    joined["year"].to_numpy(),
+                    joined["State Value"].to_numpy(),
+                    joined["National Value"].to_numpy(),
+                    selected_state,
+                    metric,
                 )
 
-                weather_trend_chart = weather_fig.to_html(full_html=False)
+                figures["weather_trend_chart"] = weather_fig
+                weather_trend_chart = charts.to_html(weather_fig, div_id="weather_trend_chart")
     except Exception:
         weather_trend_chart = None
 
     # ---------------------------------------------------
     # FEMA BREAKDOWN CHART FOR SELECTED STATE
     # ---------------------------------------------------
+    stage("fema chart")
     fema_breakdown_chart = None
     try:
-        if "incidentType" in df_fema.columns:
-            tmp_state = df_fema[df_fema["state"] == selected_state].copy()
-            if not tmp_state.empty:
-                tmp_state["incidentTypeClean"] = tmp_state["incidentType"].astype(str).str.upper()
-
-                def map_incident_chart(cat):
-                    if "HURRICANE" in cat or "TROPICAL" in cat:
-                        return "Hurricane"
-                    if "FLOOD" in cat:
-                        return "Flood"
-                    if "FIRE" in cat or "WILDFIRE" in cat:
-                        return "Fire"
-                    if "STORM" in cat or "TORNADO" in cat or "WIND" in cat or "HAIL" in cat:
-                        return "Severe Storm"
-                    if "SNOW" in cat or "BLIZZARD" in cat or "FREEZE" in cat or "WINTER" in cat or "ICE" in cat:
-                        return "Winter"
-                    return "Other"
-
-                tmp_state["incident_group"] = tmp_state["incidentTypeClean"].apply(map_incident_chart)
-
-                grp_state = (
-                    tmp_state.groupby("incident_group")
-                    .size()
-                    .reset_index(name="count")
-                )
-
-                fema_fig = px.pie(
-                    grp_state,
-                    names="incident_group",
-                    values="count",
-                    title=f"FEMA disaster mix for {selected_state}",
-                )
+        grp_state = source.fema_mix(selected_state)
+        if not grp_state.empty:
+            fema_fig = charts.mix_figure(
+                grp_state["incident_group"].to_numpy(),
+                grp_state["count"].to_numpy(),
+                selected_state,
+            )
 
-                fema_fig.update_layout(template="plotly_white")
-                fema_breakdown_chart = fema_fig.to_html(full_html=False)
+            figures["fema_breakdown_chart"] = fema_fig
+            fema_breakdown_chart = charts.to_html(fema_fig, div_id="fema_breakdown_chart")
     except Exception:
         fema_breakdown_chart = None
 
-
-
     # ---------------------------------------------------
     # STATE BAR CHART (PREMIUM INDEX)
     # ---------------------------------------------------
-    bar_df = merged_df.sort_values("Premium Index", ascending=True).copy()
-    bar_df["Highlight"] = bar_df["state"].apply(
-        lambda s: selected_state if s == selected_state else "Other"
-    )
-
-    bar_fig = px.bar(
-        bar_df,
-        x="Premium Index",
-        y="state",
-        orientation="h",
-        color="Highlight",
-        color_discrete_map={
-            selected_state: "#d62728",
-            "Other": "#1f77b4",
-        },
-        title=f"{selected_insurance} premium index by state",
-        hover_data={
-            "Average Premium": ":$,.0f",
-            "Premium Index": ":.2f",
-            "disaster_count": True,
-            "Risk Score": ":.2f",
-        },
-    )
-
-    bar_fig.add_vline(
-        x=1.0,
-        line_dash="dash",
-        line_color="black",
-        annotation_text="National average",
+    stage("bar chart")
+    bar_df = merged_df.sort_values("Premium Index", ascending=True)
+
+    bar_fig = charts.premium_bar_figure(
+        bar_df["state"].to_numpy(),
+        bar_df["Premium Index"].to_numpy(),
+        bar_df["Average Premium"].to_numpy(),
+        bar_df["disaster_count"].to_numpy(),
+        bar_df["Risk Score"].to_numpy(),
+        selected_state,
+        selected_insurance,
     )
 
-    bar_fig.update_layout(
-        xaxis_title="Premium Index",
-        yaxis_title="State",
-        template="plotly_white",
-        legend_title_text="",
-    )
-
-    state_bar_chart = bar_fig.to_html(full_html=False)
+    figures["state_bar_chart"] = bar_fig
+    state_bar_chart = charts.to_html(bar_fig, div_id="state_bar_chart")
 
     # ---------------------------------------------------
     # TABLE: RISK VIEW BY STATE
     # ---------------------------------------------------
+    stage("table")
     table_df = (
         merged_df
         .rename(columns={
@@ -484,12 +409,34 @@ def home(request):
     table_df["Weather Index"] = table_df["Weather Index"].round(2)
     table_df["Average Premium"] = table_df["Average Premium"].map(lambda x: f"${x:,.0f}")
 
+    # multi-year trend of each state's premium (Auto only)
+    trend_columns = []
+    if selected_insurance == "Auto":
+        from dashboard.trends import projection_years, state_trends
+
+        projected_year = projection_years(auto_years)[0]
+        trend_df = state_trends(source)[["state", "cagr", f"projected_{projected_year}"]]
+        trend_df = trend_df.rename(columns={
+            "state": "State",
+            "cagr": "Premium CAGR",
+            f"projected_{projected_year}": f"Projected {projected_year}",
+        })
+        trend_columns = list(trend_df.columns[1:])
+        table_df = table_df.merge(trend_df, on="State", how="left")
+        table_df["Premium CAGR"] = table_df["Premium CAGR"].map(
+            lambda x: "" if pd.isna(x) else f"{x:.1%}"
+        )
+        table_df[trend_columns[1]] = table_df[trend_columns[1]].map(
+            lambda x: "" if pd.isna(x) else f"${x:,.0f}"
+        )
+
     table_df = table_df[
         [
             "State",
             "Risk Score",
             "Average Annual Disaster",
             "Average Premium",
+            *trend_columns,
             "Premium Index",
             "Severity Index",
             "Weather Index",
@@ -498,37 +445,27 @@ def home(request):
     # ---------------------------------------------------
     # CORRELATION SCATTER (DISASTER VS PREMIUM)
     # ---------------------------------------------------
+    stage("correlation chart")
     correlation_chart = None
 
     if not merged_df.empty:
-        scatter_fig = px.scatter(
-            merged_df,
-            x="disaster_count",
-            y="Premium Index",
-            color="Risk Score",
-            hover_name="state",
-            size="Risk Score",
-            labels={
-                "disaster_count": "Average Annual Disasters",
-                "Premium Index": "Premium Index",
-                "Risk Score": "Composite Risk Score"
-            },
-            title="Relationship Between Disaster Activity and Insurance Premiums",
-            color_continuous_scale=px.colors.sequential.Blues,
-            template="plotly_white"
+        scatter_fig = charts.correlation_figure(
+            merged_df["state"].to_numpy(),
+            merged_df["disaster_count"].to_numpy(),
+            merged_df["Premium Index"].to_numpy(),
+            merged_df["Risk Score"].to_numpy(),
         )
 
-        scatter_fig.update_layout(
-            xaxis_title="Average Annual FEMA Disasters",
-            yaxis_title="Premium Index (1.00 = National Average)",
-            coloraxis_colorbar=dict(
-                title="Risk Score",
-                tickformat=".2f"
-            )
-        )
+        figures["correlation_chart"] = scatter_fig
+        correlation_chart = charts.to_html(scatter_fig, div_id="correlation_chart")
 
-        correlation_chart = scatter_fig.to_html(full_html=False)
+    stage("map")
+    figures["us_map"] = charts.risk_map_figure(
+        merged_df["state"].to_numpy(),
+        merged_df["Risk Score"].to_numpy(),
+    )
 
+    stage("table html")
     naic_preview = table_df.to_html(
         index=False,
         classes="table table-striped table-sm",
@@ -538,6 +475,7 @@ def home(request):
     # ---------------------------------------------------
     # CONTEXT
     # ---------------------------------------------------
+    stage("context")
     context = {
         "insurance_types": insurance_types,
         "selected_insurance": selected_insurance,
@@ -551,16 +489,11 @@ def home(request):
         "fema_breakdown_chart": fema_breakdown_chart,
         "correlation_chart": correlation_chart,
         "state_bar_chart": state_bar_chart,
-        "us_map": px.choropleth(
-            merged_df,
-            locations="state",
-            locationmode="USA-states",
-            color="Risk Score",
-            scope="usa",
-            color_continuous_scale=px.colors.sequential.Blues,
-            template="plotly_white",
-        ).to_html(full_html=False),
+        "us_map": charts.to_html(figures["us_map"], div_id="us_map"),
         "naic_preview": naic_preview,
+        "bundle_url": reverse(
+            "bundle", kwargs={"version": data_version(), "insurance": selected_insurance}
+        ),
     }
 
-    return render(request, "home.html", context)
+    return {"context": context, "figures": figures, "table": table_df}
@@ -0,0 +1,2 @@
+# extractors package
+# Each extractor module exposes run(session=None) -> {"name", "path", "rows"}
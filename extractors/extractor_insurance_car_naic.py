@@ -3,12 +3,19 @@
 # Parses all tables and saves a single clean CSV into /data folder
 # Format:
 #   state, avg_2022, avg_2021, avg_2020, avg_2019, avg_2018
+#
+# The PDF is cached under /data/cache and revalidated with a conditional
+# GET (ETag / Last-Modified), so an unchanged report is not downloaded
+# again but a new one is picked up on the next run; page text is extracted on a process pool, and rows are parsed page by
+# page as the text arrives, in page order.
 
 import requests
-import io
-import csv
 import re
 import os
+import json
+import hashlib
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader
 import pandas as pd
 
@@ -18,56 +25,143 @@ import pandas as pd
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
-OUTPUT_FILE = os.path.join(DATA_DIR, "naic_auto_insurance.csv")
+OUTPUT_FILENAME = "naic_auto_insurance.csv"
+OUTPUT_FILE = os.path.join(DATA_DIR, OUTPUT_FILENAME)
+
+PDF_URL = "https://content.naic.org/sites/default/files/aut-db.pdf"
+
+# Pages handed to each worker at a time; every task re-opens the PDF,
+# so a handful of pages per task keeps that cost small
+PAGES_PER_TASK = 4
+
+# Match lines like:
+# Alabama 1123.45 1100.11 1023.22 999.00 876.12
+ROW_PATTERN = re.compile(
+    r"^([A-Za-z\s\.]+?)\s+([\d,]+(?:\.\d+)?)\s+([\d,]+(?:\.\d+)?)\s+"
+    r"([\d,]+(?:\.\d+)?)\s+([\d,]+(?:\.\d+)?)\s+([\d,]+(?:\.\d+)?)$"
+)
 
 # ---------------------------------------------------
-# Download PDF and extract text
+# Keep the PDF in /data/cache, revalidated on every run
 # ---------------------------------------------------
-def extract_text_from_pdf_url(url):
+def pdf_cache_file(url):
+    """Cache path for the PDF at url: its file name plus a hash of the whole URL."""
+    name = os.path.basename(urlparse(url).path) or "naic.pdf"
+    digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"naic_{digest}_{name}")
+
+def _read_validators(cache_file):
     try:
-        print(f"Downloading NAIC PDF from: {url}")
-        response = requests.get(url)
+        with open(cache_file + ".json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def download_pdf(url=PDF_URL, session=None, refresh=False):
+    """
+    Return the path of the cached PDF, downloading it when the server has a
+    newer one. refresh=True downloads it unconditionally.
+    """
+    cache_file = pdf_cache_file(url)
+    cached = os.path.exists(cache_file) and not refresh
+
+    headers = {}
+    if cached:
+        validators = _read_validators(cache_file)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    http = session or requests
+    print(f"{'Checking' if cached else 'Downloading'} NAIC PDF from: {url}")
+    try:
+        response = http.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            print(f"NAIC PDF unchanged, using cache: {cache_file}")
+            return cache_file
         response.raise_for_status()
+    except requests.RequestException as e:
+        if not cached:
+            raise
+        print(f"Could not revalidate the NAIC PDF ({e}), using cache: {cache_file}")
+        return cache_file
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = cache_file + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, cache_file)
+
+    with open(cache_file + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }, f)
+
+    return cache_file
 
-        pdf_file = io.BytesIO(response.content)
-        reader = PdfReader(pdf_file)
-
-        print(f"PDF pages: {len(reader.pages)}")
-
-        full_text = ""
-        for i, page in enumerate(reader.pages):
-            text = page.extract_text()
-            print(f"Extracting Page {i+1}")
-            full_text += text + "\n"
+# ---------------------------------------------------
+# Extract page text on a process pool
+# ---------------------------------------------------
+def _extract_pages(task):
+    """Worker: return the text of pages start..stop-1 of the PDF at path."""
+    path, start, stop = task
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def _page_chunks(tasks, workers):
+    if len(tasks) <= 1 or workers == 1:
+        yield from map(_extract_pages, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map keeps task order, so pages come back in order
+        yield from pool.map(_extract_pages, tasks)
+
+def iter_page_texts(pdf_path, workers=None):
+    """Yield the text of every page, in page order, as workers finish."""
+    page_count = len(PdfReader(pdf_path).pages)
+    print(f"PDF pages: {page_count}")
+
+    tasks = [
+        (pdf_path, start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+
+    page_no = 0
+    for texts in _page_chunks(tasks, workers):
+        for text in texts:
+            page_no += 1
+            print(f"Extracting Page {page_no}")
+            yield text
 
-        return full_text
+# ---------------------------------------------------
+# Download PDF and extract text
+# ---------------------------------------------------
+def extract_text_from_pdf_url(url, session=None):
+    try:
+        pdf_path = download_pdf(url, session)
+        return "".join(text + "\n" for text in iter_page_texts(pdf_path))
 
     except Exception as e:
         print(f"PDF extraction error: {e}")
         return None
 
 # ---------------------------------------------------
-# Parse all NAIC tables into rows
+# Parse NAIC table rows from one page of text
 # Returns a list of dictionaries
 # ---------------------------------------------------
-def parse_naic_tables(text):
-    print("Parsing NAIC tables...")
-
-    # Match lines like:
-    # Alabama 1123.45 1100.11 1023.22 999.00 876.12
-    row_pattern = re.compile(
-        r"^([A-Za-z\s\.]+?)\s+([\d,]+(?:\.\d+)?)\s+([\d,]+(?:\.\d+)?)\s+"
-        r"([\d,]+(?:\.\d+)?)\s+([\d,]+(?:\.\d+)?)\s+([\d,]+(?:\.\d+)?)$"
-    )
-
+def parse_naic_page(text):
     rows = []
 
     for line in text.splitlines():
         line = line.strip()
-        match = row_pattern.match(line)
+        match = ROW_PATTERN.match(line)
 
         if match:
             state = match.group(1).strip()
@@ -89,25 +183,55 @@ def parse_naic_tables(text):
                 }
             )
 
+    return rows
+
+def iter_naic_rows(page_texts):
+    """Parse each page as it arrives and yield its rows in page order."""
+    for text in page_texts:
+        yield from parse_naic_page(text)
+
+# ---------------------------------------------------
+# Parse all NAIC tables into rows
+# Returns a list of dictionaries
+# ---------------------------------------------------
+def parse_naic_tables(text):
+    print("Parsing NAIC tables...")
+    rows = parse_naic_page(text)
     print(f"Extracted {len(rows)} state rows from NAIC PDF.")
     return rows
 
 # ---------------------------------------------------
 # Save all rows into a single CSV file
 # ---------------------------------------------------
-def save_naic_csv(rows):
+def save_naic_csv(rows, output_file=OUTPUT_FILE):
     df = pd.DataFrame(rows)
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"Saved NAIC auto insurance data to: {OUTPUT_FILE}")
+    # replaced in one step, so readers never see a half written file
+    df.to_csv(output_file + ".part", index=False)
+    os.replace(output_file + ".part", output_file)
+    print(f"Saved NAIC auto insurance data to: {output_file}")
     print(df.head())
+    return df
+
+# ---------------------------------------------------
+# Entry point shared with run_all_extractors.py
+# ---------------------------------------------------
+def run(session=None, refresh=False, workers=None, data_dir=DATA_DIR) -> dict:
+    """Download (or reuse) the NAIC PDF, parse every table and save the CSV."""
+    pdf_path = download_pdf(PDF_URL, session, refresh=refresh)
+
+    print("Parsing NAIC tables...")
+    rows = list(iter_naic_rows(iter_page_texts(pdf_path, workers)))
+    print(f"Extracted {len(rows)} state rows from NAIC PDF.")
+
+    output_file = os.path.join(data_dir, OUTPUT_FILENAME)
+    df = save_naic_csv(rows, output_file)
+    return {"name": "naic", "path": output_file, "rows": len(df)}
 
 # ---------------------------------------------------
 # Main Execution
 # ---------------------------------------------------
 if __name__ == "__main__":
-    pdf_url = "https://content.naic.org/sites/default/files/aut-db.pdf"
-    text = extract_text_from_pdf_url(pdf_url)
-
-    if text:
-        rows = parse_naic_tables(text)
-        save_naic_csv(rows)
+    try:
+        run()
+    except Exception as e:
+        print(f"PDF extraction error: {e}")
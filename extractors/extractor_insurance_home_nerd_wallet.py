@@ -18,7 +18,8 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # Output CSV file
-OUTPUT_FILE = os.path.join(DATA_DIR, "nerdwallet_home.csv")
+OUTPUT_FILENAME = "nerdwallet_home.csv"
+OUTPUT_FILE = os.path.join(DATA_DIR, OUTPUT_FILENAME)
 
 # NerdWallet article URL
 NERDWALLET_URL = (
@@ -28,8 +29,9 @@ NERDWALLET_URL = (
 # ---------------------------------------------------
 # Download HTML from NerdWallet
 # ---------------------------------------------------
-def fetch_nerdwallet_html() -> str:
+def fetch_nerdwallet_html(session=None) -> str:
     """Download the NerdWallet HTML article as text."""
+    http = session or requests
 
     headers = {
         "User-Agent": (
@@ -40,7 +42,7 @@ def fetch_nerdwallet_html() -> str:
     }
 
     print(f"Requesting NerdWallet page: {NERDWALLET_URL}")
-    resp = requests.get(
+    resp = http.get(
         NERDWALLET_URL,
         headers=headers,
         timeout=60,
@@ -121,25 +123,36 @@ def clean_state_table(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
+# ---------------------------------------------------
+# Entry point shared with run_all_extractors.py
+# ---------------------------------------------------
+def run(session=None, data_dir=DATA_DIR) -> dict:
+    """Scrape the state table, build 2018-2022 panels and save the CSV."""
+    html = fetch_nerdwallet_html(session)
+    base_table = clean_state_table(extract_state_table(html))
+
+    all_years = []
+    for year in range(2018, 2023):  # 2018 through 2022
+        df_year = base_table.copy()
+        df_year["source_year"] = year
+        all_years.append(df_year)
+
+    combined = pd.concat(all_years, ignore_index=True)
+
+    output_file = os.path.join(data_dir, OUTPUT_FILENAME)
+    # replaced in one step, so readers never see a half written file
+    combined.to_csv(output_file + ".part", index=False)
+    os.replace(output_file + ".part", output_file)
+    print(f"\nSaved NerdWallet home insurance data to: {output_file}")
+    print(combined.head())
+    return {"name": "nerdwallet", "path": output_file, "rows": len(combined)}
+
 # ---------------------------------------------------
 # Main logic
 # ---------------------------------------------------
 def main():
     try:
-        html = fetch_nerdwallet_html()
-        base_table = clean_state_table(extract_state_table(html))
-
-        all_years = []
-        for year in range(2018, 2023):  # 2018 through 2022
-            df_year = base_table.copy()
-            df_year["source_year"] = year
-            all_years.append(df_year)
-
-        combined = pd.concat(all_years, ignore_index=True)
-
-        combined.to_csv(OUTPUT_FILE, index=False)
-        print(f"\nSaved NerdWallet home insurance data to: {OUTPUT_FILE}")
-        print(combined.head())
+        run()
 
     except Exception as e:
         print("\nError while processing NerdWallet data:")
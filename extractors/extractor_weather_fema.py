@@ -30,18 +30,31 @@ params = {
     "$format": "json"
 }
 
-print("Fetching FEMA Disaster Declarations Summary data...")
 
-try:
-    response = requests.get(url, params=params)
+# ---------------------------------------------------
+# Download declarations into a DataFrame
+# ---------------------------------------------------
+def fetch_fema_declarations(session=None) -> pd.DataFrame:
+    """Download the FEMA declarations summary table."""
+    http = session or requests
+
+    print("Fetching FEMA Disaster Declarations Summary data...")
+    response = http.get(url, params=params)
 
     if response.status_code != 200:
-        print(f"Failed to fetch data. Status code: {response.status_code}")
-        raise SystemExit(1)
+        raise RuntimeError(f"Failed to fetch data. Status code: {response.status_code}")
 
     # Parse JSON
     data = response.json()
-    df = pd.DataFrame(data["DisasterDeclarationsSummaries"])
+    return pd.DataFrame(data["DisasterDeclarationsSummaries"])
+
+
+# ---------------------------------------------------
+# Entry point shared with run_all_extractors.py
+# ---------------------------------------------------
+def run(session=None, data_dir=DATA_DIR) -> dict:
+    """Fetch FEMA declarations and save them to <data_dir>/fema_weather.csv."""
+    df = fetch_fema_declarations(session)
 
     # Print columns for debugging
     print("\nColumn Names:")
@@ -52,10 +65,21 @@ try:
     print("\nFirst 10 Rows:")
     print(df.head(10))
 
-    # Save dataset to /data folder
-    df.to_csv(OUTPUT_PATH, index=False)
+    # Save dataset to the data folder
+    output_path = os.path.join(data_dir, OUTPUT_FILENAME)
+    # replaced in one step, so readers never see a half written file
+    df.to_csv(output_path + ".part", index=False)
+    os.replace(output_path + ".part", output_path)
 
-    print(f"\nFEMA data saved to '{OUTPUT_PATH}'")
+    print(f"\nFEMA data saved to '{output_path}'")
+    return {"name": "fema", "path": output_path, "rows": len(df)}
 
-except Exception as e:
-    print(f"An error occurred: {e}")
+
+if __name__ == "__main__":
+    try:
+        run()
+    except RuntimeError as e:
+        print(e)
+        raise SystemExit(1)
+    except Exception as e:
+        print(f"An error occurred: {e}")
@@ -28,58 +28,82 @@ OUTPUT_PATH = os.path.join(DATA_DIR, OUTPUT_FILENAME)
 FTP_LIST_URL = "https://www1.ncdc.noaa.gov/pub/data/swdi/stormevents/csvfiles/"
 YEARS = [2018, 2019, 2020, 2021, 2022]
 
-print("Fetching available NOAA files from:")
-print(FTP_LIST_URL)
-
-response_list = requests.get(FTP_LIST_URL)
-if response_list.status_code != 200:
-    print(f"Failed to access NOAA list page, status code: {response_list.status_code}")
-    raise SystemExit(1)
-
-ftp_html = response_list.text
-all_dfs = []
 
 # ---------------------------------------------------
 # Download each year's compiled "details" file
 # ---------------------------------------------------
-for year in YEARS:
-    print(f"\nLooking for compiled StormEvents file for year {year}")
+def fetch_noaa_years(session=None) -> pd.DataFrame:
+    """Download and combine the StormEvents details file for every year in YEARS."""
+    http = session or requests
 
-    pattern = rf"StormEvents_details-ftp_v1\.0_d{year}_c\d+\.csv\.gz"
-    matches = re.findall(pattern, ftp_html)
+    print("Fetching available NOAA files from:")
+    print(FTP_LIST_URL)
 
-    if not matches:
-        print(f"Could not find compiled file for {year}, skipping.")
-        continue
+    response_list = http.get(FTP_LIST_URL)
+    if response_list.status_code != 200:
+        raise RuntimeError(
+            f"Failed to access NOAA list page, status code: {response_list.status_code}"
+        )
 
-    filename = matches[-1]  # latest compiled version
-    file_url = FTP_LIST_URL + filename
+    ftp_html = response_list.text
+    all_dfs = []
 
-    print(f"Downloading: {file_url}")
-    response_data = requests.get(file_url)
+    for year in YEARS:
+        print(f"\nLooking for compiled StormEvents file for year {year}")
 
-    if response_data.status_code != 200:
-        print(f"Failed to download file for {year}. Status: {response_data.status_code}")
-        continue
+        pattern = rf"StormEvents_details-ftp_v1\.0_d{year}_c\d+\.csv\.gz"
+        matches = re.findall(pattern, ftp_html)
 
-    with gzip.open(BytesIO(response_data.content), mode="rt") as f:
-        df_year = pd.read_csv(f)
+        if not matches:
+            print(f"Could not find compiled file for {year}, skipping.")
+            continue
 
-    df_year["YEAR"] = year
-    print(f"Loaded {len(df_year)} rows")
-    all_dfs.append(df_year)
+        filename = matches[-1]  # latest compiled version
+        file_url = FTP_LIST_URL + filename
 
-# ---------------------------------------------------
-# Combine and save to /data/noaa_weather.csv
-# ---------------------------------------------------
-if not all_dfs:
-    print("No datasets were downloaded. Exiting.")
-    raise SystemExit(1)
+        print(f"Downloading: {file_url}")
+        response_data = http.get(file_url)
+
+        if response_data.status_code != 200:
+            print(f"Failed to download file for {year}. Status: {response_data.status_code}")
+            continue
 
-combined_df = pd.concat(all_dfs, ignore_index=True)
+        # keep every column as published text; clean_all_data.py types
+        # the columns it uses (see utils/schemas.py)
+        with gzip.open(BytesIO(response_data.content), mode="rt") as f:
+            df_year = pd.read_csv(f, dtype=str)
 
-print("\nSaving combined NOAA data to:")
-print(OUTPUT_PATH)
-combined_df.to_csv(OUTPUT_PATH, index=False)
+        df_year["YEAR"] = year
+        print(f"Loaded {len(df_year)} rows")
+        all_dfs.append(df_year)
 
-print(f"Done. Saved {len(combined_df)} rows to {OUTPUT_PATH}")
+    if not all_dfs:
+        raise RuntimeError("No datasets were downloaded. Exiting.")
+
+    return pd.concat(all_dfs, ignore_index=True)
+
+
+# ---------------------------------------------------
+# Combine and save to /data/noaa_weather.csv
+# ---------------------------------------------------
+def run(session=None, data_dir=DATA_DIR) -> dict:
+    """Fetch every NOAA year and save the combined CSV."""
+    combined_df = fetch_noaa_years(session)
+
+    output_path = os.path.join(data_dir, OUTPUT_FILENAME)
+    print("\nSaving combined NOAA data to:")
+    print(output_path)
+    # replaced in one step, so readers never see a half written file
+    combined_df.to_csv(output_path + ".part", index=False)
+    os.replace(output_path + ".part", output_path)
+
+    print(f"Done. Saved {len(combined_df)} rows to {output_path}")
+    return {"name": "noaa", "path": output_path, "rows": len(combined_df)}
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except RuntimeError as e:
+        print(e)
+        raise SystemExit(1)
@@ -0,0 +1,204 @@
+# extractor_weather_openmeteo.py
+# Pulls daily precipitation and wind for every state from the Open-Meteo
+# historical archive and saves one row per state per day into /data.
+#
+# Replaces the archived per-day loop: the archive API accepts a date
+# range, so each request covers a whole batch of days, and the requests
+# run concurrently through utils.fetch_engine. Every batch and its daily
+# rows are checkpointed in SQLite (utils.checkpoint_store).
+#
+# Run from the project root:
+#   python -m extractors.extractor_weather_openmeteo
+#   python run_all_extractors.py --only openmeteo
+
+import argparse
+import os
+from datetime import date
+
+from utils import versions
+from utils.checkpoint_store import SQLiteCheckpointStore
+from utils.fetch_engine import FetchEngine, year_batches
+from utils.state_coords import US_STATE_COORDS
+from utils.versions import write_csv
+from utils.weather_classification import (
+    PRECIP_THRESHOLD_MM,
+    WIND_MAX_THRESHOLD_MS,
+    count_bad_weather_days,
+)
+
+# ---------------------------------------------------
+# Locate project root and /data folder
+# ---------------------------------------------------
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+os.makedirs(DATA_DIR, exist_ok=True)
+
+OUTPUT_FILENAME = "openmeteo_daily_weather.csv"
+COUNTS_FILENAME = "openmeteo_bad_weather_counts.csv"
+OUTPUT_FILE = os.path.join(DATA_DIR, OUTPUT_FILENAME)
+COUNTS_FILE = os.path.join(DATA_DIR, COUNTS_FILENAME)
+CHECKPOINT_FILE = os.path.join(CACHE_DIR, "weather_fetch.sqlite3")
+
+SOURCE = "openmeteo"
+
+# ---------------------------------------------------
+# Open-Meteo archive settings
+# ---------------------------------------------------
+BASE_URL = "https://archive-api.open-meteo.com/v1/archive"
+DAILY_FIELDS = ["precipitation_sum", "wind_speed_10m_max"]
+
+START_DATE = date(2018, 1, 1)
+END_DATE = date(2022, 12, 31)
+
+# One request per state per calendar year stays well inside the API's
+# range limit (utils.fetch_engine.year_batches)
+
+# Free tier allows 600 calls/minute and 5000/hour; stay under the hourly cap
+RATE_PER_SECOND = 1.3
+BURST = 10
+CONCURRENCY = 4
+
+
+# ---------------------------------------------------
+# Turn one archive response into daily checkpoint rows
+# ---------------------------------------------------
+def parse_daily_rows(key, payload):
+    """Return (state, date, precip_total, wind_max, raw_day) for each day."""
+    daily = (payload or {}).get("daily") or {}
+    days = daily.get("time") or []
+    columns = {field: daily.get(field) or [None] * len(days) for field in DAILY_FIELDS}
+
+    rows = []
+    for i, day in enumerate(days):
+        raw_day = {field: columns[field][i] for field in DAILY_FIELDS}
+        rows.append(
+            (
+                key[1],
+                day,
+                raw_day["precipitation_sum"],
+                raw_day["wind_speed_10m_max"],
+                raw_day,
+            )
+        )
+    return rows
+
+
+# ---------------------------------------------------
+# Build one task per state per date batch
+# ---------------------------------------------------
+def build_tasks(states=None, start=START_DATE, end=END_DATE, base_url=BASE_URL):
+    tasks = []
+    for state_code in states or US_STATE_COORDS:
+        info = US_STATE_COORDS[state_code]
+        for batch_start, batch_end in year_batches(start, end):
+            tasks.append(
+                {
+                    "key": (SOURCE, state_code, batch_start.isoformat()),
+                    "url": base_url,
+                    "parse": parse_daily_rows,
+                    "params": {
+                        "latitude": info["lat"],
+                        "longitude": info["lon"],
+                        "start_date": batch_start.isoformat(),
+                        "end_date": batch_end.isoformat(),
+                        "daily": ",".join(DAILY_FIELDS),
+                        "wind_speed_unit": "ms",
+                        "timezone": "UTC",
+                    },
+                }
+            )
+    return tasks
+
+
+# ---------------------------------------------------
+# Bad weather day counts from the cached daily rows
+# ---------------------------------------------------
+def write_bad_weather_counts(store, states=None,
+                             precip_threshold=PRECIP_THRESHOLD_MM,
+                             wind_threshold=WIND_MAX_THRESHOLD_MS,
+                             counts_file=COUNTS_FILE):
+    """Classify every cached day and save per state per year counts."""
+    counts = count_bad_weather_days(
+        store.daily_frame(SOURCE, states=states), precip_threshold, wind_threshold
+    )
+    write_csv(counts, counts_file)
+    print(f"Saved bad weather counts for {len(counts)} state years to {counts_file}")
+    return counts
+
+
+def recount(states=None, precip_threshold=PRECIP_THRESHOLD_MM,
+            wind_threshold=WIND_MAX_THRESHOLD_MS, checkpoint_path=CHECKPOINT_FILE,
+            root=DATA_DIR):
+    """
+    Recount bad days into a new data version and publish it. The published
+    version's files may be hard links shared with older versions, so they
+    are never rewritten in place.
+    """
+    version, version_path = versions.create_version(root)
+    with SQLiteCheckpointStore(checkpoint_path) as store:
+        counts = write_bad_weather_counts(
+            store, states, precip_threshold, wind_threshold,
+            counts_file=os.path.join(version_path, COUNTS_FILENAME),
+        )
+    versions.publish(root, version)
+    print(f"Published data version {version}")
+    return version, counts
+
+
+# ---------------------------------------------------
+# Entry point shared with run_all_extractors.py
+# ---------------------------------------------------
+def run(session=None, states=None, base_url=BASE_URL, checkpoint_path=CHECKPOINT_FILE,
+        data_dir=DATA_DIR) -> dict:
+    """Fetch every missing state/date batch, then write the daily CSV."""
+    with SQLiteCheckpointStore(checkpoint_path) as store:
+        engine = FetchEngine(
+            store,
+            rate=RATE_PER_SECOND,
+            burst=BURST,
+            concurrency=CONCURRENCY,
+            session=session,
+        )
+
+        tasks = build_tasks(states, base_url=base_url)
+        print(f"Open-Meteo: {len(tasks)} state/date batches")
+        counts = engine.run(tasks)
+        print(f"Open-Meteo fetch summary: {counts}")
+
+        df = store.daily_frame(SOURCE, states=states)
+        write_bad_weather_counts(
+            store, states, counts_file=os.path.join(data_dir, COUNTS_FILENAME)
+        )
+
+    df = df.rename(
+        columns={"precip_total": "precipitation_sum", "wind_max": "wind_speed_10m_max"}
+    )
+    output_file = os.path.join(data_dir, OUTPUT_FILENAME)
+    write_csv(df, output_file)
+    print(f"Saved {len(df)} daily rows to {output_file}")
+
+    if counts["stopped"] or counts["failed"]:
+        print("Some batches are missing; re-run to resume from the checkpoint.")
+
+    return {"name": "openmeteo", "path": output_file, "rows": len(df)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-Meteo daily weather pull")
+    parser.add_argument("--state", action="append", help="limit to this state code")
+    parser.add_argument(
+        "--recount-only",
+        action="store_true",
+        help="skip fetching and recount bad days from the cached rows",
+    )
+    parser.add_argument("--precip-threshold", type=float, default=PRECIP_THRESHOLD_MM)
+    parser.add_argument("--wind-threshold", type=float, default=WIND_MAX_THRESHOLD_MS)
+    args = parser.parse_args()
+
+    if args.recount_only:
+        recount(args.state, args.precip_threshold, args.wind_threshold)
+    else:
+        run(states=args.state)
@@ -1,56 +1,87 @@
-import subprocess
+import argparse
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from extractors import (
+    extractor_insurance_car_naic,
+    extractor_insurance_home_nerd_wallet,
+    extractor_weather_fema,
+    extractor_weather_noaa,
+    extractor_weather_openmeteo,
+)
+from utils import versions
+from utils.http import make_session
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-EXTRACTORS_DIR = os.path.join(BASE_DIR, "extractors")
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-# List of extractors to run
-EXTRACTOR_SCRIPTS = [
-    "extractor_weather_noaa.py",
-    "extractor_weather_fema.py",
-    "extractor_insurance_home_nerd_wallet.py",
-    "extractor_insurance_car_naic.py",
-]
-
-def run_extractor(script_name):
-    """Run a single extractor"""
-    script_path = os.path.join(EXTRACTORS_DIR, script_name)
+# Extractors to run, in order. Every entry point has the same
+# signature: run(session=None, data_dir=DATA_DIR) -> {"name", "path", "rows"}
+EXTRACTORS = {
+    "noaa": extractor_weather_noaa.run,
+    "fema": extractor_weather_fema.run,
+    "nerdwallet": extractor_insurance_home_nerd_wallet.run,
+    "naic": extractor_insurance_car_naic.run,
+    "openmeteo": extractor_weather_openmeteo.run,
+}
+
+# The daily Open-Meteo pull is long running and not used by the
+# dashboard yet, so it only runs when asked for with --only openmeteo
+DEFAULT_EXTRACTORS = ["noaa", "fema", "nerdwallet", "naic"]
+
+def run_extractor(name, session=None, data_dir=DATA_DIR):
+    """Run a single extractor in this process"""
     print(f"\n--------------------------------------------------")
-    print(f"Running: {script_name}")
+    print(f"Running: {name}")
     print(f"--------------------------------------------------")
 
-    result = subprocess.run(
-        [sys.executable, script_path],
-        capture_output=True,
-        text=True
-    )
-
-    if result.returncode != 0:
-        print(f"❌ ERROR running {script_name}")
-        print(result.stderr)
-        sys.exit(1)
-
-    print(result.stdout)
-    print(f"✔ Finished {script_name}")
-
-def verify_output():
+    start = time.perf_counter()
+    try:
+        result = EXTRACTORS[name](session=session, data_dir=data_dir)
+    except Exception as e:
+        print(f"❌ ERROR running {name}")
+        print(e)
+        raise
+
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    print(f"✔ Finished {name} ({result['rows']} rows, {result['seconds']}s)")
+    return result
+
+def run_extractors(names=None, parallel=1, session=None, data_dir=DATA_DIR):
+    """
+    Run the selected extractors in one process with a shared pooled session.
+    With parallel > 1 they run on a thread pool, which suits these
+    download bound jobs without paying for extra interpreters.
+    """
+    names = list(names or DEFAULT_EXTRACTORS)
+    session = session or make_session()
+
+    if parallel <= 1:
+        return [run_extractor(name, session, data_dir) for name in names]
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        return list(pool.map(lambda name: run_extractor(name, session, data_dir), names))
+
+def verify_output(names=None, data_dir=DATA_DIR):
     """Check that expected CSV files exist"""
     print("\nVerifying output files...")
 
-    expected_files = [
-        "noaa_weather.csv",
-        "fema_weather.csv",
-        "nerdwallet_home.csv",
-        "naic_auto_insurance.csv",
-    ]
+    expected_files = {
+        "noaa": "noaa_weather.csv",
+        "fema": "fema_weather.csv",
+        "nerdwallet": "nerdwallet_home.csv",
+        "naic": "naic_auto_insurance.csv",
+        "openmeteo": "openmeteo_daily_weather.csv",
+    }
 
     missing = []
 
-    for f in expected_files:
-        path = os.path.join(DATA_DIR, f)
+    for name in names or DEFAULT_EXTRACTORS:
+        f = expected_files[name]
+        path = os.path.join(data_dir, f)
         if not os.path.exists(path):
             missing.append(f)
 
@@ -64,15 +95,39 @@ def verify_output():
     print("✔ All extractor CSV files created successfully!")
     print("\nYour dashboard is ready to load fresh data.")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the data extractors in-process")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(EXTRACTORS),
+        help="run only this extractor (repeatable)",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="number of extractors to run at the same time",
+    )
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    args = parse_args()
+
     print("\n==============================================")
     print(" RUNNING ALL EXTRACTORS ")
     print("==============================================")
 
-    for script in EXTRACTOR_SCRIPTS:
-        run_extractor(script)
+    # download into a new data version; it is published once every file is there
+    version, version_path = versions.create_version(DATA_DIR)
+    try:
+        run_extractors(args.only, parallel=args.parallel, data_dir=version_path)
+    except Exception:
+        sys.exit(1)
 
-    verify_output()
+    verify_output(args.only, version_path)
+    versions.publish(DATA_DIR, version)
+    print(f"\nPublished data version {version}")
 
     print("\n==============================================")
     print(" ALL EXTRACTORS COMPLETED SUCCESSFULLY ")
@@ -0,0 +1,160 @@
+# utils/checkpoint_store.py
+#
+# SQLite checkpoint and raw result store for long weather pulls.
+# Finished fetches are keyed by (source, state, date) so "already fetched?"
+# is a set lookup loaded from the primary key index when the store opens,
+# and writes are buffered and flushed as one transaction per batch.
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    source TEXT NOT NULL,
+    state TEXT NOT NULL,
+    date TEXT NOT NULL,
+    payload TEXT,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (source, state, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS daily_weather (
+    source TEXT NOT NULL,
+    state TEXT NOT NULL,
+    date TEXT NOT NULL,
+    precip_total REAL,
+    wind_max REAL,
+    payload TEXT,
+    PRIMARY KEY (source, state, date)
+) WITHOUT ROWID;
+"""
+
+UPSERT_FETCH = """
+INSERT INTO fetches (source, state, date, payload, fetched_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (source, state, date) DO UPDATE SET
+    payload = excluded.payload,
+    fetched_at = excluded.fetched_at
+"""
+
+UPSERT_DAILY = """
+INSERT INTO daily_weather (source, state, date, precip_total, wind_max, payload)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (source, state, date) DO UPDATE SET
+    precip_total = excluded.precip_total,
+    wind_max = excluded.wind_max,
+    payload = excluded.payload
+"""
+
+
+class SQLiteCheckpointStore:
+    """
+    Checkpoint used by utils.fetch_engine.FetchEngine.
+
+    Keys are (source, state, date) tuples. save() accepts the raw API
+    payload plus optional parsed daily rows of the form
+    (state, date, precip_total, wind_max, payload_dict). Both are upserted,
+    so re-saving a key is harmless.
+    """
+
+    def __init__(self, path, batch_size=50):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending_fetches = []
+        self._pending_daily = []
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        # one index scan, then every is_done() is a set lookup
+        self._done = set(self.conn.execute("SELECT source, state, date FROM fetches"))
+
+    # ---------------------------------------------------
+    # Checkpoint interface
+    # ---------------------------------------------------
+    def is_done(self, key) -> bool:
+        return tuple(key) in self._done
+
+    def save(self, key, payload, daily_rows=None):
+        source, state, day = key
+        now = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            self._pending_fetches.append((source, state, day, json.dumps(payload), now))
+            for row in daily_rows or ():
+                row_state, row_date, precip, wind, raw = row
+                self._pending_daily.append(
+                    (source, row_state, row_date, precip, wind, json.dumps(raw))
+                )
+            self._done.add(tuple(key))
+
+            if len(self._pending_fetches) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending_fetches and not self._pending_daily:
+            return
+        with self.conn:
+            self.conn.executemany(UPSERT_DAILY, self._pending_daily)
+            self.conn.executemany(UPSERT_FETCH, self._pending_fetches)
+        self._pending_fetches = []
+        self._pending_daily = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------------------------------
+    # Reading results back
+    # ---------------------------------------------------
+    def results(self, source=None):
+        """Yield (key, payload) for every saved fetch."""
+        self.flush()
+        sql = "SELECT source, state, date, payload FROM fetches"
+        args = ()
+        if source:
+            sql += " WHERE source = ?"
+            args = (source,)
+        for src, state, day, payload in self.conn.execute(sql, args):
+            yield (src, state, day), json.loads(payload)
+
+    def daily_frame(self, source, states=None, start=None, end=None) -> pd.DataFrame:
+        """Return cached daily rows for one source as a DataFrame."""
+        self.flush()
+        sql = (
+            "SELECT state, date, precip_total, wind_max FROM daily_weather "
+            "WHERE source = ?"
+        )
+        args = [source]
+        if states:
+            sql += f" AND state IN ({','.join('?' * len(states))})"
+            args.extend(states)
+        if start:
+            sql += " AND date >= ?"
+            args.append(str(start))
+        if end:
+            sql += " AND date <= ?"
+            args.append(str(end))
+        sql += " ORDER BY state, date"
+        return pd.read_sql_query(sql, self.conn, params=args)
@@ -0,0 +1,255 @@
+# utils/fetch_engine.py
+#
+# Concurrent, rate limit aware fetcher for the per-state weather APIs.
+# The archived Open-Meteo and Visual Crossing scripts slept a fixed
+# amount between calls and gave up on the first 429. This engine keeps
+# a pool of workers busy under a token bucket that slows down on 429
+# (honouring Retry-After) and speeds back up while calls succeed, and it
+# records finished work in a checkpoint so an interrupted run resumes.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from utils.http import make_session
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when the API keeps answering 429 after every retry."""
+
+
+class RetriesExhausted(RuntimeError):
+    """Raised when network errors or 5xx responses outlast every retry."""
+
+
+class FatalFetchError(RuntimeError):
+    """Raised for responses that retrying cannot fix (bad key, no plan)."""
+
+
+# ---------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------
+class TokenBucket:
+    """
+    Thread safe token bucket with additive increase / multiplicative decrease.
+
+    rate      tokens added per second (requests per second)
+    capacity  largest burst allowed after an idle period
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=0.05, recovery=0.05):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, stop_event=None):
+        """Block until a request may be sent. Returns False if stop_event fires."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        return True
+                    wait = (1.0 - self.tokens) / self.rate
+
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+    def backoff(self, retry_after=None):
+        """Halve the rate and, if the server said so, pause everyone."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2.0)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def recover(self):
+        """Creep back toward the configured rate after a success."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# ---------------------------------------------------
+# Date batching
+# ---------------------------------------------------
+def year_batches(start: date, end: date):
+    """
+    Split start..end (inclusive) into calendar years, clipped to the range.
+    APIs that accept a date range get one call per year instead of per day,
+    and a batch always starts on the same date, so checkpoint keys stay put.
+    """
+    for year in range(start.year, end.year + 1):
+        yield max(start, date(year, 1, 1)), min(end, date(year, 12, 31))
+
+
+# ---------------------------------------------------
+# Fetch engine
+# ---------------------------------------------------
+class FetchEngine:
+    """
+    Run many GET requests concurrently under a shared TokenBucket.
+
+    Tasks are dicts with "key" (tuple), "url", optional "params" and an
+    optional "parse" callable that turns the payload into daily rows.
+    Finished work goes to checkpoint.save(key, payload, rows) (see
+    utils.checkpoint_store); keys the checkpoint already has are skipped
+    without a request.
+    """
+
+    def __init__(
+        self,
+        checkpoint,
+        rate=1.0,
+        burst=None,
+        concurrency=4,
+        max_retries=5,
+        retry_delay=1.0,
+        timeout=60,
+        session=None,
+    ):
+        self.checkpoint = checkpoint
+        self.limiter = TokenBucket(rate, capacity=burst)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.session = session or make_session(pool_size=max(concurrency, 1))
+        self._stop = threading.Event()
+
+    def _wait(self, attempt):
+        """Exponential pause before retrying a network error or 5xx."""
+        self._stop.wait(min(30, self.retry_delay * 2 ** attempt))
+
+    def _fetch_one(self, task):
+        key = tuple(task["key"])
+        rate_limited = False
+
+        for attempt in range(self.max_retries + 1):
+            if not self.limiter.acquire(self._stop):
+                return "stopped"
+
+            try:
+                resp = self.session.get(
+                    task["url"], params=task.get("params"), timeout=self.timeout
+                )
+            except Exception as e:
+                print(f"Request error for {key}: {e}")
+                rate_limited = False
+                self._wait(attempt)
+                continue
+
+            if resp.status_code == 200:
+                self.limiter.recover()
+                try:
+                    payload = resp.json()
+                    parse = task.get("parse")
+                    rows = parse(key, payload) if parse else None
+                except (ValueError, KeyError, TypeError) as e:
+                    # a 200 with an HTML error page or an unexpected shape;
+                    # not checkpointed, so the next run tries it again
+                    print(f"Bad payload for {key}: {e!r}, body: {resp.text[:200]}")
+                    return "failed"
+                self.checkpoint.save(key, payload, rows)
+                return "fetched"
+
+            if resp.status_code == 429:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                print(f"429 for {key}, backing off (Retry-After={retry_after})")
+                rate_limited = True
+                self.limiter.backoff(retry_after or min(60, 2 ** attempt))
+                continue
+
+            if resp.status_code in (401, 403):
+                raise FatalFetchError(
+                    f"Status {resp.status_code} for {key}; check key or subscription"
+                )
+
+            if resp.status_code >= 500:
+                print(f"Status {resp.status_code} for {key}, retrying")
+                rate_limited = False
+                self._wait(attempt)
+                continue
+
+            print(f"Warning {key} status {resp.status_code}, body: {resp.text[:200]}")
+            return "failed"
+
+        if rate_limited:
+            raise RateLimitExceeded(f"Still rate limited on {key} after {self.max_retries} retries")
+        raise RetriesExhausted(
+            f"Gave up on {key} after {self.max_retries} retries of network errors / 5xx"
+        )
+
+    def _worker(self, task):
+        if self._stop.is_set():
+            return "stopped"
+        try:
+            return self._fetch_one(task)
+        except (RateLimitExceeded, RetriesExhausted, FatalFetchError) as e:
+            # a daily quota, an outage or a bad key, so let the rest of the
+            # run drain quickly; the checkpoint lets the next run pick up here
+            print(f"Stopping run: {e}")
+            self._stop.set()
+            return "stopped"
+
+    def run(self, tasks) -> dict:
+        """Fetch every task that is not checkpointed yet. Returns status counts."""
+        counts = {"fetched": 0, "skipped": 0, "failed": 0, "stopped": 0}
+
+        pending = []
+        for task in tasks:
+            if self.checkpoint.is_done(task["key"]):
+                counts["skipped"] += 1
+            else:
+                pending.append(task)
+
+        if pending:
+            try:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    for status in pool.map(self._worker, pending):
+                        counts[status] += 1
+            finally:
+                self.checkpoint.flush()
+
+        return counts
@@ -0,0 +1,46 @@
+# utils/incidents.py
+#
+# FEMA incidentType → broad incident group used by the dashboard's
+# severity score and disaster mix chart.
+
+import numpy as np
+import pandas as pd
+
+from utils.vectorized import map_unique
+
+INCIDENT_GROUPS = ["Hurricane", "Flood", "Fire", "Severe Storm", "Winter", "Other"]
+
+
+def incident_group(value):
+    """
+    Examples:
+        Hurricane → Hurricane
+        Severe Ice Storm → Severe Storm
+        Biological → Other
+    Missing values map to Other, as str(nan) does in the dashboard.
+    """
+    cat = str(value).upper()
+    if "HURRICANE" in cat or "TROPICAL" in cat:
+        return "Hurricane"
+    if "FLOOD" in cat:
+        return "Flood"
+    if "FIRE" in cat or "WILDFIRE" in cat:
+        return "Fire"
+    if "STORM" in cat or "TORNADO" in cat or "WIND" in cat or "HAIL" in cat:
+        return "Severe Storm"
+    if "SNOW" in cat or "BLIZZARD" in cat or "FREEZE" in cat or "WINTER" in cat or "ICE" in cat:
+        return "Winter"
+    return "Other"
+
+
+def incident_group_series(series):
+    """
+    Column version of incident_group.
+    Missing incident types stay missing, so callers can tell them apart.
+    """
+    def groups(uniques):
+        return np.array(
+            [None if pd.isna(v) else incident_group(v) for v in uniques], dtype=object
+        )
+
+    return map_unique(series, groups)
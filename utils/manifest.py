@@ -0,0 +1,114 @@
+# utils/manifest.py
+#
+# Manifest of cleaned datasets. For every dataset it records the content
+# hash, size, row count and columns of each raw input and clean output,
+# plus a hash of the cleaner code, so a re-run can skip datasets whose
+# inputs and code have not changed.
+
+import hashlib
+import inspect
+import json
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+MANIFEST_NAME = "clean_manifest.json"
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_columns(path):
+    """Header of a CSV file without reading any rows."""
+    return [str(c) for c in pd.read_csv(path, nrows=0).columns]
+
+
+def fingerprint(path, rows=None, columns=None, previous=None):
+    """
+    Describe one file. When size and mtime match the previous record the
+    stored hash is reused, so unchanged multi hundred MB files are not re-read.
+    """
+    stat = os.stat(path)
+    if previous and previous.get("bytes") == stat.st_size \
+            and previous.get("mtime_ns") == stat.st_mtime_ns:
+        digest = previous["sha256"]
+    else:
+        digest = sha256_file(path)
+
+    return {
+        "sha256": digest,
+        "bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": rows if rows is not None else (previous or {}).get("rows"),
+        "columns": columns if columns is not None else read_columns(path),
+    }
+
+
+def file_matches(path, record):
+    """True if path still holds the content described by record."""
+    if not record or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_size != record.get("bytes"):
+        return False
+    if stat.st_mtime_ns == record.get("mtime_ns"):
+        return True
+    return sha256_file(path) == record.get("sha256")
+
+
+def code_version(*objects):
+    """Hash the source of the given functions or modules."""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {"datasets": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    """Write the manifest atomically so a crash never leaves half a file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(entry, inputs, outputs, version):
+    """
+    entry    manifest record for the dataset (or None)
+    inputs   {name: path} of raw files the cleaner reads
+    outputs  {name: path} of files the cleaner writes
+    version  current cleaner code_version
+    """
+    if not entry or entry.get("cleaner_version") != version:
+        return False
+
+    recorded_in = entry.get("inputs", {})
+    recorded_out = entry.get("outputs", {})
+    if set(recorded_in) != set(inputs) or set(recorded_out) != set(outputs):
+        return False
+
+    return all(file_matches(path, recorded_in[name]) for name, path in inputs.items()) \
+        and all(file_matches(path, recorded_out[name]) for name, path in outputs.items())
+
+
+def make_entry(version, inputs, outputs):
+    """inputs / outputs map file name to a fingerprint() record."""
+    return {
+        "cleaner_version": version,
+        "cleaned_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "inputs": inputs,
+        "outputs": outputs,
+    }
@@ -0,0 +1,120 @@
+# utils/run_report.py
+#
+# Per-stage measurements for pipeline runs, written as one JSON report
+# per run so throughput can be compared across refreshes.
+#
+# Every stage records wall time, CPU time (this process plus finished
+# child processes), peak RSS, bytes downloaded and rows in / out.
+
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+def _peak_rss_mb():
+    """High-water RSS of this process in MB (VmHWM on Linux)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss():
+    """
+    Reset VmHWM so the next reading covers one stage only. Needs Linux;
+    elsewhere the peak is the high-water mark since the process started.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _children_peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def _cpu_seconds():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class RunReport:
+    """
+    Collects stage records:
+
+        report = RunReport(options)
+        with report.stage("clean") as record:
+            record["rows_in"] = ...
+        report.write(reports_dir)
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.started_at = datetime.now(timezone.utc)
+        self.stages = []
+        self._start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+
+    @contextmanager
+    def stage(self, name):
+        record = {
+            "stage": name,
+            "status": "ok",
+            "rows_in": 0,
+            "rows_out": 0,
+            "bytes_downloaded": 0,
+        }
+        per_stage_peak = _reset_peak_rss()
+        start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield record
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - start, 3)
+            record["cpu_seconds"] = round(_cpu_seconds() - cpu_start, 3)
+            record["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+            record["peak_rss_scope"] = "stage" if per_stage_peak else "process"
+            record["children_peak_rss_mb"] = round(_children_peak_rss_mb(), 1)
+            self.stages.append(record)
+
+    def as_dict(self):
+        wall = time.perf_counter() - self._start
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "status": "failed" if any(s["status"] == "failed" for s in self.stages) else "ok",
+            "options": self.options,
+            "stages": self.stages,
+            "total": {
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(_cpu_seconds() - self._cpu_start, 3),
+                "peak_rss_mb": round(max([s["peak_rss_mb"] for s in self.stages] or [0]), 1),
+                "bytes_downloaded": sum(s["bytes_downloaded"] for s in self.stages),
+            },
+        }
+
+    def write(self, reports_dir):
+        """Write pipeline-<UTC timestamp>.json into reports_dir and return its path."""
+        os.makedirs(reports_dir, exist_ok=True)
+        name = f"pipeline-{self.started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+        path = os.path.join(reports_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
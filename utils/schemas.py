@@ -0,0 +1,253 @@
+# utils/schemas.py
+#
+# One declarative schema per dataset and stage, so every read_csv in the
+# project gets explicit dtype / usecols / parse_dates instead of letting
+# pandas infer (and re-infer) types.
+#
+#   dtypes     column -> pandas dtype
+#   suffixes   optional (name suffixes, dtype) pairs for columns that are
+#              not listed, matched case-insensitively
+#   default    dtype for columns not listed (None lets pandas infer)
+#   dates      columns parsed with parse_dates
+#   required   columns the stage cannot work without
+#
+# Raw files are read as text: the cleaners convert the columns they care
+# about and pass everything else through as published. Clean files are
+# read back with the types the cleaners wrote.
+
+import pandas as pd
+
+
+class SchemaError(ValueError):
+    """A file is missing columns its schema requires."""
+
+
+NUMERIC_DTYPES = {"float64", "Int64"}
+
+AUTO_YEARS = [2018, 2019, 2020, 2021, 2022]
+AUTO_PREMIUM_COLUMNS = [f"avg_{year}" for year in AUTO_YEARS]
+
+# Numeric columns of the NOAA Storm Events details files
+NOAA_NUMERIC_COLUMNS = [
+    "BEGIN_YEARMONTH", "BEGIN_DAY", "BEGIN_TIME",
+    "END_YEARMONTH", "END_DAY", "END_TIME",
+    "EPISODE_ID", "EVENT_ID", "STATE_FIPS", "CZ_FIPS",
+    "INJURIES_DIRECT", "INJURIES_INDIRECT", "DEATHS_DIRECT", "DEATHS_INDIRECT",
+    "MAGNITUDE", "CATEGORY", "TOR_LENGTH", "TOR_WIDTH", "TOR_OTHER_CZ_FIPS",
+    "BEGIN_RANGE", "END_RANGE",
+    "BEGIN_LAT", "BEGIN_LON", "END_LAT", "END_LON",
+    "YEAR",
+]
+
+# Any other NOAA column named like these is converted to float by
+# clean_all_data.normalize_noaa
+NOAA_FLOAT_SUFFIXES = ("temp", "temperature", "precip", "rain", "snow")
+
+
+# ---------------------------------------------------
+# Schemas
+# ---------------------------------------------------
+SCHEMAS = {
+    "naic": {
+        "raw": {
+            # premiums arrive as text like "1,123.45"
+            "dtypes": {"state": str, **{col: str for col in AUTO_PREMIUM_COLUMNS}},
+            "default": str,
+            "dates": [],
+            "required": ["state"],
+        },
+        "clean": {
+            "dtypes": {"state": str, **{col: "float64" for col in AUTO_PREMIUM_COLUMNS}},
+            "default": None,
+            "dates": [],
+            "required": ["state"],
+        },
+    },
+    "nerdwallet": {
+        "raw": {
+            "dtypes": {
+                "state": str,
+                "avg_annual_usd": str,
+                "avg_monthly_usd": "float64",
+                "source_year": str,
+            },
+            "default": str,
+            "dates": [],
+            "required": ["state"],
+        },
+        "clean": {
+            "dtypes": {
+                "state": str,
+                "avg_annual_usd": "float64",
+                "avg_monthly_usd": "float64",
+                "source_year": "Int64",
+                "year": "Int64",
+            },
+            "default": None,
+            "dates": [],
+            "required": ["state"],
+        },
+    },
+    "fema": {
+        "raw": {
+            "dtypes": {},
+            "default": str,
+            "dates": [],
+            "required": [],
+        },
+        "clean": {
+            "dtypes": {
+                "state": str,
+                "year": "Int64",
+                "disasterNumber": "Int64",
+                "fyDeclared": "Int64",
+                "declarationType": "category",
+                "incidentType": "category",
+            },
+            "default": str,
+            "dates": ["declarationDate"],
+            "required": ["state"],
+        },
+    },
+    "noaa": {
+        "raw": {
+            "dtypes": {},
+            "default": str,
+            "dates": [],
+            "required": [],
+        },
+        "clean": {
+            "dtypes": {
+                "state": str,
+                "year": "Int64",
+                **{col: "float64" for col in NOAA_NUMERIC_COLUMNS},
+            },
+            "suffixes": [(NOAA_FLOAT_SUFFIXES, "float64")],
+            "default": str,
+            "dates": [],
+            "required": ["state"],
+        },
+    },
+    # pre-aggregated tables written by utils/summaries.py; the "stage" is
+    # the table name
+    "summary": {
+        "premiums": {
+            "dtypes": {
+                "insurance": str, "state": str, "year": "Int64",
+                "total": "float64", "n": "int64", "first": "float64",
+            },
+            "default": None,
+            "dates": [],
+            "required": ["insurance", "state"],
+        },
+        "fema_counts": {
+            "dtypes": {"state": str, "disaster_count": "int64"},
+            "default": None,
+            "dates": [],
+            "required": ["state"],
+        },
+        "fema_groups": {
+            "dtypes": {"state": str, "incident_group": str, "count": "int64"},
+            "default": None,
+            "dates": [],
+            "required": ["state"],
+        },
+        "noaa_state_year": {
+            "dtypes": {
+                "state": str, "year": "Int64", "metric": str, "position": "int64",
+                "total": "float64", "n": "int64",
+            },
+            "default": None,
+            "dates": [],
+            "required": ["state"],
+        },
+    },
+}
+
+
+def get_schema(name, stage):
+    return SCHEMAS[name][stage]
+
+
+def column_dtype(schema, col):
+    """The dtype schema gives col: listed, else by suffix, else the default."""
+    if col in schema["dtypes"]:
+        return schema["dtypes"][col]
+    for suffixes, dtype in schema.get("suffixes", ()):
+        if str(col).lower().endswith(suffixes):
+            return dtype
+    return schema["default"]
+
+
+def numeric_columns(name, stage="clean", header=None):
+    """
+    Columns the schema types as numbers: the listed ones in declaration
+    order or, given a file header, those of its columns in file order
+    (suffix matches included).
+    """
+    schema = get_schema(name, stage)
+    columns = schema["dtypes"] if header is None else header
+    return [col for col in columns if column_dtype(schema, col) in NUMERIC_DTYPES]
+
+
+def read_header(path):
+    return [str(col) for col in pd.read_csv(path, nrows=0).columns]
+
+
+# ---------------------------------------------------
+# read_csv options from a schema
+# ---------------------------------------------------
+def read_options(schema, header, usecols=None):
+    """dtype / usecols / parse_dates for the columns of header that are wanted."""
+    wanted = [col for col in header if usecols is None or col in usecols]
+    dates = [col for col in schema["dates"] if col in wanted]
+
+    dtype = {}
+    for col in wanted:
+        if col in dates:
+            continue
+        col_type = column_dtype(schema, col)
+        if col_type is not None:
+            dtype[col] = col_type
+
+    return {
+        "usecols": wanted if usecols is not None else None,
+        "dtype": dtype,
+        "parse_dates": dates or None,
+    }
+
+
+def empty_frame(schema, columns):
+    return pd.DataFrame(
+        {
+            col: pd.Series(dtype=column_dtype(schema, col) or object)
+            for col in columns
+        }
+    )
+
+
+def read_dataset(name, stage, path, usecols=None, chunksize=None, missing="raise"):
+    """
+    Read one dataset file with its schema.
+
+    usecols    only read these columns (ones the file lacks are ignored)
+    chunksize  return an iterator of frames, as pd.read_csv does
+    missing    "raise" raises SchemaError when required columns are absent,
+               "empty" returns an empty frame instead, with the required
+               columns plus usecols (or the header), inside an iterator
+               when chunksize is set
+    """
+    schema = get_schema(name, stage)
+    header = read_header(path)
+
+    absent = [col for col in schema["required"] if col not in header]
+    if absent:
+        if missing == "empty":
+            # no rows, but every column a caller may index
+            wanted = header if usecols is None else usecols
+            frame = empty_frame(schema, list(dict.fromkeys([*schema["required"], *wanted])))
+            return iter([frame]) if chunksize else frame
+        raise SchemaError(f"{path} is missing required columns {absent} for {name} {stage}")
+
+    options = read_options(schema, header, usecols)
+    return pd.read_csv(path, chunksize=chunksize, **options)
@@ -0,0 +1,55 @@
+# utils/state_coords.py
+
+# Representative coordinates for each state, used by the daily weather fetchers
+US_STATE_COORDS = {
+    "AL": {"name": "Alabama", "lat": 32.3182, "lon": -86.9023},
+    "AK": {"name": "Alaska", "lat": 66.1605, "lon": -153.3691},
+    "AZ": {"name": "Arizona", "lat": 34.0489, "lon": -111.0937},
+    "AR": {"name": "Arkansas", "lat": 34.7999, "lon": -92.1999},
+    "CA": {"name": "California", "lat": 36.7783, "lon": -119.4179},
+    "CO": {"name": "Colorado", "lat": 39.1130, "lon": -105.3589},
+    "CT": {"name": "Connecticut", "lat": 41.6032, "lon": -73.0877},
+    "DE": {"name": "Delaware", "lat": 38.9108, "lon": -75.5277},
+    "FL": {"name": "Florida", "lat": 27.6648, "lon": -81.5158},
+    "GA": {"name": "Georgia", "lat": 32.1656, "lon": -82.9001},
+    "HI": {"name": "Hawaii", "lat": 19.7418, "lon": -155.8444},
+    "ID": {"name": "Idaho", "lat": 44.0682, "lon": -114.7420},
+    "IL": {"name": "Illinois", "lat": 40.0, "lon": -89.0},
+    "IN": {"name": "Indiana", "lat": 39.8494, "lon": -86.2583},
+    "IA": {"name": "Iowa", "lat": 41.8780, "lon": -93.0977},
+    "KS": {"name": "Kansas", "lat": 39.0119, "lon": -98.4842},
+    "KY": {"name": "Kentucky", "lat": 37.8393, "lon": -84.2700},
+    "LA": {"name": "Louisiana", "lat": 30.9843, "lon": -91.9623},
+    "ME": {"name": "Maine", "lat": 45.2538, "lon": -69.4455},
+    "MD": {"name": "Maryland", "lat": 39.0458, "lon": -76.6413},
+    "MA": {"name": "Massachusetts", "lat": 42.4072, "lon": -71.3824},
+    "MI": {"name": "Michigan", "lat": 44.3148, "lon": -85.6024},
+    "MN": {"name": "Minnesota", "lat": 46.7296, "lon": -94.6859},
+    "MS": {"name": "Mississippi", "lat": 32.3547, "lon": -89.3985},
+    "MO": {"name": "Missouri", "lat": 37.9643, "lon": -91.8318},
+    "MT": {"name": "Montana", "lat": 46.8797, "lon": -110.3626},
+    "NE": {"name": "Nebraska", "lat": 41.4925, "lon": -99.9018},
+    "NV": {"name": "Nevada", "lat": 38.8026, "lon": -116.4194},
+    "NH": {"name": "New Hampshire", "lat": 43.1939, "lon": -71.5724},
+    "NJ": {"name": "New Jersey", "lat": 40.0583, "lon": -74.4057},
+    "NM": {"name": "New Mexico", "lat": 34.5199, "lon": -105.8701},
+    "NY": {"name": "New York", "lat": 43.0, "lon": -75.0},
+    "NC": {"name": "North Carolina", "lat": 35.7596, "lon": -79.0193},
+    "ND": {"name": "North Dakota", "lat": 47.5515, "lon": -101.0020},
+    "OH": {"name": "Ohio", "lat": 40.4173, "lon": -82.9071},
+    "OK": {"name": "Oklahoma", "lat": 35.4676, "lon": -97.5164},
+    "OR": {"name": "Oregon", "lat": 43.8041, "lon": -120.5542},
+    "PA": {"name": "Pennsylvania", "lat": 41.2033, "lon": -77.1945},
+    "RI": {"name": "Rhode Island", "lat": 41.5801, "lon": -71.4774},
+    "SC": {"name": "South Carolina", "lat": 33.8361, "lon": -81.1637},
+    "SD": {"name": "South Dakota", "lat": 43.9695, "lon": -99.9018},
+    "TN": {"name": "Tennessee", "lat": 35.5175, "lon": -86.5804},
+    "TX": {"name": "Texas", "lat": 31.0, "lon": -100.0},
+    "UT": {"name": "Utah", "lat": 39.3200, "lon": -111.0937},
+    "VT": {"name": "Vermont", "lat": 44.5588, "lon": -72.5778},
+    "VA": {"name": "Virginia", "lat": 37.4316, "lon": -78.6569},
+    "WA": {"name": "Washington", "lat": 47.7511, "lon": -120.7401},
+    "WV": {"name": "West Virginia", "lat": 38.5976, "lon": -80.4549},
+    "WI": {"name": "Wisconsin", "lat": 44.5, "lon": -89.5},
+    "WY": {"name": "Wyoming", "lat": 43.0759, "lon": -107.2903},
+}
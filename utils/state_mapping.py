@@ -1,5 +1,9 @@
 # utils/state_mapping.py
 
+import numpy as np
+
+from utils.vectorized import map_unique
+
 STATE_MAP = {
     "ALABAMA": "AL", "AL": "AL",
     "ALASKA": "AK", "AK": "AK",
@@ -73,3 +77,14 @@ def normalize_state(value):
         return None
 
     return STATE_MAP.get(key)
+
+
+def normalize_state_series(series):
+    """
+    Column version of normalize_state.
+    Only the distinct values are normalized, then mapped back onto every row,
+    so a FEMA or NOAA column with millions of rows costs a few dozen calls.
+    """
+    return map_unique(
+        series, lambda uniques: np.array([normalize_state(v) for v in uniques], dtype=object)
+    )
@@ -0,0 +1,196 @@
+# utils/summaries.py
+#
+# Small pre-aggregated tables built from the clean files at the end of
+# clean_all_data.py. They hold everything the dashboard shows, so the
+# view reads a few KB instead of the full FEMA / NOAA files:
+#
+#   summary_premiums.csv         insurance, state, year, total, n, first
+#   summary_fema_counts.csv      state, disaster_count
+#   summary_fema_groups.csv      state, incident_group, count
+#   summary_noaa_state_year.csv  state, year, metric, position, total, n
+#
+# Means are stored as total and n (non-null count), so per-state,
+# per-state-year and national means are exact regroupings of these rows.
+
+import os
+
+import pandas as pd
+
+from utils import schemas
+from utils.incidents import incident_group_series
+
+SUMMARY_FILES = {
+    "premiums": "summary_premiums.csv",
+    "fema_counts": "summary_fema_counts.csv",
+    "fema_groups": "summary_fema_groups.csv",
+    "noaa_state_year": "summary_noaa_state_year.csv",
+}
+
+CLEAN_FILES = {
+    "naic": "clean_naic_auto_insurance.csv",
+    "nerdwallet": "clean_nerdwallet_home.csv",
+    "fema": "clean_fema_weather.csv",
+    "noaa": "clean_noaa_weather.csv",
+}
+
+# rows per chunk when reading the large clean files
+CHUNK_ROWS = 200_000
+
+
+# ---------------------------------------------------
+# NOAA
+# ---------------------------------------------------
+def noaa_metrics(columns):
+    """Numeric NOAA columns in file order; these feed the weather index."""
+    numeric = schemas.numeric_columns("noaa", header=columns)
+    return [c for c in numeric if c not in ("state", "year")]
+
+
+def aggregate_noaa(df_noaa, metrics):
+    """Sum and non-null count of every metric per state and year (year may be missing)."""
+    columns = ["state", "year", "metric", "position", "total", "n"]
+    if df_noaa.empty or not metrics:
+        return pd.DataFrame(columns=columns)
+
+    grouped = df_noaa.groupby(["state", "year"], dropna=False, sort=False)[metrics]
+    sums = grouped.sum().stack(future_stack=True).rename("total")
+    counts = grouped.count().stack(future_stack=True).rename("n")
+    out = pd.concat([sums, counts], axis=1).reset_index()
+    out.columns = ["state", "year", "metric", "total", "n"]
+    out["position"] = out["metric"].map({m: i for i, m in enumerate(metrics)})
+    return out[columns]
+
+
+def summarize_noaa(path, chunksize=CHUNK_ROWS):
+    numeric = schemas.numeric_columns("noaa", header=schemas.read_header(path))
+    chunks = schemas.read_dataset(
+        "noaa", "clean", path,
+        usecols=["state", "year", *numeric],
+        chunksize=chunksize, missing="empty",
+    )
+    # sums and counts add up across chunks, so memory stays at one chunk
+    partials = [aggregate_noaa(chunk, noaa_metrics(chunk.columns)) for chunk in chunks]
+    partials = [p for p in partials if not p.empty]
+    if not partials:
+        return aggregate_noaa(pd.DataFrame(), [])
+
+    return (
+        pd.concat(partials, ignore_index=True)
+        .groupby(["state", "year", "metric", "position"], dropna=False, as_index=False)
+        [["total", "n"]]
+        .sum()
+        .sort_values(["state", "year", "position"], na_position="last")
+        .reset_index(drop=True)
+    )
+
+
+# ---------------------------------------------------
+# FEMA
+# ---------------------------------------------------
+def summarize_fema(path, chunksize=CHUNK_ROWS):
+    """Declarations per state, and per state and incident group (missing type kept as NaN)."""
+    chunks = schemas.read_dataset(
+        "fema", "clean", path,
+        usecols=["state", "incidentType"], chunksize=chunksize, missing="empty",
+    )
+    partials = []
+    for chunk in chunks:
+        chunk = chunk.reindex(columns=["state", "incidentType"])
+        groups = incident_group_series(chunk["incidentType"]).astype(object)
+        partials.append(
+            chunk[["state"]].assign(incident_group=groups)
+            .groupby(["state", "incident_group"], dropna=False)
+            .size()
+            .rename("count")
+        )
+
+    if partials:
+        groups = pd.concat(partials).groupby(level=[0, 1], dropna=False).sum().reset_index()
+    else:
+        groups = pd.DataFrame(columns=["state", "incident_group", "count"])
+    groups = groups.sort_values(["state", "incident_group"], na_position="last")
+    groups = groups.astype({"count": "int64"}).reset_index(drop=True)
+
+    counts = (
+        groups.groupby("state", as_index=False)["count"].sum()
+        .rename(columns={"count": "disaster_count"})
+    )
+    return counts, groups
+
+
+# ---------------------------------------------------
+# Premiums
+# ---------------------------------------------------
+def summarize_premiums(naic_path, nerd_path):
+    """
+    One row per insurance, state and year. For auto, "first" is the premium
+    on the state's first NAIC row, which the trend chart plots.
+    """
+    columns = ["insurance", "state", "year", "total", "n", "first"]
+
+    auto = schemas.read_dataset(
+        "naic", "clean", naic_path,
+        usecols=["state", *schemas.AUTO_PREMIUM_COLUMNS], missing="empty",
+    ).reindex(columns=["state", *schemas.AUTO_PREMIUM_COLUMNS])
+    auto_long = auto.melt(id_vars="state", var_name="year", value_name="premium")
+    auto_long["year"] = auto_long["year"].str[4:].astype("int64")
+    auto_sum = _total_n(auto_long, ["state", "year"], "premium")
+
+    first = auto.drop_duplicates("state", keep="first").melt(
+        id_vars="state", var_name="year", value_name="first"
+    )
+    first["year"] = first["year"].str[4:].astype("int64")
+    auto_sum = auto_sum.merge(first, on=["state", "year"], how="left")
+    auto_sum.insert(0, "insurance", "auto")
+
+    home = schemas.read_dataset(
+        "nerdwallet", "clean", nerd_path,
+        usecols=["state", "year", "avg_annual_usd"], missing="empty",
+    ).reindex(columns=["state", "year", "avg_annual_usd"])
+    home_sum = _total_n(home, ["state", "year"], "avg_annual_usd")
+    home_sum.insert(0, "insurance", "home")
+    home_sum["first"] = float("nan")
+
+    out = pd.concat([auto_sum, home_sum], ignore_index=True)[columns]
+    return out.astype({"year": "Int64", "n": "int64"})
+
+
+def _total_n(df, keys, value):
+    grouped = df.groupby(keys, dropna=False)[value]
+    out = pd.concat([grouped.sum().rename("total"), grouped.count().rename("n")], axis=1)
+    return out.reset_index()
+
+
+# ---------------------------------------------------
+# Build / write / read
+# ---------------------------------------------------
+def build_summaries(data_dir, chunksize=CHUNK_ROWS):
+    """Every summary table as a DataFrame, computed from the clean files."""
+    path = {name: os.path.join(data_dir, file) for name, file in CLEAN_FILES.items()}
+    fema_counts, fema_groups = summarize_fema(path["fema"], chunksize)
+    return {
+        "premiums": summarize_premiums(path["naic"], path["nerdwallet"]),
+        "fema_counts": fema_counts,
+        "fema_groups": fema_groups,
+        "noaa_state_year": summarize_noaa(path["noaa"], chunksize),
+    }
+
+
+def summary_paths(data_dir):
+    return {name: os.path.join(data_dir, file) for name, file in SUMMARY_FILES.items()}
+
+
+def write_summaries(data_dir, chunksize=CHUNK_ROWS):
+    """Write every summary next to the clean files; returns {name: rows}."""
+    paths = summary_paths(data_dir)
+    rows = {}
+    for name, df in build_summaries(data_dir, chunksize).items():
+        tmp_path = paths[name] + ".part"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, paths[name])
+        rows[name] = len(df)
+    return rows
+
+
+def read_summary(name, path):
+    return schemas.read_dataset("summary", name, path)
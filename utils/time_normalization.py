@@ -1,5 +1,14 @@
 # utils/time_normalization.py
 
+import numpy as np
+import pandas as pd
+
+from utils.vectorized import map_unique
+
+# Four character heads that int() parses the same way on every platform
+_SIMPLE_INT = r"[+-]?\d+\s*"
+
+
 def normalize_year(value):
     """
     Convert various year formats to int year.
@@ -20,3 +29,27 @@ def normalize_year(value):
         return int(s[:4])
     except ValueError:
         return None
+
+
+def _normalize_year_uniques(uniques):
+    text = pd.Series([str(v) for v in uniques], dtype=object).str.strip()
+    head = text.str[:4]
+    long_enough = (text.str.len() >= 4).to_numpy()
+    simple = long_enough & head.str.fullmatch(_SIMPLE_INT, case=True).fillna(False).to_numpy(dtype=bool)
+
+    out = np.full(len(uniques), None, dtype=object)
+    out[simple] = head[simple].to_numpy(dtype=object).astype(np.int64)
+
+    # anything unusual (unicode digits, underscores) goes through int() itself
+    for i in np.flatnonzero(long_enough & ~simple):
+        out[i] = normalize_year(uniques[i])
+    return out
+
+
+def normalize_year_series(series):
+    """
+    Column version of normalize_year with identical results.
+    Distinct values are parsed once with vectorized string ops and the
+    years are broadcast back onto every row.
+    """
+    return map_unique(series, _normalize_year_uniques)
@@ -1,5 +1,14 @@
 # utils/value_normalization.py
 
+import numpy as np
+import pandas as pd
+
+from utils.vectorized import map_unique
+
+# Plain decimal numbers; float() parses these identically to the scalar path
+_SIMPLE_FLOAT = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+
 def normalize_dollar(value):
     """
     Normalize dollar like numbers to float.
@@ -18,3 +27,36 @@ def normalize_dollar(value):
         return float(s)
     except ValueError:
         return None
+
+
+def _normalize_dollar_uniques(uniques):
+    text = pd.Series([str(v) for v in uniques], dtype=object).str.strip()
+    cleaned = text.str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+    simple = cleaned.str.fullmatch(_SIMPLE_FLOAT).fillna(False).to_numpy(dtype=bool)
+
+    out = np.full(len(uniques), None, dtype=object)
+    out[simple] = cleaned[simple].to_numpy(dtype=object).astype(np.float64)
+
+    # "inf", "nan", "1_000" and friends go through float() itself
+    for i in np.flatnonzero(~simple):
+        out[i] = normalize_dollar(uniques[i])
+    return out
+
+
+def normalize_dollar_series(series):
+    """
+    Column version of normalize_dollar with identical results.
+    Numeric columns are already floats; text columns strip "$" and ","
+    with vectorized string ops over the distinct values only. Categorical
+    columns come back as float64 with NaN for missing values.
+    """
+    if pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return series.astype("float64")
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # apply on a categorical maps the categories, and its result is
+        # categorical, float or object with None depending on which of them
+        # parse; always give the float column, missing and unparsable as NaN
+        return map_unique(series.astype(object), _normalize_dollar_uniques).astype("float64")
+
+    return map_unique(series, _normalize_dollar_uniques)
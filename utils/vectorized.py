@@ -0,0 +1,44 @@
+# utils/vectorized.py
+
+import numpy as np
+import pandas as pd
+
+
+def map_unique(series, normalize_uniques):
+    """
+    Normalize each distinct value of a Series once and broadcast the result.
+
+    normalize_uniques receives an object array of the distinct values
+    (missing values included once) and returns an object array of results
+    in the same order. The output dtype is inferred the same way
+    Series.apply infers it, so results line up with the scalar functions.
+    """
+    if len(series) == 0:
+        # Series.apply hands back an empty Series of the input dtype
+        return series.copy()
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+
+    if series.dtype == object:
+        # factorize folds None into NaN, but the scalar functions
+        # return None for None, so keep it as its own distinct value
+        is_none = series.to_numpy(dtype=object) == None  # noqa: E711
+        if is_none.any():
+            codes = codes.copy()
+            codes[is_none] = len(uniques)
+            uniques = np.append(uniques, np.array([None], dtype=object))
+
+    values = np.asarray(normalize_uniques(uniques), dtype=object)
+
+    # infer the dtype only from values that actually occur
+    used = np.bincount(codes, minlength=len(values)) > 0
+    if not used.all():
+        values = values[used]
+        codes = (np.cumsum(used) - 1)[codes]
+
+    mapped = pd.Series(values, dtype=object).infer_objects()
+    out = mapped.take(codes)
+    out.index = series.index
+    out.name = series.name
+    return out
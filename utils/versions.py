@@ -0,0 +1,175 @@
+# utils/versions.py
+#
+# Versioned data directories. Every refresh writes into a new directory
+# under data/versions/ and is published by atomically replacing the
+# data/CURRENT pointer file, so readers only ever see a complete set of
+# files and older versions stay around for rollback:
+#
+#   data/
+#     CURRENT                  name of the published version
+#     versions/20261018T120000Z/
+#       noaa_weather.csv ... clean_*.csv, summary_*.csv, clean_manifest.json
+#     cache/  reports/         shared between versions
+#
+# A new version starts as hard links to the files of the current one, so
+# unchanged datasets cost no copy and the manifest still skips them. Files
+# must therefore be replaced (write_csv), never rewritten in place, or the
+# change would leak into every version sharing the file.
+#
+# Without a CURRENT pointer (a tree from before versioning) readers use
+# the files in data/ itself.
+
+import os
+import shutil
+from datetime import datetime, timezone
+
+VERSIONS_DIR = "versions"
+POINTER_FILE = "CURRENT"
+PUBLISHED_MARKER = ".published"
+
+# files carried into a new version; caches and reports stay in the root
+DATA_SUFFIXES = (".csv", ".json")
+
+
+# ---------------------------------------------------
+# Reading the pointer
+# ---------------------------------------------------
+def current_version(root):
+    """Name of the published version, or None if nothing was published yet."""
+    try:
+        with open(os.path.join(root, POINTER_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_dir(root, name):
+    return os.path.join(root, VERSIONS_DIR, name)
+
+
+def current_dir(root):
+    """Folder readers should use: the published version, or root itself."""
+    name = current_version(root)
+    return version_dir(root, name) if name else root
+
+
+# ---------------------------------------------------
+# Writing
+# ---------------------------------------------------
+def write_csv(df, path, **kwargs):
+    """df.to_csv(path) through a temporary file, so path is replaced in one step."""
+    tmp_path = path + ".part"
+    df.to_csv(tmp_path, index=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # other file system, or no hard link support
+        shutil.copy2(src, dst)
+
+
+def create_version(root):
+    """
+    Make a new, unpublished version seeded with the current data files and
+    return (name, path).
+    """
+    os.makedirs(os.path.join(root, VERSIONS_DIR), exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    name, n = stamp, 1
+    while True:
+        path = version_dir(root, name)
+        try:
+            os.mkdir(path)
+            break
+        except FileExistsError:
+            n += 1
+            name = f"{stamp}-{n}"
+
+    source = current_dir(root)
+    for entry in os.scandir(source):
+        if entry.is_file() and entry.name.endswith(DATA_SUFFIXES):
+            _link_or_copy(entry.path, os.path.join(path, entry.name))
+    return name, path
+
+
+def publish(root, name):
+    """Point CURRENT at version name; readers switch on their next read."""
+    path = version_dir(root, name)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No data version {name!r} in {root}")
+
+    open(os.path.join(path, PUBLISHED_MARKER), "w").close()
+    tmp_path = os.path.join(root, POINTER_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, POINTER_FILE))
+
+
+# ---------------------------------------------------
+# History, rollback and pruning
+# ---------------------------------------------------
+def list_versions(root):
+    """Every version, oldest first, as {"name", "published", "current", "files", "bytes"}."""
+    base = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(base):
+        return []
+
+    current = current_version(root)
+    versions = []
+    for entry in sorted(os.scandir(base), key=lambda e: e.name):
+        if not entry.is_dir():
+            continue
+        files = [f for f in os.scandir(entry.path) if f.is_file() and f.name != PUBLISHED_MARKER]
+        versions.append({
+            "name": entry.name,
+            "published": os.path.exists(os.path.join(entry.path, PUBLISHED_MARKER)),
+            "current": entry.name == current,
+            "files": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+        })
+    return versions
+
+
+def rollback(root, name=None):
+    """Publish version name, or the newest published version before the current one."""
+    if name is None:
+        current = current_version(root)
+        older = [
+            v["name"] for v in list_versions(root)
+            if v["published"] and current is not None and v["name"] < current
+        ]
+        if not older:
+            raise FileNotFoundError("No earlier published data version to roll back to")
+        name = older[-1]
+    publish(root, name)
+    return name
+
+
+def prune(root, keep=5):
+    """
+    Delete all but the newest `keep` published versions (never the current
+    one), plus unpublished leftovers older than the current version, i.e.
+    failed runs. Newer unpublished versions may belong to a running refresh.
+    Returns the deleted names.
+    """
+    current = current_version(root)
+    versions = list_versions(root)
+    published = [v["name"] for v in versions if v["published"]]
+    kept = set(published[-keep:]) if keep > 0 else set()
+    if current:
+        kept.add(current)
+
+    deleted = []
+    for v in versions:
+        if v["name"] in kept:
+            continue
+        if not v["published"] and (current is None or v["name"] > current):
+            continue
+        shutil.rmtree(version_dir(root, v["name"]))
+        deleted.append(v["name"])
+    return deleted
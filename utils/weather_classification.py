@@ -0,0 +1,84 @@
+# utils/weather_classification.py
+#
+# Batch version of the archived classify_weather / fetch_state_year_counts.
+# Works on whole columns of cached daily summaries at once, so counts for
+# every state and year come from a handful of array operations, and new
+# thresholds only need the cached rows, not another API pull.
+
+import numpy as np
+import pandas as pd
+
+# Thresholds for bad weather
+PRECIP_THRESHOLD_MM = 0.1        # any measurable precip
+WIND_MAX_THRESHOLD_MS = 13.4     # about 30 mph
+
+COUNT_COLUMNS = [
+    "total_days",
+    "bad_days_total",
+    "precip_bad_days",
+    "wind_bad_days",
+    "both_precip_and_wind_days",
+]
+
+
+def classify_days(precip_total, wind_max,
+                  precip_threshold=PRECIP_THRESHOLD_MM,
+                  wind_threshold=WIND_MAX_THRESHOLD_MS):
+    """
+    Classify many days at once.
+    Missing values count as 0.0, matching get_numeric in the archived script.
+    Returns boolean arrays (precip_bad, wind_bad, bad_weather).
+    """
+    precip = np.nan_to_num(np.asarray(precip_total, dtype="float64"), nan=0.0)
+    wind = np.nan_to_num(np.asarray(wind_max, dtype="float64"), nan=0.0)
+
+    precip_bad = precip >= precip_threshold
+    wind_bad = wind >= wind_threshold
+    return precip_bad, wind_bad, precip_bad | wind_bad
+
+
+def count_bad_weather_days(daily: pd.DataFrame,
+                           precip_threshold=PRECIP_THRESHOLD_MM,
+                           wind_threshold=WIND_MAX_THRESHOLD_MS) -> pd.DataFrame:
+    """
+    Count bad weather days per state per year.
+
+    daily needs columns state, date (YYYY-MM-DD), precip_total and wind_max,
+    as returned by SQLiteCheckpointStore.daily_frame.
+    """
+    if daily.empty:
+        return pd.DataFrame(columns=["state", "year"] + COUNT_COLUMNS)
+
+    precip_bad, wind_bad, bad = classify_days(
+        daily["precip_total"].to_numpy(dtype="float64", na_value=np.nan),
+        daily["wind_max"].to_numpy(dtype="float64", na_value=np.nan),
+        precip_threshold,
+        wind_threshold,
+    )
+
+    years = daily["date"].astype(str).str[:4].astype("int64").to_numpy()
+    state_codes, state_idx = np.unique(daily["state"].to_numpy(dtype=str), return_inverse=True)
+    year_values, year_idx = np.unique(years, return_inverse=True)
+
+    # one flat group id per (state, year), then a bincount per measure
+    group = state_idx * len(year_values) + year_idx
+    n_groups = len(state_codes) * len(year_values)
+
+    counts = {
+        "total_days": np.bincount(group, minlength=n_groups),
+        "bad_days_total": np.bincount(group, weights=bad, minlength=n_groups),
+        "precip_bad_days": np.bincount(group, weights=precip_bad, minlength=n_groups),
+        "wind_bad_days": np.bincount(group, weights=wind_bad, minlength=n_groups),
+        "both_precip_and_wind_days": np.bincount(
+            group, weights=precip_bad & wind_bad, minlength=n_groups
+        ),
+    }
+
+    out = pd.DataFrame(
+        {
+            "state": np.repeat(state_codes, len(year_values)),
+            "year": np.tile(year_values, len(state_codes)),
+            **{name: values.astype("int64") for name, values in counts.items()},
+        }
+    )
+    return out[out["total_days"] > 0].reset_index(drop=True)